@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
-from .models import User, Tag, Question, Answer, Comment, Vote, Diploma
+from .models import User, Tag, Question, Answer, Comment, Vote, Diploma, DiplomaImport, Job
 
 # Custom User Admin
 @admin.register(User)
@@ -27,9 +27,10 @@ class TagAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug', 'question_count')
     search_fields = ('name', 'slug')
     prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = ('question_count',)
     
     def question_count(self, obj):
-        return obj.questions.count()
+        return obj.question_count
     question_count.short_description = 'Questions'
 
 # Question Admin
@@ -53,7 +54,7 @@ class QuestionAdmin(admin.ModelAdmin):
     )
     
     def answer_count(self, obj):
-        count = obj.answers.count()
+        count = obj.answer_count
         if count > 0:
             return format_html('<span style="color: green; font-weight: bold;">{}</span>', count)
         return format_html('<span style="color: gray;">0</span>')
@@ -127,11 +128,11 @@ class VoteAdmin(admin.ModelAdmin):
 # Diploma Admin
 @admin.register(Diploma)
 class DiplomaAdmin(admin.ModelAdmin):
-    list_display = ('serial_number', 'student_name', 'student_id', 'degree_name', 'graduation_date', 'is_signed', 'qr_preview')
-    list_filter = ('is_signed', 'graduation_date', 'issue_date')
+    list_display = ('serial_number', 'student_name', 'student_id', 'degree_name', 'graduation_date', 'is_signed', 'qr_status', 'qr_preview')
+    list_filter = ('is_signed', 'qr_status', 'graduation_date', 'issue_date')
     search_fields = ('student_name', 'student_id', 'serial_number', 'degree_name')
     date_hierarchy = 'graduation_date'
-    readonly_fields = ('serial_number', 'issue_date', 'signature_data', 'qr_code_preview')
+    readonly_fields = ('serial_number', 'issue_date', 'signature_key_id', 'signature_data', 'qr_status', 'qr_code_preview')
     
     fieldsets = (
         ('Informations Étudiant', {
@@ -141,11 +142,11 @@ class DiplomaAdmin(admin.ModelAdmin):
             'fields': ('degree_name', 'major', 'graduation_date')
         }),
         ('Certification', {
-            'fields': ('serial_number', 'is_signed', 'signature_data', 'issue_date'),
+            'fields': ('serial_number', 'is_signed', 'signature_key_id', 'signature_data', 'issue_date'),
             'classes': ('collapse',)
         }),
         ('QR Code', {
-            'fields': ('qr_code', 'qr_code_preview'),
+            'fields': ('qr_code', 'qr_status', 'qr_code_preview'),
             'classes': ('collapse',)
         }),
     )
@@ -162,6 +163,21 @@ class DiplomaAdmin(admin.ModelAdmin):
         return 'Aucun QR code généré'
     qr_code_preview.short_description = 'Aperçu QR Code'
 
+# Diploma Import Admin
+@admin.register(DiplomaImport)
+class DiplomaImportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'format', 'status', 'total', 'created', 'failed', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'format')
+    readonly_fields = ('status', 'total', 'created', 'failed', 'errors', 'created_at', 'finished_at')
+
+# Job Admin
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('key', 'kind', 'status', 'attempts', 'created_at', 'updated_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('key',)
+    readonly_fields = ('created_at', 'updated_at')
+
 # Customize admin site
 admin.site.site_header = "Stack Overflow - Administration"
 admin.site.site_title = "Stack Overflow Admin"
@@ -3,3 +3,18 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # Enregistre les gestionnaires de la file de tâches (api/jobs.py)
+        from . import imports, qrcodes  # noqa: F401
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+        from .metrics import instrument_connection
+        # Temps SQL par requête HTTP (api/metrics.py), y compris depuis l'ORM asynchrone
+        connection_created.connect(instrument_connection)
+        from .search import restore_triggers
+        # Triggers plein texte SQLite perdus quand une migration reconstruit api_question
+        post_migrate.connect(restore_triggers, sender=self)
+        from .signing import get_keyring
+        # Clés de signature lues une seule fois, au démarrage : une clé invalide échoue tout de suite
+        get_keyring()
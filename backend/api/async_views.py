@@ -0,0 +1,179 @@
+"""
+Vues asynchrones des lectures les plus fréquentes : liste et détail des questions, liste des
+tags, vérification d'un diplôme. Actives avec ASYNC_VIEWS (par défaut sous ASGI), routées
+avant le routeur DRF sur les mêmes motifs et sous les mêmes noms.
+
+Sous ASGI, une requête qui attend la base ou le cache ne bloque pas de thread : l'ORM
+asynchrone n'en prend un que le temps de chaque requête SQL. Chaque vue prépare le ViewSet
+du routeur comme le ferait DRF (authentification, négociation, permissions, queryset,
+pagination, sérialiseurs) et lit les mêmes entrées de cache : les réponses sont identiques.
+Les autres méthodes, la recherche plein texte, l'API navigable et toute erreur sont confiées
+au ViewSet lui-même, exécuté dans un thread.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, PermissionDenied, ValidationError
+from django.http import Http404, HttpResponse
+from django.urls import re_path
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+from . import verification
+from .cache import aensure_tokens, detail_key, get_cache, list_key, stats, version_key
+from .conditional import make_etag, not_modified, set_validators
+from .search import QuestionSearchFilter
+
+# Paramètres dont le traitement reste synchrone (recherche : backends de api/search.py ; tags :
+# ids lus avant de filtrer, voir search.filter_tags)
+FALLBACK_PARAMS = (api_settings.SEARCH_PARAM, QuestionSearchFilter.tag_param)
+
+
+def prepare(callback, request, kwargs):
+    # Ce que font ViewSetMixin.as_view et APIView.dispatch avant d'appeler l'action
+    view = callback.cls(**callback.initkwargs)
+    view.action_map = callback.actions
+    for method, action in callback.actions.items():
+        setattr(view, method, getattr(view, action))
+    if hasattr(view, 'get') and not hasattr(view, 'head'):
+        view.head = view.get
+    view.args, view.kwargs = (), kwargs
+    view.request = view.initialize_request(request, **kwargs)
+    view.headers = view.default_response_headers
+    return view
+
+
+def render(view, data, status=200):
+    renderer = view.request.accepted_renderer
+    content = renderer.render(data, view.request.accepted_media_type, view.get_renderer_context())
+    return HttpResponse(content, status=status, content_type=renderer.media_type)
+
+
+def cached(view, name, data, etag):
+    # Même réponse que CachedResponseMixin.cached_response
+    stats.record(name, hit=True)
+    response = not_modified(view.request, etag) or set_validators(render(view, data), etag)
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def uncached(view, name, data, etag):
+    stats.record(name, hit=False)
+    response = set_validators(render(view, data), etag)
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+async def cached_list(view, request):
+    # CachedResponseMixin.list
+    cache = get_cache()
+    namespace = view.cache_namespace
+    name = f'{namespace}:list'
+    keys = view.list_generations(request)
+    generation = await aensure_tokens(cache, keys)
+    key = list_key(namespace, ''.join(generation[token] for token in keys), request)
+    entry = await cache.aget(key)
+    if entry is not None and (not entry['versions'] or await cache.aget_many(list(entry['versions'])) == entry['versions']):
+        return cached(view, name, entry['data'], entry.get('etag'))
+
+    queryset = view.filter_queryset(view.get_queryset())
+    page = await view.paginator.apaginate_queryset(queryset, view.request, view=view)
+    serializer = view.get_serializer(page, many=True)
+    if hasattr(serializer, 'aload'):
+        # Requêtes complémentaires du sérialiseur de lignes (QuestionRowsSerializer)
+        await serializer.aload(page)
+    data = view.paginator.get_paginated_response(serializer.data).data
+    versions = {}
+    if view.cache_item_versions:
+        keys = [version_key(namespace, item['id']) for item in data['results'] if 'id' in item]
+        versions = await aensure_tokens(cache, keys)
+    etag = make_etag(key, *sorted(versions.values()))
+    await cache.aset(key, {'data': data, 'versions': versions, 'etag': etag}, settings.API_CACHE_TIMEOUT)
+    return uncached(view, name, data, etag)
+
+
+async def cached_retrieve(view, request, pk):
+    # CachedResponseMixin.retrieve
+    cache = get_cache()
+    namespace = view.cache_namespace
+    name = f'{namespace}:detail'
+    key = detail_key(namespace, pk, request)
+    versions = await aensure_tokens(cache, [version_key(namespace, pk)])
+    etag = make_etag(key, *versions.values())
+    response = not_modified(request, etag)
+    if response is not None:
+        stats.record(name, hit=True)
+        return response
+    entry = await cache.aget(key)
+    if entry is not None and entry['versions'] == versions:
+        return cached(view, name, entry['data'], etag)
+
+    queryset = view.filter_queryset(view.get_queryset())
+    try:
+        instance = await queryset.aget(pk=pk)
+    except (ObjectDoesNotExist, TypeError, ValueError, ValidationError):
+        raise Http404
+    view.check_object_permissions(view.request, instance)
+    data = view.get_serializer(instance).data
+    await cache.aset(key, {'data': data, 'versions': versions}, settings.API_CACHE_TIMEOUT)
+    return uncached(view, name, data, etag)
+
+
+async def diploma_verify(view, request, pk):
+    # DiplomaViewSet.verify
+    result, = await verification.averify_serials([pk])
+    if result['status'] == 'NOT_FOUND':
+        return render(view, result, status=404)
+    etag = make_etag('verify', *sorted(result.items()))
+    max_age = settings.DIPLOMA_VERIFY_CACHE_TIMEOUT
+    return not_modified(request, etag, max_age=max_age) or set_validators(render(view, result), etag, max_age=max_age)
+
+
+def async_view(callback, handler):
+    fallback = sync_to_async(callback)
+
+    async def view(request, *args, **kwargs):
+        if request.method != 'GET' or any(param in request.GET for param in FALLBACK_PARAMS):
+            return await fallback(request, *args, **kwargs)
+        drf_view = prepare(callback, request, kwargs)
+        try:
+            if 'HTTP_AUTHORIZATION' in request.META:
+                # Jeton validé et utilisateur chargé en base, comme DRF le fait même en lecture
+                await sync_to_async(drf_view.initial)(drf_view.request)
+            else:
+                drf_view.initial(drf_view.request)
+            if drf_view.request.accepted_renderer.format != 'json':
+                response = None
+            else:
+                response = await handler(drf_view, request, **kwargs)
+        except (APIException, Http404, PermissionDenied):
+            # Réponse d'erreur construite par DRF lui-même (corps, en-têtes WWW-Authenticate...)
+            response = None
+        finally:
+            # Réplica choisi par initial (api/replicas.py), rendu comme à la fin de dispatch
+            drf_view.release_replica()
+        if response is None:
+            return await fallback(request, *args, **kwargs)
+        for header, value in drf_view.headers.items():
+            response[header] = value
+        return response
+
+    return csrf_exempt(view)
+
+
+HANDLERS = {
+    'question-list': cached_list,
+    'question-detail': cached_retrieve,
+    'tag-list': cached_list,
+    'diploma-verify': diploma_verify,
+}
+
+
+def urlpatterns(router):
+    """Routes asynchrones à placer avant `router.urls` : mêmes motifs, mêmes noms."""
+    return [
+        re_path(str(pattern.pattern), async_view(pattern.callback, HANDLERS[pattern.name]), name=pattern.name)
+        for pattern in router.urls
+        # Variantes à suffixe (.json, .api) : laissées au routeur
+        if pattern.name in HANDLERS and 'format' not in pattern.pattern.regex.groupindex
+    ]
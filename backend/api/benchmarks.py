@@ -0,0 +1,254 @@
+"""
+Scénarios de charge de l'API (voir la commande bench_api).
+
+Chaque scénario tire une requête au hasard (méthode, chemin, corps, utilisateur) dans le
+jeu de données de seed_data ; le runner la rejoue via le client de test Django (dans le
+processus : nombre de requêtes SQL mesuré) ou contre un serveur WSGI/ASGI lancé à part.
+"""
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .cache import get_cache
+from .models import User, Tag, Question, Answer, Diploma
+
+# Champs de la liste affichés par la page d'accueil du frontend (Home.jsx)
+LIST_FIELDS = 'id,author,author_name,title,excerpt,tags_detail,created_at,votes,answers_count'
+SEARCHES = ['django', 'postgres index', 'erreur migration', 'react formulaire', 'cache token jwt']
+
+
+class Dataset:
+    """Identifiants tirés au sort par les scénarios, lus une fois avant la mesure."""
+
+    def __init__(self, sample=5000):
+        self.users = list(User.objects.filter(username__startswith='seed-').values_list('pk', flat=True)[:sample])
+        self.questions = list(Question.objects.order_by('-pk').values_list('pk', flat=True)[:sample])
+        self.answers = list(Answer.objects.order_by('-pk').values_list('pk', flat=True)[:sample])
+        self.tags = list(Tag.objects.values_list('slug', flat=True)[:sample])
+        self.serials = list(Diploma.objects.order_by('-pk').values_list('serial_number', flat=True)[:sample])
+        if not self.users or not self.questions or not self.tags or not self.answers or not self.serials:
+            raise ValueError("Jeu de données vide : lancez d'abord `manage.py seed_data`.")
+        self.tokens = {}
+
+    def token(self, user_id):
+        # Jeton JWT forgé localement : pas de /api/token/ (hachage du mot de passe) dans la mesure
+        if user_id not in self.tokens:
+            self.tokens[user_id] = str(AccessToken.for_user(User(pk=user_id)))
+        return self.tokens[user_id]
+
+
+def question_list(data, rng):
+    return 'GET', '/api/questions/', None, None
+
+
+def question_list_votes(data, rng):
+    return 'GET', '/api/questions/?ordering=-votes', None, None
+
+
+def question_list_page(data, rng):
+    return 'GET', '/api/questions/?page_size=100', None, None
+
+
+def question_list_fields(data, rng):
+    return 'GET', f'/api/questions/?page_size=100&fields={LIST_FIELDS}', None, None
+
+
+def question_detail(data, rng):
+    return 'GET', f'/api/questions/{rng.choice(data.questions)}/', None, None
+
+
+def question_related(data, rng):
+    return 'GET', f'/api/questions/{rng.choice(data.questions)}/related/', None, None
+
+
+def question_similar(data, rng):
+    body = {'title': ' '.join(rng.sample(SEARCHES, 2)), 'tags': [rng.choice(data.tags)]}
+    return 'POST', '/api/questions/similar/', body, None
+
+
+def question_search(data, rng):
+    return 'GET', f'/api/questions/?search={urllib.parse.quote(rng.choice(SEARCHES))}', None, None
+
+
+def question_list_tag(data, rng):
+    return 'GET', f'/api/questions/?tag={rng.choice(data.tags)}', None, None
+
+
+def tag_list(data, rng):
+    return 'GET', '/api/tags/', None, None
+
+
+def tag_autocomplete(data, rng):
+    return 'GET', f'/api/tags/autocomplete/?q={urllib.parse.quote(rng.choice(data.tags)[:rng.randint(1, 6)])}', None, None
+
+
+def answer_detail(data, rng):
+    return 'GET', f'/api/answers/{rng.choice(data.answers)}/', None, None
+
+
+def question_vote(data, rng):
+    return 'POST', f'/api/questions/{rng.choice(data.questions)}/vote/', {'value': rng.choice((1, -1))}, rng.choice(data.users)
+
+
+def answer_create(data, rng):
+    body = {'question': rng.choice(data.questions), 'content': 'Réponse de charge'}
+    return 'POST', '/api/answers/', body, rng.choice(data.users)
+
+
+def diploma_verify(data, rng):
+    return 'GET', f'/api/diplomas/{rng.choice(data.serials)}/verify/', None, None
+
+
+def diploma_verify_batch(data, rng):
+    return 'POST', '/api/diplomas/verify/', {'serials': rng.sample(data.serials, min(len(data.serials), 50))}, None
+
+
+# Nom -> fonction(dataset, rng) -> (méthode, chemin, corps JSON, id utilisateur ou None)
+SCENARIOS = {
+    'question_list': question_list,
+    'question_list_votes': question_list_votes,
+    'question_list_page': question_list_page,
+    'question_list_fields': question_list_fields,
+    'question_detail': question_detail,
+    'question_search': question_search,
+    'question_related': question_related,
+    'question_similar': question_similar,
+    'question_list_tag': question_list_tag,
+    'tag_list': tag_list,
+    'tag_autocomplete': tag_autocomplete,
+    'answer_detail': answer_detail,
+    'question_vote': question_vote,
+    'answer_create': answer_create,
+    'diploma_verify': diploma_verify,
+    'diploma_verify_batch': diploma_verify_batch,
+}
+# Scénarios qui écrivent : exclus par défaut pour garder un jeu de données stable
+WRITE_SCENARIOS = {'question_vote', 'answer_create'}
+
+
+def percentile(sorted_values, fraction):
+    # Rang le plus proche, comme bench_search
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class InProcessTransport:
+    """Client de test Django : pas de réseau, requêtes SQL comptées par requête HTTP."""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def __call__(self, method, path, body, token):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            # Hôte accepté par ALLOWED_HOSTS hors du lanceur de tests (comme bench_verify)
+            client = self.local.client = Client(HTTP_HOST='localhost')
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'GET':
+                response = client.get(path, **headers)
+            else:
+                response = client.generic(method, path, json.dumps(body), content_type='application/json', **headers)
+        return response.status_code, len(queries)
+
+
+class HTTPTransport:
+    """Serveur lancé à part (gunicorn, uvicorn, runserver) : seule la latence est mesurée."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def __call__(self, method, path, body, token):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as exc:
+            return exc.code, None
+
+
+def run_scenario(name, transport, data, requests=200, concurrency=1, warmup=10, seed=42, cold=False):
+    """
+    Rejoue `requests` requêtes du scénario ; renvoie latences (ms), requêtes SQL et débit.
+    `cold` vide le cache applicatif avant chaque requête (hors mesure ; cache partagé seulement en HTTP).
+    """
+    scenario = SCENARIOS[name]
+    rng = random.Random(f'{seed}:{name}')
+    calls = [scenario(data, rng) for _ in range(warmup + requests)]
+
+    def send(call):
+        method, path, body, user_id = call
+        token = data.token(user_id) if user_id else None
+        if cold:
+            get_cache().clear()
+        start = time.perf_counter()
+        status, queries = transport(method, path, body, token)
+        return (time.perf_counter() - start) * 1000, status, queries
+
+    for call in calls[:warmup]:
+        send(call)
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        def worker(call):
+            try:
+                return send(call)
+            finally:
+                close_old_connections()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(worker, calls[warmup:]))
+    else:
+        samples = [send(call) for call in calls[warmup:]]
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(sample[0] for sample in samples)
+    statuses = Counter(str(sample[1]) for sample in samples)
+    queries = [sample[2] for sample in samples if sample[2] is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(count for status, count in statuses.items() if int(status) >= 400),
+        'status': dict(sorted(statuses.items())),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else None,
+        'max_queries': max(queries) if queries else None,
+        'throughput_rps': round(len(samples) / elapsed, 1),
+    }
+
+
+def compare(results, baseline, max_regression=0.2):
+    """
+    Écarts par rapport à une exécution de référence : p95 plus lent de plus de
+    `max_regression` (fraction), plus de requêtes SQL au pire, ou nouvelles erreurs.
+    """
+    problems = []
+    for name, result in results['scenarios'].items():
+        reference = baseline.get('scenarios', {}).get(name)
+        if reference is None:
+            continue
+        if result['p95_ms'] > reference['p95_ms'] * (1 + max_regression):
+            problems.append(f"{name}: p95 {result['p95_ms']} ms > {reference['p95_ms']} ms (+{max_regression:.0%})")
+        # Maximum plutôt que moyenne : la moyenne dépend des succès de cache, pas un N+1
+        if None not in (result['max_queries'], reference.get('max_queries')) and result['max_queries'] > reference['max_queries']:
+            problems.append(f"{name}: jusqu'à {result['max_queries']} requêtes SQL par requête > {reference['max_queries']}")
+        if result['errors'] > reference['errors']:
+            problems.append(f"{name}: {result['errors']} erreurs > {reference['errors']}")
+    return problems
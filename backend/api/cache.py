@@ -0,0 +1,244 @@
+import hashlib
+import threading
+import uuid
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from django.core.checks import Error, Tags, register
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.response import Response
+
+from . import metrics
+from .conditional import make_etag, not_modified, set_validators
+
+
+class CacheStats:
+    """Compteurs de hits/miss par espace de clés, propres au processus."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+    def record(self, name, hit):
+        with self.lock:
+            self.counts[name]['hits' if hit else 'misses'] += 1
+        metrics.cache_event(hits=int(hit), misses=int(not hit))
+
+    def snapshot(self):
+        with self.lock:
+            return {name: dict(counts) for name, counts in self.counts.items()}
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+
+stats = CacheStats()
+
+
+class LocMemCache(BaseLocMemCache):
+    """
+    LocMem dont les méthodes asynchrones appellent directement les synchrones : tout se
+    passe en mémoire, le passage par un thread (sync_to_async) coûterait plus que l'accès.
+    """
+
+    async def aget(self, key, default=None, version=None):
+        return self.get(key, default, version)
+
+    async def aget_many(self, keys, version=None):
+        return self.get_many(keys, version)
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set(key, value, timeout, version)
+
+    async def aset_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.set_many(data, timeout, version)
+
+    async def adelete(self, key, version=None):
+        return self.delete(key, version)
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    # Jetons de version, index des tags, lectures collées au primaire, résultats de vérification :
+    # une invalidation n'atteint que le processus qui l'a faite si le cache lui est propre
+    backend = settings.CACHES[settings.API_CACHE_ALIAS]['BACKEND']
+    if settings.WEB_CONCURRENCY <= 1 or not issubclass(import_string(backend), BaseLocMemCache):
+        return []
+    return [Error(
+        f"Cache {backend} propre à chaque processus avec {settings.WEB_CONCURRENCY} workers : les autres "
+        "workers servent des réponses périmées après une écriture.",
+        hint="Utilisez un cache partagé (CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache, "
+             "Redis, Memcached) ou WEB_CONCURRENCY=1.",
+        id='api.E001',
+    )]
+
+
+def generation_key(namespace):
+    return f'api:{namespace}:generation'
+
+
+def version_key(namespace, pk):
+    return f'api:{namespace}:{pk}:version'
+
+
+def written_key(namespace):
+    # Posée à chaque invalidation quand des réplicas sont configurés (voir api/replicas.py)
+    return f'api:{namespace}:written'
+
+
+def query_key(request):
+    # request.GET plutôt que query_params : sert aussi aux vues asynchrones (HttpRequest)
+    params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    return hashlib.sha1(urlencode(params, doseq=True).encode()).hexdigest()
+
+
+def list_key(namespace, generation, request):
+    # L'hôte fait partie de la clé : les liens `next` de la pagination sont absolus
+    return f'api:{namespace}:list:{generation}:{request.get_host()}:{query_key(request)}'
+
+
+def detail_key(namespace, pk, request):
+    return f'api:{namespace}:detail:{pk}:{query_key(request)}'
+
+
+def token_timeout():
+    # Un jeton expiré est remplacé par un neuf : jamais de réponse périmée, au pire un MISS.
+    # Il survit aux entrées qui le portent, sans quoi elles seraient invalidées avant terme.
+    return max(settings.API_CACHE_TOKEN_TIMEOUT, 2 * settings.API_CACHE_TIMEOUT)
+
+
+def ensure_tokens(cache, keys):
+    # Jetons de version : une clé absente (jamais posée, expirée ou évincée) reçoit un jeton
+    # neuf, ce qui invalide toute entrée enregistrée avec l'ancien jeton
+    tokens = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in tokens}
+    if missing:
+        cache.set_many(missing, timeout=token_timeout())
+        tokens.update(missing)
+    return tokens
+
+
+async def aensure_tokens(cache, keys):
+    tokens = await cache.aget_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in tokens}
+    if missing:
+        await cache.aset_many(missing, timeout=token_timeout())
+        tokens.update(missing)
+    return tokens
+
+
+def invalidate(namespace, ids=(), lists=False):
+    """Invalide les entrées des objets `ids` et, si `lists`, toutes les listes de l'espace."""
+    keys = [version_key(namespace, pk) for pk in ids]
+    if lists:
+        keys.append(generation_key(namespace))
+    if not keys:
+        return
+
+    def bump():
+        cache = get_cache()
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, timeout=token_timeout())
+        if settings.DATABASE_REPLICAS:
+            cache.set(written_key(namespace), True, settings.REPLICA_STICKY_SECONDS)
+
+    bump()
+    if transaction.get_connection().in_atomic_block:
+        # Encore une fois après COMMIT : un lecteur concurrent a pu remettre en cache l'état d'avant
+        transaction.on_commit(bump)
+
+
+def invalidate_questions(ids=(), lists=False):
+    invalidate('questions', {str(pk) for pk in ids}, lists=lists)
+
+
+class CachedResponseMixin:
+    """
+    Cache de lecture pour `list`/`retrieve` d'un ViewSet.
+
+    Une entrée de détail porte le jeton de version de son objet ; une page de liste
+    porte la génération de l'espace (et celles de `list_generations`) et, si
+    `cache_item_versions`, le jeton de chaque élément de la page. Une écriture ne change que les jetons concernés.
+    Ces mêmes jetons servent d'ETag : un If-None-Match à jour reçoit un 304.
+    """
+    cache_namespace = None
+    cache_actions = ('list', 'retrieve')
+    cache_item_versions = False
+
+    def list_generations(self, request):
+        # Générations portées par une page de liste ; une vue en ajoute selon l'ordre demandé
+        return [generation_key(self.cache_namespace)]
+
+    def list(self, request, *args, **kwargs):
+        if 'list' not in self.cache_actions:
+            return super().list(request, *args, **kwargs)
+        cache = get_cache()
+        name = f'{self.cache_namespace}:list'
+        keys = self.list_generations(request)
+        generation = ensure_tokens(cache, keys)
+        key = list_key(self.cache_namespace, ''.join(generation[token] for token in keys), request)
+        entry = cache.get(key)
+        if entry is not None and self.tokens_match(cache, entry['versions']):
+            return self.cached_response(request, name, entry['data'], entry.get('etag'))
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            versions = {}
+            if self.cache_item_versions:
+                items = response.data.get('results', []) if isinstance(response.data, dict) else response.data
+                keys = [version_key(self.cache_namespace, item['id']) for item in items if 'id' in item]
+                versions = ensure_tokens(cache, keys)
+            etag = make_etag(key, *sorted(versions.values()))
+            cache.set(key, {'data': response.data, 'versions': versions, 'etag': etag}, settings.API_CACHE_TIMEOUT)
+            set_validators(response, etag)
+        return self.uncached_response(name, response)
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'retrieve' not in self.cache_actions:
+            return super().retrieve(request, *args, **kwargs)
+        cache = get_cache()
+        name = f'{self.cache_namespace}:detail'
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        key = detail_key(self.cache_namespace, pk, request)
+        # Jeton lu avant de construire la réponse : une écriture concurrente invalidera l'entrée
+        versions = ensure_tokens(cache, [version_key(self.cache_namespace, pk)])
+        etag = make_etag(key, *versions.values())
+        # Validateur connu sans lire l'entrée : le 304 ne coûte qu'un accès au cache
+        response = not_modified(request, etag)
+        if response is not None:
+            stats.record(name, hit=True)
+            return response
+        entry = cache.get(key)
+        if entry is not None and entry['versions'] == versions:
+            return self.cached_response(request, name, entry['data'], etag)
+
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, {'data': response.data, 'versions': versions}, settings.API_CACHE_TIMEOUT)
+            set_validators(response, etag)
+        return self.uncached_response(name, response)
+
+    def tokens_match(self, cache, versions):
+        return not versions or cache.get_many(list(versions)) == versions
+
+    def cached_response(self, request, name, data, etag):
+        stats.record(name, hit=True)
+        response = not_modified(request, etag)
+        if response is None:
+            response = set_validators(Response(data), etag)
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def uncached_response(self, name, response):
+        stats.record(name, hit=False)
+        response['X-Cache'] = 'MISS'
+        return response
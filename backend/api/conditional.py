@@ -0,0 +1,59 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest())
+
+
+def not_modified(request, etag=None, last_modified=None, max_age=None):
+    # Réponse 304 si les validateurs du client correspondent, sinon None
+    if request.method not in ('GET', 'HEAD') or not (etag or last_modified):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified, max_age)
+    return response
+
+
+def set_validators(response, etag=None, last_modified=None, max_age=None):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    if max_age is not None:
+        # Réponse publique réutilisable telle quelle pendant max_age secondes
+        patch_cache_control(response, public=True, max_age=max_age)
+    elif etag or last_modified:
+        # Le client garde sa copie mais la revalide à chaque fois
+        patch_cache_control(response, no_cache=True)
+    return response
+
+
+class ConditionalMixin:
+    """
+    ETag / Last-Modified sur `list` et `retrieve` : `get_validators` les calcule à partir
+    de colonnes stockées ou de jetons de version, avant toute sérialisation.
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        return None, None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def conditional(self, view, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
@@ -0,0 +1,81 @@
+from django.db.models import F, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Tag, Question, Answer, Comment, Vote
+
+
+def bump(queryset, **deltas):
+    # UPDATE ... SET champ = champ + delta : pas de lecture préalable, pas de course
+    return queryset.update(**{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def answer_created(answer):
+    bump(Question.objects.filter(pk=answer.question_id), answer_count=1)
+
+
+def answer_deleted(answer):
+    bump(Question.objects.filter(pk=answer.question_id, answer_count__gt=0), answer_count=-1)
+
+
+def comment_created(comment):
+    if comment.answer_id:
+        bump(Answer.objects.filter(pk=comment.answer_id), comment_count=1)
+    elif comment.question_id:
+        bump(Question.objects.filter(pk=comment.question_id), comment_count=1)
+
+
+def comment_deleted(comment):
+    if comment.answer_id:
+        bump(Answer.objects.filter(pk=comment.answer_id, comment_count__gt=0), comment_count=-1)
+    elif comment.question_id:
+        bump(Question.objects.filter(pk=comment.question_id, comment_count__gt=0), comment_count=-1)
+
+
+def tags_added(tag_ids):
+    if tag_ids:
+        bump(Tag.objects.filter(pk__in=tag_ids), question_count=1)
+
+
+def tags_removed(tag_ids):
+    if tag_ids:
+        bump(Tag.objects.filter(pk__in=tag_ids, question_count__gt=0), question_count=-1)
+
+
+def _count(queryset, fk):
+    return Coalesce(Subquery(
+        queryset.filter(**{fk: OuterRef('pk')}).order_by().values(fk).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def _sum(queryset, fk):
+    return Coalesce(Subquery(
+        queryset.filter(**{fk: OuterRef('pk')}).order_by().values(fk).annotate(total=Sum('value')).values('total')
+    ), 0)
+
+
+# Recalcul complet : (modèle, champ, expression), appliqué par tranches de clés primaires
+RECOUNTS = (
+    (Question, 'answer_count', lambda: _count(Answer.objects.all(), 'question')),
+    (Question, 'comment_count', lambda: _count(Comment.objects.all(), 'question')),
+    (Answer, 'comment_count', lambda: _count(Comment.objects.all(), 'answer')),
+    (Tag, 'question_count', lambda: _count(Question.tags.through.objects.all(), 'tag')),
+)
+
+# Totaux de votes recalculés depuis api_vote (répare une perte du tampon write-behind)
+VOTE_RECOUNTS = (
+    (Question, 'votes', lambda: _sum(Vote.objects.filter(answer__isnull=True), 'question')),
+    (Answer, 'votes', lambda: _sum(Vote.objects.filter(question__isnull=True), 'answer')),
+)
+
+
+def recount(model, field, expression, batch_size=1000, using=None):
+    # Tranches courtes : chaque UPDATE ne verrouille que batch_size lignes
+    manager = model.objects.using(using) if using else model.objects
+    updated = 0
+    last_pk = 0
+    while True:
+        pks = list(manager.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return updated
+        updated += manager.filter(pk__gte=pks[0], pk__lte=pks[-1]).update(**{field: expression()})
+        last_pk = pks[-1]
@@ -0,0 +1,344 @@
+"""
+Événements en direct d'une question : `GET /api/questions/{id}/events/` (Server-Sent Events),
+servi sous ASGI avant Django par `route` (config/asgi.py, EVENTS_ENABLED).
+
+Un client abonné reçoit de petits deltas plutôt que de relire `questions/{id}/` :
+
+    votes        {question, answer (null : la question), votes}
+    answer       {question, answer : réponse sérialisée, corps en HTML seulement}
+    best_answer  {question, answer}
+    comment      {question, answer (null : commentaire de la question), comment}
+    reset        événements perdus (file pleine, notification trop grosse, reconnexion du
+                 backend) : le client relit la question
+
+Les écritures publient après COMMIT (`publish`). La diffusion passe par le courtier du
+processus (`Broker`) : abonnements par question, une file bornée par connexion, un seul
+rappel par boucle d'événements quel que soit le nombre d'abonnés. Le backend (EVENTS_BACKEND)
+relie les processus entre eux : `LocalBackend` pour un seul processus, `PostgresBackend`
+(NOTIFY/LISTEN) pour plusieurs workers ou serveurs. Une connexion inactive ne coûte qu'une
+tâche asyncio en attente sur sa file, plus un commentaire toutes les EVENTS_HEARTBEAT secondes
+pour les proxys.
+"""
+import asyncio
+import json
+import logging
+import re
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connections, router, transaction
+from django.utils.module_loading import import_string
+
+from .models import Question
+
+PATH_RE = re.compile(r'/api/questions/(\d+)/events/')
+CHANNEL = 'api_events'
+# Taille maximale d'une notification PostgreSQL (8000 octets), en-tête compris
+NOTIFY_LIMIT = 7900
+RETRY_MS = 3000
+# Attente maximale de l'écoute du backend avant d'ouvrir un flux (secondes)
+LISTEN_TIMEOUT = 5
+
+logger = logging.getLogger(__name__)
+
+
+def frame(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n'
+
+
+# Trames encodées : les files des abonnés contiennent des octets, encodés une fois par événement
+RESET_FRAME = frame('reset', {}).encode()
+HEARTBEAT_FRAME = b': ping\n\n'
+# Délai de reconnexion automatique d'EventSource
+RETRY_FRAME = f'retry: {RETRY_MS}\n\n'.encode()
+
+
+class Subscription:
+    """Une connexion abonnée : file bornée, remplie depuis sa boucle d'événements."""
+
+    def __init__(self, question_id, loop, size):
+        self.question_id = question_id
+        self.loop = loop
+        self.queue = asyncio.Queue(size)
+
+    def put(self, data):
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            # Client trop lent : les événements en attente sont remplacés par un reset
+            self.replace(RESET_FRAME)
+
+    def close(self):
+        # Fin du flux, même file pleine
+        self.replace(None)
+
+    def replace(self, data):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(data)
+
+
+def fan_out(subscriptions, data):
+    for subscription in subscriptions:
+        subscription.put(data)
+
+
+class Broker:
+    """Abonnements du processus par question ; `deliver` peut être appelé depuis n'importe quel thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, question_id, size=None):
+        subscription = Subscription(
+            question_id, asyncio.get_running_loop(), size or settings.EVENTS_QUEUE_SIZE,
+        )
+        with self.lock:
+            self.subscriptions[question_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.question_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscriptions[subscription.question_id]
+
+    def has_subscribers(self, question_id):
+        return question_id in self.subscriptions
+
+    def count(self):
+        with self.lock:
+            return sum(len(subscribers) for subscribers in self.subscriptions.values())
+
+    def deliver(self, question_id, data):
+        with self.lock:
+            subscribers = list(self.subscriptions.get(question_id, ()))
+        self.dispatch(subscribers, data.encode())
+
+    def reset_all(self):
+        with self.lock:
+            subscribers = [subscription for group in self.subscriptions.values() for subscription in group]
+        self.dispatch(subscribers, RESET_FRAME)
+
+    def dispatch(self, subscribers, data):
+        # Les files asyncio ne sont pas thread-safe : un rappel par boucle, qui remplit ses files
+        by_loop = defaultdict(list)
+        for subscription in subscribers:
+            by_loop[subscription.loop].append(subscription)
+        for loop, group in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(fan_out, group, data)
+            except RuntimeError:
+                # Boucle fermée (arrêt du worker) : connexions perdues de toute façon
+                pass
+
+
+class LocalBackend:
+    """Diffusion dans le processus seul : un serveur ASGI à un worker, les tests."""
+    # Publication différée après COMMIT par `publish`
+    transactional = False
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, question_id, event, data, using=None):
+        if self.broker.has_subscribers(question_id):
+            self.broker.deliver(question_id, frame(event, data))
+
+    async def start(self):
+        pass
+
+
+class PostgresBackend:
+    """
+    NOTIFY dans la transaction de l'écriture (livré au COMMIT, jamais après un ROLLBACK) ;
+    chaque processus qui a des abonnés écoute le canal sur une connexion asynchrone à part.
+    """
+    transactional = True
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.listeners = {}
+
+    def publish(self, question_id, event, data, using=None):
+        payload = f'{question_id}\n{frame(event, data)}'
+        if len(payload.encode()) > NOTIFY_LIMIT:
+            payload = f'{question_id}\n{RESET_FRAME.decode()}'
+        alias = using or router.db_for_write(Question)
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+
+    async def start(self):
+        # Un écouteur par boucle d'événements (une par worker uvicorn) ; le premier abonné attend
+        # le LISTEN, sans quoi les notifications d'ici là lui échapperaient
+        loop = asyncio.get_running_loop()
+        listener = self.listeners.get(loop)
+        if listener is None or listener[0].done():
+            ready = asyncio.Event()
+            listener = self.listeners[loop] = (loop.create_task(self.listen(ready)), ready)
+        try:
+            await asyncio.wait_for(listener[1].wait(), LISTEN_TIMEOUT)
+        except TimeoutError:
+            # Base injoignable : le flux s'ouvre quand même, un reset suivra la connexion
+            pass
+
+    def conninfo(self):
+        from psycopg.conninfo import make_conninfo
+
+        # Paramètres de connexion de Django, OPTIONS comprises (sslmode, options...), sans ses
+        # objets Python (cursor_factory, context) ni prepare_threshold, qui n'en sont pas
+        params = connections[router.db_for_write(Question)].get_connection_params()
+        return make_conninfo(**{
+            key: str(value) for key, value in params.items()
+            if value is not None and key not in ('cursor_factory', 'context', 'prepare_threshold')
+        })
+
+    async def listen(self, ready):
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.conninfo(), autocommit=True) as connection:
+                    await connection.execute(f'LISTEN {CHANNEL}')
+                    # Abonnés arrivés avant l'écoute (coupure, attente dépassée) : ils relisent leur question
+                    self.broker.reset_all()
+                    ready.set()
+                    async for notify in connection.notifies():
+                        question_id, _, data = notify.payload.partition('\n')
+                        self.broker.deliver(int(question_id), data)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Écoute des événements interrompue")
+            await asyncio.sleep(1)
+
+
+broker = Broker()
+_backends = {}
+
+
+def get_backend():
+    path = settings.EVENTS_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)(broker)
+    return _backends[path]
+
+
+def publish(question_id, event, data, using=None):
+    """Publie un événement de la question une fois la transaction en cours validée."""
+    backend = get_backend()
+
+    def send():
+        try:
+            backend.publish(question_id, event, data, using)
+        except Exception:
+            # L'écriture est faite : un événement perdu ne doit pas la faire échouer
+            logger.exception("Publication de l'événement %s impossible", event)
+
+    if backend.transactional:
+        send()
+    else:
+        transaction.on_commit(send, using=using)
+
+
+def question_exists(pk):
+    try:
+        return Question.objects.filter(pk=pk).exists()
+    finally:
+        # Thread de l'exécuteur partagé, hors du cycle de requête de Django : connexion rendue ici
+        close_old_connections()
+
+
+def route(application):
+    """
+    Application ASGI de config/asgi.py : flux d'événements servis ici, tout le reste par Django.
+
+    Le gestionnaire ASGI de Django réserve à chaque requête un thread (et sa connexion à la
+    base) jusqu'à la fin de la réponse, soit toute la durée d'un abonnement ; ici, une
+    connexion inactive n'est qu'une tâche en attente sur sa file.
+    """
+    async def app(scope, receive, send):
+        if scope['type'] == 'http':
+            match = PATH_RE.fullmatch(scope['path'])
+            if match:
+                return await serve(scope, receive, send, int(match[1]))
+        return await application(scope, receive, send)
+
+    return app
+
+
+def cors_headers(scope):
+    # Ces réponses ne traversent pas django-cors-headers : mêmes réglages appliqués ici
+    origin = dict(scope['headers']).get(b'origin')
+    if origin is None:
+        return []
+    if settings.CORS_ALLOW_ALL_ORIGINS:
+        return [(b'access-control-allow-origin', b'*')]
+    if origin.decode('latin-1') in getattr(settings, 'CORS_ALLOWED_ORIGINS', ()):
+        return [(b'access-control-allow-origin', origin), (b'vary', b'origin')]
+    return []
+
+
+async def respond(send, status, data, headers):
+    await send({
+        'type': 'http.response.start', 'status': status,
+        'headers': [(b'content-type', b'application/json'), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(data).encode()})
+
+
+async def watch(receive, subscription):
+    # Seul message attendu après la requête : la déconnexion du client
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    subscription.close()
+
+
+async def serve(scope, receive, send, question_id):
+    headers = cors_headers(scope)
+    if scope['method'] != 'GET':
+        detail = f'Method "{scope["method"]}" not allowed.'
+        return await respond(send, 405, {'detail': detail}, [(b'allow', b'GET'), *headers])
+    if not await sync_to_async(question_exists, thread_sensitive=False)(question_id):
+        return await respond(send, 404, {'detail': 'No Question matches the given query.'}, headers)
+
+    await get_backend().start()
+    subscription = broker.subscribe(question_id)
+    watcher = asyncio.create_task(watch(receive, subscription))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+            # Pas de mise en tampon par nginx
+            (b'x-accel-buffering', b'no'), *headers,
+        ]})
+        data = RETRY_FRAME
+        while data is not None:
+            await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+            try:
+                data = await asyncio.wait_for(subscription.queue.get(), settings.EVENTS_HEARTBEAT)
+            except TimeoutError:
+                data = HEARTBEAT_FRAME
+    finally:
+        broker.unsubscribe(subscription)
+        watcher.cancel()
+
+
+@register(Tags.compatibility, deploy=True)
+def check_backend(app_configs, **kwargs):
+    if not settings.EVENTS_ENABLED or settings.SERVER_MODE != 'asgi' or settings.WEB_CONCURRENCY <= 1:
+        return []
+    if import_string(settings.EVENTS_BACKEND) is not LocalBackend:
+        return []
+    return [Warning(
+        f"EVENTS_BACKEND=api.events.LocalBackend avec {settings.WEB_CONCURRENCY} workers : un événement "
+        f"n'atteint que les abonnés du worker qui a traité l'écriture.",
+        hint="Utilisez api.events.PostgresBackend, ou WEB_CONCURRENCY=1.",
+        id='api.W003',
+    )]
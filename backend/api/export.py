@@ -0,0 +1,178 @@
+"""
+Export NDJSON du corpus questions/réponses et des diplômes (un objet JSON par ligne), pour
+les sauvegardes et l'analytique : action `export` des ViewSets (StreamingHttpResponse) et
+commande `export_data`.
+
+Lecture par curseur serveur (`.iterator(chunk_size=...)`) : les préchargements (tags,
+réponses, commentaires, votes) sont faits lot par lot, la mémoire ne dépend que de la taille
+d'un lot. Export incrémental : `since` ne garde que ce qui a changé depuis ce filigrane
+(question, ou l'une de ses réponses ou commentaires). Le filigrane à repasser au prochain
+export est pris avant la lecture. Les votes (qui ne touchent pas updated_at) et les
+suppressions ne sont repris que par un export complet.
+"""
+import json
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import renderers
+
+from .models import Question, Answer, Comment, Vote, Diploma
+
+CHUNK_SIZE = 500
+# Transactions en cours et retard des réplicas : un même objet peut revenir deux fois, les
+# consommateurs l'écrasent par son id
+WATERMARK_OVERLAP = timedelta(minutes=1)
+BUFFER_SIZE = 64 * 1024
+# Colonnes exportées (plus le nom de l'auteur) : le HTML rendu se recalcule depuis le Markdown
+QUESTION_FIELDS = ('id', 'author', 'title', 'description', 'created_at', 'updated_at', 'votes')
+ANSWER_FIELDS = ('id', 'author', 'content', 'created_at', 'updated_at', 'votes', 'is_best_answer')
+COMMENT_FIELDS = ('id', 'author', 'content', 'created_at', 'updated_at')
+VOTE_FIELDS = ('user', 'value')
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    # Erreurs des actions d'export quand le client n'accepte que du NDJSON
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return dump(data) if data is not None else b''
+
+
+def _default(value):
+    # Dates complètes (microsecondes comprises), contrairement à DjangoJSONEncoder
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dump(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=_default).encode() + b'\n'
+
+
+def ndjson(records, buffer_size=BUFFER_SIZE):
+    """Lignes NDJSON regroupées par blocs d'environ `buffer_size` octets."""
+    buffer = []
+    size = 0
+    for record in records:
+        line = dump(record)
+        buffer.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+async def aiterate(blocks):
+    """
+    Blocs pour une réponse servie sous ASGI : Django y lirait un itérateur synchrone en entier
+    avant l'envoi. Un passage par le thread des connexions (sync_to_async) par bloc.
+    """
+    blocks = iter(blocks)
+    next_block = sync_to_async(next)
+    while (block := await next_block(blocks, None)) is not None:
+        yield block
+
+
+def parse_since(value):
+    """Filigrane ISO 8601 (`2026-10-18T08:00:00+00:00`) ; sans fuseau : celui du projet."""
+    if not value:
+        return None
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError(f"Invalid since: {value!r} (expected an ISO 8601 datetime)")
+    return since if timezone.is_aware(since) else timezone.make_aware(since)
+
+
+def watermark():
+    return timezone.now() - WATERMARK_OVERLAP
+
+
+def changed_questions(since):
+    # Une question change avec ses réponses et ses commentaires (index sur updated_at)
+    answers = Answer.objects.filter(updated_at__gte=since)
+    comments = Comment.objects.filter(updated_at__gte=since)
+    return (
+        Q(updated_at__gte=since)
+        | Q(pk__in=answers.values('question_id'))
+        | Q(pk__in=comments.filter(question__isnull=False).values('question_id'))
+        | Q(pk__in=comments.filter(answer__isnull=False).values('answer__question_id'))
+    )
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def _grouped(queryset, key):
+    # Lignes d'un lot groupées par clé étrangère, par id croissant
+    groups = defaultdict(list)
+    for row in queryset.order_by('pk'):
+        groups[row.pop(key)].append(row)
+    return groups
+
+
+def questions(since=None, using=None, chunk_size=CHUNK_SIZE):
+    """
+    Questions avec tags, réponses, commentaires et votes, par id croissant : lignes de
+    `.values()` sans instances de modèles, 6 requêtes par lot.
+    """
+    author_name = F('author__username')
+    queryset = Question.objects.using(using).order_by('pk').values(*QUESTION_FIELDS, author_name=author_name)
+    if since is not None:
+        queryset = queryset.filter(changed_questions(since))
+    comments = Comment.objects.using(using)
+    votes = Vote.objects.using(using)
+    for chunk in _chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        ids = [row['id'] for row in chunk]
+        tags = _grouped(Question.tags.through.objects.using(using).filter(question_id__in=ids).values(
+            'question_id', name=F('tag__name'),
+        ), 'question_id')
+        answers = _grouped(Answer.objects.using(using).filter(question_id__in=ids).values(
+            'question_id', *ANSWER_FIELDS, author_name=author_name,
+        ), 'question_id')
+        answer_ids = [answer['id'] for rows in answers.values() for answer in rows]
+        answer_votes = _grouped(votes.filter(answer_id__in=answer_ids).values('answer_id', *VOTE_FIELDS), 'answer_id')
+        answer_comments = _grouped(comments.filter(answer_id__in=answer_ids).values(
+            'answer_id', *COMMENT_FIELDS, author_name=author_name,
+        ), 'answer_id')
+        question_votes = _grouped(votes.filter(question_id__in=ids).values('question_id', *VOTE_FIELDS), 'question_id')
+        question_comments = _grouped(comments.filter(question_id__in=ids).values(
+            'question_id', *COMMENT_FIELDS, author_name=author_name,
+        ), 'question_id')
+        for row in chunk:
+            for answer in answers[row['id']]:
+                answer['votes_cast'] = answer_votes[answer['id']]
+                answer['comments'] = answer_comments[answer['id']]
+            yield {
+                **row,
+                'tags': [tag['name'] for tag in tags[row['id']]],
+                'votes_cast': question_votes[row['id']],
+                'comments': question_comments[row['id']],
+                'answers': answers[row['id']],
+            }
+
+
+def diplomas(since=None, using=None, chunk_size=CHUNK_SIZE):
+    """Diplômes, colonnes telles qu'en base (signature comprise), par id croissant."""
+    columns = [field.attname for field in Diploma._meta.concrete_fields]
+    queryset = Diploma.objects.using(using).order_by('pk')
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    return queryset.values(*columns).iterator(chunk_size=chunk_size)
+
+
+EXPORTS = {
+    'questions': questions,
+    'diplomas': diplomas,
+}
@@ -0,0 +1,153 @@
+"""
+Fils de questions classés (`?feed=`) : hot, week, month, unanswered, unaccepted.
+
+Les scores ne sont pas calculés à la lecture : ils sont matérialisés dans FeedRank, une ligne
+par (fil, question), et recalculés pour une question dans la transaction qui change ses votes,
+son nombre de réponses ou sa meilleure réponse (`refresh`). Une page de fil est un parcours de
+l'index (feed, score, question) ; `recompute_feeds` reconstruit tout par lots.
+
+Score d'activité : votes + ANSWER_WEIGHT × réponses (+ ACCEPTED_BONUS avec une meilleure
+réponse). Score « hot » : log10 de l'activité plus l'âge de la question exprimé en périodes
+HOT_PERIOD (à la Reddit) : une question plus récente de HOT_PERIOD pèse dix fois plus
+d'activité. Le terme de temps ne dépend que de la date de création, le score n'a donc pas à
+être recalculé avec le temps. week et month classent par activité les questions des 7 et 30
+derniers jours ; les lignes sorties de la fenêtre sont ignorées à la lecture et supprimées par
+`recompute_feeds`.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .cache import invalidate, invalidate_questions
+from .models import Question, Answer, FeedRank
+
+ANSWER_WEIGHT = 2
+ACCEPTED_BONUS = 3
+HOT_PERIOD = 45000  # secondes
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+WINDOWS = {
+    'week': timedelta(days=7),
+    'month': timedelta(days=30),
+}
+FEEDS = ('hot', 'week', 'month', 'unanswered', 'unaccepted')
+SCORE_FIELD = 'feed_score'
+# Départage de la pagination : la question telle que vue par l'index (feed, score, question)
+QUESTION_FIELD = 'feed_question'
+# Génération de cache des listes classées par score (fils, ?ordering=votes), changée à chaque
+# reclassement ; les autres listes ne dépendent pas des votes et la gardent
+RANKED = 'questions-ranked'
+
+
+def activity(row):
+    return row['votes'] + ANSWER_WEIGHT * row['answer_count'] + (ACCEPTED_BONUS if row['accepted'] else 0)
+
+
+def hot(row):
+    score = activity(row)
+    order = math.copysign(math.log10(max(abs(score), 1)), score)
+    return order + (row['created_at'] - HOT_EPOCH).total_seconds() / HOT_PERIOD
+
+
+def scores(row, now):
+    """(fil, score) des fils dont la question fait partie."""
+    hot_score = hot(row)
+    yield 'hot', hot_score
+    for feed, window in WINDOWS.items():
+        if row['created_at'] >= now - window:
+            yield feed, float(activity(row))
+    if not row['answer_count']:
+        yield 'unanswered', hot_score
+    if not row['accepted']:
+        yield 'unaccepted', hot_score
+
+
+def rows(queryset):
+    accepted = Answer.objects.filter(question=OuterRef('pk'), is_best_answer=True)
+    return queryset.values('id', 'votes', 'answer_count', 'created_at', accepted=Exists(accepted))
+
+
+def write(batch, using=None, now=None, before=None):
+    """
+    Lignes recalculées : écrasées en place (ON CONFLICT), puis retrait des fils quittés, parmi
+    `before` (lignes existantes) s'il est connu. Renvoie les (fil, question) écrits.
+    """
+    now = now or timezone.now()
+    ranks = [
+        FeedRank(feed=feed, question_id=row['id'], score=score, created_at=row['created_at'])
+        for row in batch for feed, score in scores(row, now)
+    ]
+    written = {(rank.feed, rank.question_id) for rank in ranks}
+    left = {(feed, row['id']) for row in batch for feed in FEEDS} - written
+    if before is not None:
+        left &= before
+    manager = FeedRank.objects.using(using)
+    manager.bulk_create(
+        ranks, update_conflicts=True, unique_fields=['feed', 'question'], update_fields=['score', 'created_at'],
+    )
+    for feed in {feed for feed, _ in left}:
+        manager.filter(feed=feed, question_id__in=[pk for name, pk in left if name == feed]).delete()
+    return written
+
+
+def refresh(question_ids, using=None):
+    """Reclasse ces questions ; à appeler dans la transaction qui a modifié leurs compteurs."""
+    question_ids = list(question_ids)
+    if not question_ids:
+        return
+    before = set(FeedRank.objects.using(using).filter(question_id__in=question_ids).values_list('feed', 'question_id'))
+    batch = list(rows(Question.objects.using(using).filter(pk__in=question_ids)))
+    write(batch, using, before=before)
+    # Votes, réponses ou meilleure réponse changés : l'ordre des fils et de ?ordering=votes aussi
+    invalidate(RANKED, lists=True)
+
+
+def ranked(request):
+    """Vrai si l'ordre de la liste demandée dépend des scores (voir RANKED)."""
+    ordering = request.GET.get(api_settings.ORDERING_PARAM, '')
+    return bool(request.GET.get(QuestionFeedFilter.feed_param, '').strip()) or 'votes' in ordering
+
+def rebuild(batch_size=1000, using=None):
+    """Reclasse toutes les questions par tranches de clés primaires ; renvoie le nombre de lignes."""
+    now = timezone.now()
+    written, last_pk = 0, 0
+    while True:
+        with transaction.atomic(using=using):
+            batch = list(rows(Question.objects.using(using).filter(pk__gt=last_pk).order_by('pk'))[:batch_size])
+            if not batch:
+                break
+            written += len(write(batch, using, now))
+        last_pk = batch[-1]['id']
+    # Questions supprimées : lignes emportées par la cascade ; fenêtres : lignes trop anciennes
+    for feed, window in WINDOWS.items():
+        FeedRank.objects.using(using).filter(feed=feed, created_at__lt=now - window).delete()
+    invalidate_questions(lists=True)
+    return written
+
+
+class QuestionFeedFilter(BaseFilterBackend):
+    """`?feed=hot|week|month|unanswered|unaccepted` : questions du fil, annotées de leur score."""
+    feed_param = 'feed'
+
+    def get_feed(self, request):
+        feed = request.query_params.get(self.feed_param, '').strip()
+        if feed and feed not in FEEDS:
+            raise ValidationError({self.feed_param: f"Unknown feed: {feed} (expected one of {', '.join(FEEDS)})"})
+        return feed
+
+    def filter_queryset(self, request, queryset, view):
+        feed = self.get_feed(request)
+        if not feed:
+            return queryset
+        ranks = {'ranks__feed': feed}
+        if feed in WINDOWS:
+            ranks['ranks__created_at__gte'] = timezone.now() - WINDOWS[feed]
+        return queryset.filter(**ranks).annotate(**{
+            SCORE_FIELD: F('ranks__score'),
+            QUESTION_FIELD: F('ranks__question'),
+        })
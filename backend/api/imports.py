@@ -0,0 +1,264 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import signing, verification
+from .jobs import enqueue, register, touch
+from .models import Diploma, DiplomaImport
+from .qrcodes import QR_UPLOAD_TO, render_png
+
+FORMATS = ('csv', 'jsonl')
+
+
+class DiplomaRowSerializer(serializers.ModelSerializer):
+    # Unicité vérifiée par tranche (une requête par champ), pas ligne à ligne
+    class Meta:
+        model = Diploma
+        fields = ('student_name', 'student_id', 'degree_name', 'major', 'graduation_date', 'serial_number', 'is_signed')
+        extra_kwargs = {
+            'student_id': {'validators': []},
+            'serial_number': {'validators': [], 'required': False, 'allow_blank': True},
+        }
+
+
+def guess_format(filename):
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    return 'jsonl' if extension in ('jsonl', 'ndjson', 'json') else extension
+
+
+def read_rows(stream, fmt):
+    """(numéro de ligne, enregistrement) pour chaque ligne d'un fichier binaire CSV ou JSONL."""
+    # Décodage strict : un fichier qui n'est pas en UTF-8 lève UnicodeDecodeError (voir import_diplomas)
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='strict', newline='')
+    try:
+        if fmt == 'csv':
+            # Ligne 1 : en-tête ; une cellule vide vaut un champ absent
+            for number, row in enumerate(csv.DictReader(text), start=2):
+                yield number, {key: value for key, value in row.items() if key is not None and value not in ('', None)}
+            return
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+    finally:
+        # Le flux appartient à l'appelant
+        text.detach()
+
+
+def prepare(item):
+    # Exécuté dans le pool de processus : signature et rendu PNG, sans accès à la base
+    fields, signed, with_png = item
+    values = [fields[name] for name in signing.SIGNED_FIELDS]
+    key_id, signature = signing.sign(values) if signed else ('', None)
+    return key_id, signature, render_png(fields['serial_number']) if with_png else None
+
+
+def make_pool(workers):
+    # Un seul processus de rendu n'apporterait que le coût du transfert
+    if not workers or workers < 2:
+        return None
+    # spawn : pas de fork d'un processus multi-thread (worker gunicorn, thread de la file)
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+    )
+
+
+def file_error(exc):
+    if isinstance(exc, UnicodeDecodeError):
+        return 'File is not valid UTF-8.'
+    return f'Invalid CSV file: {exc}'
+
+
+def import_diplomas(stream, fmt, chunk_size=1000, workers=None, progress=None, resume=None):
+    """
+    Importe un fichier CSV/JSONL de diplômes par tranches de `chunk_size` lignes.
+
+    Renvoie {'total', 'created', 'failed', 'errors'} où `errors` liste les lignes
+    rejetées avec leurs erreurs de validation ; un fichier illisible (encodage, CSV
+    invalide) arrête l'import avec une erreur de ligne 0. `progress(report)` est
+    appelé après chaque tranche, dans la transaction qui l'enregistre : `resume`,
+    le dernier rapport enregistré d'un import interrompu, le reprend à la tranche
+    suivante.
+    """
+    workers = settings.DIPLOMA_IMPORT_WORKERS if workers is None else workers
+    report = {'total': 0, 'created': 0, 'failed': 0, 'errors': []}
+    if resume is not None:
+        report.update(resume, errors=list(resume['errors']))
+    # Lignes des tranches déjà enregistrées sautées ; leurs diplômes sont en base (contrôle d'unicité)
+    seen = {'student_id': set(), 'serial_number': set()}
+    rows = islice(read_rows(stream, fmt), report['total'], None)
+    pool = make_pool(workers)
+    try:
+        while True:
+            try:
+                chunk = list(islice(rows, chunk_size))
+            except (UnicodeDecodeError, csv.Error) as exc:
+                report['errors'].append({'row': 0, 'errors': {'file': [file_error(exc)]}})
+                break
+            if not chunk:
+                break
+            valid, diplomas = import_chunk(chunk, seen, pool, report)
+            with transaction.atomic():
+                insert(valid, diplomas, report)
+                report['total'] += len(chunk)
+                report['failed'] = len(report['errors'])
+                if progress is not None:
+                    progress(report)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    report['errors'].sort(key=lambda error: error['row'])
+    return report
+
+
+def reject(report, number, errors):
+    report['errors'].append({'row': number, 'errors': errors})
+
+
+def import_chunk(chunk, seen, pool, report):
+    """Valide et prépare une tranche, sans écrire en base : (lignes valides, diplômes à insérer)."""
+    candidates, generated = [], []
+    for number, row in chunk:
+        if not isinstance(row, dict):
+            reject(report, number, {'non_field_errors': ['Invalid JSON object.']})
+            continue
+        serializer = DiplomaRowSerializer(data=row)
+        if not serializer.is_valid():
+            reject(report, number, serializer.errors)
+            continue
+        data = dict(serializer.validated_data)
+        if not data.get('serial_number'):
+            data['serial_number'] = Diploma.new_serial_number()
+            generated.append(data)
+        candidates.append((number, data))
+    assign_serials(candidates, generated, seen)
+
+    # Doublons dans le fichier puis en base : une requête par champ unique pour toute la tranche
+    existing = {
+        field: set(Diploma.objects.filter(**{f'{field}__in': [data[field] for _, data in candidates]})
+                   .values_list(field, flat=True))
+        for field in seen
+    }
+    valid = []
+    for number, data in candidates:
+        errors = {
+            field: [f'diploma with this {field.replace("_", " ")} already exists.']
+            for field in seen if data[field] in seen[field] or data[field] in existing[field]
+        }
+        if errors:
+            reject(report, number, errors)
+            continue
+        for field in seen:
+            seen[field].add(data[field])
+        valid.append((number, data))
+    if not valid:
+        return [], []
+
+    svg = settings.QR_CODE_FORMAT == 'svg'
+    items = [
+        ({field: data[field] for field in signing.SIGNED_FIELDS}, data.get('is_signed', False), not svg)
+        for _, data in valid
+    ]
+    prepared = pool.map(prepare, items, chunksize=64) if pool else map(prepare, items)
+
+    diplomas = []
+    for (number, data), (key_id, signature, png) in zip(valid, prepared):
+        qr_code = None
+        if png is not None:
+            qr_code = default_storage.save(f"{QR_UPLOAD_TO}qr-{data['serial_number']}.png", ContentFile(png))
+        diplomas.append(Diploma(
+            **data, signature_key_id=key_id, signature_data=signature, qr_code=qr_code, qr_status='READY',
+        ))
+    return valid, diplomas
+
+
+def assign_serials(candidates, generated, seen):
+    """
+    Numéros générés (32 bits) : à quelques dizaines de milliers de lignes une collision
+    est probable. On en tire un autre tant qu'il est pris dans le fichier ou en base.
+    """
+    ids = {id(data) for data in generated}
+    taken = seen['serial_number'] | {data['serial_number'] for _, data in candidates if id(data) not in ids}
+    pending = generated
+    while pending:
+        in_db = set(Diploma.objects.filter(serial_number__in=[data['serial_number'] for data in pending])
+                    .values_list('serial_number', flat=True))
+        retry = []
+        for data in pending:
+            if data['serial_number'] in taken or data['serial_number'] in in_db:
+                data['serial_number'] = Diploma.new_serial_number()
+                retry.append(data)
+            else:
+                taken.add(data['serial_number'])
+        pending = retry
+
+
+def insert(valid, diplomas, report):
+    if not diplomas:
+        return
+    try:
+        with transaction.atomic():
+            Diploma.objects.bulk_create(diplomas, batch_size=500)
+        report['created'] += len(diplomas)
+    except IntegrityError:
+        # Conflit avec une écriture concurrente : ligne à ligne pour attribuer l'erreur
+        for (number, _), diploma in zip(valid, diplomas):
+            try:
+                with transaction.atomic():
+                    Diploma.objects.bulk_create([diploma])
+                report['created'] += 1
+            except IntegrityError as exc:
+                reject(report, number, {'non_field_errors': [str(exc)]})
+    # Un NOT_FOUND a pu être mis en cache pour ces numéros avant l'import
+    verification.forget([diploma.serial_number for diploma in diplomas])
+
+
+def job_key(import_id):
+    return f'diploma_import:{import_id}'
+
+
+def start_import(upload, fmt, user=None):
+    diploma_import = DiplomaImport.objects.create(file=upload, format=fmt, created_by=user)
+    enqueue('diploma_import', job_key(diploma_import.pk), import_id=diploma_import.pk)
+    return diploma_import
+
+
+def import_failed(import_id):
+    DiplomaImport.objects.filter(pk=import_id).update(status='FAILED', finished_at=timezone.now())
+
+
+@register('diploma_import', on_failure=import_failed)
+def run_import(import_id):
+    diploma_import = DiplomaImport.objects.get(pk=import_id)
+    DiplomaImport.objects.filter(pk=import_id).update(status='RUNNING')
+    # Nouvelle tentative (erreur, worker arrêté) : reprise après la dernière tranche enregistrée
+    resume = None
+    if diploma_import.total:
+        resume = {field: getattr(diploma_import, field) for field in ('total', 'created', 'failed', 'errors')}
+
+    def progress(report):
+        # Avancement enregistré avec la tranche ; prolonge aussi le bail de la tâche
+        DiplomaImport.objects.filter(pk=import_id).update(
+            total=report['total'], created=report['created'], failed=report['failed'], errors=report['errors'],
+        )
+        touch(job_key(import_id))
+
+    with diploma_import.file.open('rb') as stream:
+        report = import_diplomas(stream, diploma_import.format, progress=progress, resume=resume)
+    status = 'FAILED' if any(error['row'] == 0 for error in report['errors']) else 'DONE'
+    DiplomaImport.objects.filter(pk=import_id).update(status=status, finished_at=timezone.now(), **report)
@@ -0,0 +1,118 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# kind -> (fonction(**payload), fonction(**payload) appelée après le dernier échec)
+HANDLERS = {}
+
+
+def register(kind, on_failure=None):
+    def decorator(func):
+        HANDLERS[kind] = (func, on_failure)
+        return func
+    return decorator
+
+
+def enqueue(kind, key, **payload):
+    """
+    Met une tâche en file, dans la transaction courante : elle n'est visible du worker
+    qu'après le COMMIT. Une tâche déjà en attente pour `key` n'est pas dupliquée ;
+    une tâche en échec définitif est relancée.
+    """
+    try:
+        with transaction.atomic():
+            Job.objects.create(kind=kind, key=key, payload=payload)
+    except IntegrityError:
+        Job.objects.filter(key=key, status='FAILED').update(status='PENDING', attempts=0, error='', payload=payload)
+    transaction.on_commit(worker.wake)
+
+
+def touch(key):
+    # Prolonge le bail d'une tâche longue (voir JOB_LEASE)
+    Job.objects.filter(key=key, status='RUNNING').update(updated_at=timezone.now())
+
+
+def claim(limit):
+    # Tâches en attente, ou en cours depuis plus de JOB_LEASE secondes (worker disparu)
+    stale = timezone.now() - timedelta(seconds=settings.JOB_LEASE)
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='PENDING') | Q(status='RUNNING', updated_at__lt=stale))
+            .order_by('id')[:limit]
+        )
+        Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status='RUNNING', attempts=F('attempts') + 1, updated_at=timezone.now()
+        )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def run_job(job):
+    func, on_failure = HANDLERS[job.kind]
+    try:
+        func(**job.payload)
+    except Exception as exc:
+        logger.exception("Échec de la tâche %s", job.key)
+        failed = job.attempts >= settings.JOB_MAX_ATTEMPTS
+        Job.objects.filter(pk=job.pk).update(status='FAILED' if failed else 'PENDING', error=repr(exc))
+        if failed and on_failure is not None:
+            on_failure(**job.payload)
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    return True
+
+
+def run_jobs(limit=100):
+    """Exécute les tâches disponibles par lots de `limit` ; renvoie le nombre de tâches réussies."""
+    done = 0
+    while True:
+        jobs = claim(limit)
+        done += sum(run_job(job) for job in jobs)
+        if len(jobs) < limit:
+            return done
+
+
+class JobWorker:
+    """Worker local au processus : réveillé à chaque COMMIT qui met une tâche en file."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.event = threading.Event()
+        self.thread = None
+
+    def wake(self):
+        interval = settings.JOB_POLL_INTERVAL
+        if interval <= 0:
+            return
+        self.event.set()
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, args=(interval,), name='job-worker', daemon=True)
+                self.thread.start()
+
+    def run(self, interval):
+        while True:
+            self.event.wait(interval)
+            self.event.clear()
+            try:
+                run_jobs()
+            except Exception:
+                logger.exception("Échec du worker de tâches")
+            finally:
+                close_old_connections()
+
+
+worker = JobWorker()
@@ -0,0 +1,86 @@
+import json
+import platform
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.benchmarks import SCENARIOS, WRITE_SCENARIOS, Dataset, HTTPTransport, InProcessTransport, compare, run_scenario
+from api.models import Question, Answer, Diploma
+
+
+class Command(BaseCommand):
+    help = "Rejoue les scénarios de charge de l'API (p50/p95/p99, requêtes SQL par requête, débit) ; sortie JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', help=f"Liste séparée par des virgules parmi : {', '.join(SCENARIOS)}")
+        parser.add_argument('--writes', action='store_true', help="Inclut les scénarios qui écrivent (votes, réponses)")
+        parser.add_argument('--requests', type=int, default=200, help="Requêtes mesurées par scénario")
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--cold', action='store_true', help="Vide le cache applicatif avant chaque requête")
+        parser.add_argument('--url', help="Serveur WSGI/ASGI déjà lancé (ex. http://127.0.0.1:8000) au lieu du client de test")
+        parser.add_argument('--output', help="Fichier JSON des résultats (par défaut : sortie standard)")
+        parser.add_argument('--baseline', help="Résultats de référence : échec si une régression dépasse --max-regression")
+        parser.add_argument('--max-regression', type=float, default=0.2, help="Hausse tolérée du p95 (fraction)")
+
+    def handle(self, *args, **options):
+        if options['scenarios']:
+            names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+            unknown = set(names) - set(SCENARIOS)
+            if unknown:
+                raise CommandError(f"Scénarios inconnus : {', '.join(sorted(unknown))}")
+        else:
+            names = [name for name in SCENARIOS if options['writes'] or name not in WRITE_SCENARIOS]
+        try:
+            data = Dataset()
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        transport = HTTPTransport(options['url']) if options['url'] else InProcessTransport()
+
+        results = {
+            'meta': {
+                'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'transport': options['url'] or 'in-process',
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'vote_write_mode': settings.VOTE_WRITE_MODE,
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'cold': options['cold'],
+                'seed': options['seed'],
+                'dataset': {
+                    'questions': Question.objects.count(),
+                    'answers': Answer.objects.count(),
+                    'diplomas': Diploma.objects.count(),
+                },
+            },
+            'scenarios': {},
+        }
+        for name in names:
+            result = run_scenario(
+                name, transport, data, requests=options['requests'], concurrency=options['concurrency'],
+                warmup=options['warmup'], seed=options['seed'], cold=options['cold'],
+            )
+            results['scenarios'][name] = result
+            queries = '-' if result['queries_per_request'] is None else result['queries_per_request']
+            self.stderr.write(
+                f"{name:22} p50={result['p50_ms']:8.2f} ms p95={result['p95_ms']:8.2f} ms p99={result['p99_ms']:8.2f} ms "
+                f"{result['throughput_rps']:8.1f} req/s  SQL/req={queries}  erreurs={result['errors']}"
+            )
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                problems = compare(results, json.load(baseline_file), options['max_regression'])
+            if problems:
+                raise CommandError("Régressions par rapport à la référence :\n" + '\n'.join(problems))
+            self.stderr.write(self.style.SUCCESS("Aucune régression par rapport à la référence."))
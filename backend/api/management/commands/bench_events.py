@@ -0,0 +1,231 @@
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.benchmarks import Dataset, HTTPTransport, percentile
+from api.management.commands.bench_servers import SERVERS
+
+CONNECT_BATCH = 200
+
+
+def rss_kb(pid):
+    # Mémoire résidente d'un processus et de ses enfants (workers gunicorn), en Kio
+    total = 0
+    for task in os.listdir(f'/proc/{pid}/task'):
+        with open(f'/proc/{pid}/task/{task}/children') as children:
+            total += sum(rss_kb(int(child)) for child in children.read().split())
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                total += int(line.split()[1])
+    return total
+
+
+class Subscriber:
+    """Connexion SSE brute : les trames `votes` reçues sont horodatées, le reste ignoré."""
+
+    def __init__(self, question_id):
+        self.question_id = question_id
+        self.received = []
+
+    async def connect(self, port):
+        self.reader, self.writer = await asyncio.open_connection('127.0.0.1', port)
+        self.writer.write(
+            f'GET /api/questions/{self.question_id}/events/ HTTP/1.1\r\nHost: localhost\r\n'
+            f'Accept: text/event-stream\r\n\r\n'.encode()
+        )
+        await self.writer.drain()
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        if not head.startswith(b'HTTP/1.1 200'):
+            raise CommandError(f"Abonnement refusé : {head.splitlines()[0].decode()}")
+
+    async def read(self):
+        # Une trame par bloc (chunked) : il suffit de compter les occurrences dans chaque lecture
+        while data := await self.reader.read(65536):
+            now = time.perf_counter()
+            self.received += [now] * data.count(b'event: votes')
+
+    def close(self):
+        self.writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Charge du flux d'événements (SSE) : lance gunicorn en ASGI, ouvre des milliers d'abonnés "
+        "inactifs répartis sur quelques questions, puis publie des votes et mesure la latence de "
+        "diffusion, le taux de livraison et la mémoire par connexion ; sortie JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=2000)
+        parser.add_argument('--questions', type=int, default=10, help="Questions entre lesquelles répartir les abonnés")
+        parser.add_argument('--events', type=int, default=50, help="Votes publiés, un à la fois")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Workers gunicorn ; au-delà de 1, EVENTS_BACKEND doit relier les processus")
+        parser.add_argument('--backend', help="EVENTS_BACKEND du serveur (par défaut : celui des réglages)")
+        parser.add_argument('--idle', type=float, default=5.0, help="Secondes d'inactivité avant la première publication")
+        parser.add_argument('--timeout', type=float, default=10.0, help="Attente maximale de la diffusion d'un événement")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--port', type=int, default=8766)
+        parser.add_argument('--startup-timeout', type=float, default=30.0)
+        parser.add_argument('--output', help="Fichier JSON des résultats (par défaut : sortie standard)")
+
+    def handle(self, *args, **options):
+        try:
+            data = Dataset()
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        backend = options['backend'] or settings.EVENTS_BACKEND
+        if options['workers'] > 1 and backend == 'api.events.LocalBackend':
+            raise CommandError("Plusieurs workers : un abonné et un vote peuvent tomber sur des processus différents "
+                               "(--backend api.events.PostgresBackend).")
+        # Un descripteur par abonné côté client : limite douce relevée au maximum
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        if options['subscribers'] + 100 > hard:
+            raise CommandError(f"Limite de fichiers ouverts trop basse ({hard}) pour {options['subscribers']} abonnés.")
+
+        process = self.start(backend, options)
+        try:
+            results = asyncio.run(self.run(process, data, options))
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+        results['meta'] = {
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'backend': backend,
+            'workers': options['workers'],
+            'subscribers': options['subscribers'],
+            'questions': options['questions'],
+            'events': options['events'],
+        }
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    async def run(self, process, data, options):
+        rng = random.Random(options['seed'])
+        questions = rng.sample(data.questions, min(options['questions'], len(data.questions)))
+        subscribers = [Subscriber(questions[i % len(questions)]) for i in range(options['subscribers'])]
+        by_question = defaultdict(list)
+        for subscriber in subscribers:
+            by_question[subscriber.question_id].append(subscriber)
+
+        rss_before = rss_kb(process.pid)
+        started = time.perf_counter()
+        connect_times = []
+
+        async def connect(subscriber):
+            begin = time.perf_counter()
+            await subscriber.connect(options['port'])
+            connect_times.append((time.perf_counter() - begin) * 1000)
+
+        # Par vagues : la file d'attente d'accept du serveur n'est pas illimitée
+        for batch in range(0, len(subscribers), CONNECT_BATCH):
+            await asyncio.gather(*(connect(subscriber) for subscriber in subscribers[batch:batch + CONNECT_BATCH]))
+        connected = time.perf_counter() - started
+        readers = [asyncio.create_task(subscriber.read()) for subscriber in subscribers]
+        await asyncio.sleep(options['idle'])
+        rss_idle = rss_kb(process.pid)
+        self.stderr.write(
+            f"{len(subscribers)} abonnés en {connected:.1f} s, "
+            f"{(rss_idle - rss_before) / len(subscribers):.1f} Kio par connexion"
+        )
+
+        transport = HTTPTransport(f"http://127.0.0.1:{options['port']}")
+        latencies, expected, errors = [], 0, 0
+        for _ in range(options['events']):
+            question_id = rng.choice(questions)
+            audience = by_question[question_id]
+            counts = [len(subscriber.received) for subscriber in audience]
+            token = data.token(rng.choice(data.users))
+            sent = time.perf_counter()
+            status, _ = await asyncio.to_thread(
+                transport, 'POST', f'/api/questions/{question_id}/vote/', {'value': rng.choice((1, -1))}, token,
+            )
+            if status != 200:
+                errors += 1
+                continue
+            expected += len(audience)
+            deadline = sent + options['timeout']
+            while time.perf_counter() < deadline and any(
+                len(subscriber.received) <= count for subscriber, count in zip(audience, counts)
+            ):
+                await asyncio.sleep(0.005)
+            latencies += [
+                (subscriber.received[count] - sent) * 1000
+                for subscriber, count in zip(audience, counts) if len(subscriber.received) > count
+            ]
+
+        for reader in readers:
+            reader.cancel()
+        for subscriber in subscribers:
+            subscriber.close()
+        latencies.sort()
+        connect_times.sort()
+        return {
+            'connect_ms': {
+                'p50': round(percentile(connect_times, 0.5), 2),
+                'p99': round(percentile(connect_times, 0.99), 2),
+                'total_s': round(connected, 2),
+            },
+            'server_rss_kb': {
+                'before': rss_before,
+                'idle': rss_idle,
+                'per_connection': round((rss_idle - rss_before) / len(subscribers), 2),
+            },
+            'delivery': {
+                'expected': expected,
+                'delivered': len(latencies),
+                'ratio': round(len(latencies) / expected, 4) if expected else None,
+                'post_errors': errors,
+                # Du début du POST du vote à la réception de la trame par l'abonné
+                'p50_ms': round(percentile(latencies, 0.5), 2) if latencies else None,
+                'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+                'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+                'max_ms': round(latencies[-1], 2) if latencies else None,
+            },
+        }
+
+    def start(self, backend, options):
+        # Comme bench_servers : ni DEBUG ni journal des requêtes lentes ; battement de cœur
+        # plus long que la mesure, pour des abonnés réellement inactifs
+        env = {
+            **os.environ, 'SERVER_MODE': 'asgi', 'DEBUG': 'False', 'METRICS_DIR': '', 'SLOW_REQUEST_THRESHOLD_MS': '0',
+            'EVENTS_ENABLED': 'True', 'EVENTS_BACKEND': backend, 'EVENTS_HEARTBEAT': '600',
+        }
+        command = [
+            sys.executable, '-m', 'gunicorn', *SERVERS['asgi'], '--bind', f"127.0.0.1:{options['port']}",
+            '--workers', str(options['workers']), '--log-level', 'warning',
+        ]
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        deadline = time.monotonic() + options['startup_timeout']
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"Le serveur s'est arrêté au démarrage (code {process.returncode}).")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{options['port']}/api/tags/", timeout=1):
+                    return process
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f"Le serveur n'a pas répondu en {options['startup_timeout']} s.")
@@ -0,0 +1,121 @@
+import json
+import random
+import statistics
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import counters
+from api.models import User, Tag, Question
+from api.search import QuestionSearchFilter, get_backend
+
+WORDS = (
+    'django python react postgres sqlite index requête serveur docker api jwt token cache '
+    'migration modèle vue formulaire erreur exception déploiement nginx gunicorn réseau '
+    'javascript tableau liste dictionnaire boucle fonction classe héritage test pagination'
+).split()
+
+QUERIES = ['django', 'postgres index', 'erreur migration', 'react formulaire', 'cache token jwt', 'gunicorn']
+
+
+class LegacyView:
+    # Configuration historique de QuestionViewSet
+    search_fields = ['title', 'description', 'tags__name']
+
+
+class Command(BaseCommand):
+    help = "Compare la latence de la recherche plein texte et de l'ancien SearchFilter (icontains)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, default=100000, help="Taille du corpus visé")
+        parser.add_argument('--seed', action='store_true', help="Complète le corpus avec des questions synthétiques")
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--json', action='store_true', help="Sortie JSON")
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['questions'])
+
+        factory = APIRequestFactory()
+        results = {'questions': Question.objects.count(), 'backend': type(get_backend()).__name__, 'queries': {}}
+        for text in QUERIES:
+            request = Request(factory.get('/api/questions/', {'search': text}))
+            legacy = filters.SearchFilter().filter_queryset(request, Question.objects.all(), LegacyView())
+            legacy = legacy.order_by('-created_at')
+            ranked = QuestionSearchFilter().filter_queryset(request, Question.objects.all(), None)
+            ranked = ranked.order_by('-search_rank', '-pk')
+            results['queries'][text] = {
+                'legacy': self.measure(legacy, options['runs'], options['page_size']),
+                'fulltext': self.measure(ranked, options['runs'], options['page_size']),
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{results['questions']} questions, backend {results['backend']}")
+        for text, timings in results['queries'].items():
+            legacy, fulltext = timings['legacy'], timings['fulltext']
+            self.stdout.write(
+                f"{text!r:24} icontains p50={legacy['p50_ms']:8.2f} ms p95={legacy['p95_ms']:8.2f} ms | "
+                f"plein texte p50={fulltext['p50_ms']:8.2f} ms p95={fulltext['p95_ms']:8.2f} ms"
+            )
+
+    def measure(self, queryset, runs, page_size):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            list(queryset[:page_size])
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return {
+            'p50_ms': statistics.median(timings),
+            'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        }
+
+    @transaction.atomic
+    def seed(self, target, batch_size=5000):
+        missing = target - Question.objects.count()
+        if missing <= 0:
+            return
+        rng = random.Random(42)
+        author, _ = User.objects.get_or_create(username='bench', defaults={'email': 'bench@example.com'})
+        tags = []
+        for word in WORDS[:12]:
+            tag, _ = Tag.objects.get_or_create(name=word, defaults={'slug': word})
+            tags.append(tag)
+        through = Question.tags.through
+
+        created_ids = []
+        tag_usage = Counter()
+        while missing > 0:
+            size = min(batch_size, missing)
+            questions = Question.objects.bulk_create([
+                Question(
+                    author=author,
+                    title=' '.join(rng.choices(WORDS, k=6)).capitalize(),
+                    description=' '.join(rng.choices(WORDS, k=60)),
+                )
+                for _ in range(size)
+            ])
+            links = [
+                through(question_id=question.pk, tag_id=tag.pk)
+                for question in questions for tag in rng.sample(tags, 2)
+            ]
+            through.objects.bulk_create(links)
+            tag_usage.update(link.tag_id for link in links)
+            created_ids.extend(question.pk for question in questions)
+            missing -= size
+            self.stdout.write(f"{target - missing}/{target} questions", ending='\r')
+        self.stdout.write('')
+        for tag_id, count in tag_usage.items():
+            counters.bump(Tag.objects.filter(pk=tag_id), question_count=count)
+
+        backend = get_backend()
+        for start in range(0, len(created_ids), batch_size):
+            backend.index(created_ids[start:start + batch_size])
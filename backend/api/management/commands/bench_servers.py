@@ -0,0 +1,126 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.benchmarks import SCENARIOS, Dataset, HTTPTransport, run_scenario
+
+# Arguments gunicorn de chaque mode, comme dans entrypoint.sh
+SERVERS = {
+    'wsgi': ['config.wsgi:application'],
+    'asgi': ['config.asgi:application', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+# Lectures servies par les vues asynchrones en mode ASGI (api/async_views.py)
+READ_SCENARIOS = ['question_list', 'question_list_votes', 'question_detail', 'tag_list', 'diploma_verify']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare WSGI et ASGI sous clients concurrents : lance gunicorn dans chaque mode sur la base "
+        "courante (données de seed_data) et rejoue les scénarios de lecture ; sortie JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default='wsgi,asgi')
+        parser.add_argument('--scenarios', default=','.join(READ_SCENARIOS))
+        parser.add_argument('--concurrency', default='1,8,32', help="Nombres de clients concurrents, séparés par des virgules")
+        parser.add_argument('--workers', type=int, default=2, help="Workers gunicorn, identiques dans les deux modes")
+        parser.add_argument('--requests', type=int, default=500, help="Requêtes mesurées par scénario et par niveau de concurrence")
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--startup-timeout', type=float, default=30.0)
+        parser.add_argument('--output', help="Fichier JSON des résultats (par défaut : sortie standard)")
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = (set(modes) - set(SERVERS)) | (set(names) - set(SCENARIOS))
+        if unknown:
+            raise CommandError(f"Modes ou scénarios inconnus : {', '.join(sorted(unknown))}")
+        try:
+            levels = [int(level) for level in options['concurrency'].split(',')]
+            data = Dataset()
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        results = {
+            'meta': {
+                'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'workers': options['workers'],
+                'requests': options['requests'],
+                'concurrency': levels,
+            },
+            'modes': {},
+        }
+        for mode in modes:
+            process = self.start(mode, options)
+            url = f"http://127.0.0.1:{options['port']}"
+            try:
+                transport = HTTPTransport(url)
+                by_level = results['modes'][mode] = {}
+                for level in levels:
+                    by_level[str(level)] = {}
+                    for name in names:
+                        result = run_scenario(
+                            name, transport, data, requests=options['requests'], concurrency=level,
+                            warmup=options['warmup'], seed=options['seed'],
+                        )
+                        by_level[str(level)][name] = result
+                        self.stderr.write(
+                            f"{mode} c={level:<4} {name:22} p50={result['p50_ms']:8.2f} ms p95={result['p95_ms']:8.2f} ms "
+                            f"{result['throughput_rps']:8.1f} req/s  erreurs={result['errors']}"
+                        )
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+        if set(modes) >= {'wsgi', 'asgi'}:
+            results['asgi_vs_wsgi_throughput'] = {
+                level: {
+                    name: round(results['modes']['asgi'][level][name]['throughput_rps']
+                                / results['modes']['wsgi'][level][name]['throughput_rps'], 2)
+                    for name in names
+                }
+                for level in map(str, levels)
+            }
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def start(self, mode, options):
+        # Ni DEBUG (requêtes SQL conservées) ni journal des requêtes lentes pendant la mesure
+        env = {**os.environ, 'SERVER_MODE': mode, 'DEBUG': 'False', 'METRICS_DIR': '', 'SLOW_REQUEST_THRESHOLD_MS': '0'}
+        # Vues asynchrones selon le mode, comme en production
+        env.pop('ASYNC_VIEWS', None)
+        command = [
+            sys.executable, '-m', 'gunicorn', *SERVERS[mode], '--bind', f"127.0.0.1:{options['port']}",
+            '--workers', str(options['workers']), '--log-level', 'warning',
+        ]
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        deadline = time.monotonic() + options['startup_timeout']
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"Le serveur {mode} s'est arrêté au démarrage (code {process.returncode}).")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{options['port']}/api/tags/", timeout=1):
+                    return process
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.2)
+        process.terminate()
+        raise CommandError(f"Le serveur {mode} n'a pas répondu en {options['startup_timeout']} s.")
@@ -0,0 +1,91 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from api import signing
+from api.models import Diploma
+from api.verification import forget
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit de la vérification de diplômes (requêtes/s), à froid, à chaud et par lots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--diplomas', type=int, default=2000, help="Diplômes BENCH-* créés si absents")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', action='store_true', help="Sortie JSON")
+
+    def handle(self, *args, **options):
+        serials = self.diplomas(options['diplomas'])
+        pks = dict(Diploma.objects.filter(serial_number__in=serials).values_list('serial_number', 'pk'))
+        rng = random.Random(options['seed'])
+        sample = [rng.choice(serials) for _ in range(options['requests'])]
+        client = Client(HTTP_HOST='localhost')
+
+        def full(serial):
+            # Référence : détail complet via DiplomaSerializer, comme l'ancienne vérification
+            return client.get(f'/api/diplomas/{pks[serial]}/')
+
+        def cold(serial):
+            forget([serial])
+            return client.get(f'/api/diplomas/{serial}/verify/')
+
+        def warm(serial):
+            return client.get(f'/api/diplomas/{serial}/verify/')
+
+        batch_size = options['batch_size']
+        batches = [sample[i:i + batch_size] for i in range(0, len(sample), batch_size)]
+
+        def batch(serials):
+            forget(serials)
+            return client.post('/api/diplomas/verify/', {'serials': serials}, content_type='application/json')
+
+        results = {}
+        for name, func, items, per_request in (
+            ('full', full, sample, 1),
+            ('verify_cold', cold, sample, 1),
+            ('verify_warm', warm, sample, 1),
+            ('batch_cold', batch, batches, batch_size),
+        ):
+            forget(serials)
+            start = time.perf_counter()
+            for item in items:
+                response = func(item)
+                assert response.status_code == 200, response.status_code
+            elapsed = time.perf_counter() - start
+            results[name] = {
+                'requests': len(items),
+                'seconds': round(elapsed, 3),
+                'requests_per_second': round(len(items) / elapsed, 1),
+                'serials_per_second': round(len(items) * per_request / elapsed, 1),
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:12} {result['requests_per_second']:10.1f} req/s "
+                f"{result['serials_per_second']:10.1f} diplômes/s ({result['requests']} requêtes en {result['seconds']} s)"
+            )
+
+    def diplomas(self, count):
+        serials = [f'BENCH-{i:06d}' for i in range(count)]
+        existing = set(Diploma.objects.filter(serial_number__in=serials).values_list('serial_number', flat=True))
+        diplomas = [
+            Diploma(
+                student_name=f'Étudiant {serial}', student_id=serial, degree_name='Licence', major='Informatique',
+                graduation_date='2026-07-01', serial_number=serial, is_signed=True, qr_status='READY',
+            )
+            for serial in serials if serial not in existing
+        ]
+        signatures = signing.sign_many([[getattr(d, f) for f in signing.SIGNED_FIELDS] for d in diplomas])
+        for diploma, (key_id, signature) in zip(diplomas, signatures):
+            diploma.signature_key_id, diploma.signature_data = key_id, signature
+        Diploma.objects.bulk_create(diplomas, batch_size=1000)
+        return serials
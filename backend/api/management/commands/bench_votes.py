@@ -0,0 +1,71 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.models import User, Question, Vote
+from api.votes import WRITERS, cast_vote, flush_votes
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit de votes (votes/s) sur une seule question chaude, par mode d'écriture"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voters', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--modes', default=','.join(WRITERS))
+        parser.add_argument('--json', action='store_true', help="Sortie JSON")
+
+    def handle(self, *args, **options):
+        author, _ = User.objects.get_or_create(username='bench')
+        question, _ = Question.objects.get_or_create(
+            author=author, title='Question virale (benchmark)', defaults={'description': '...'}
+        )
+        voters = self.voters(options['voters'])
+
+        results = {}
+        for mode in options['modes'].split(','):
+            Vote.objects.filter(question=question).delete()
+            Question.objects.filter(pk=question.pk).update(votes=0)
+
+            def vote(user):
+                try:
+                    cast_vote(user, question, 1, mode=mode)
+                finally:
+                    connection.close()
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                list(pool.map(vote, voters))
+            elapsed = time.perf_counter() - start
+            flush_votes()
+
+            tally = Question.objects.get(pk=question.pk).votes
+            results[mode] = {
+                'votes': len(voters),
+                'seconds': round(elapsed, 3),
+                'votes_per_second': round(len(voters) / elapsed, 1),
+                'tally_ok': tally == len(voters),
+            }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for mode, result in results.items():
+            status = 'OK' if result['tally_ok'] else 'ÉCART'
+            self.stdout.write(
+                f"{mode:8} {result['votes_per_second']:10.1f} votes/s "
+                f"({result['votes']} votes en {result['seconds']} s, total {status})"
+            )
+
+    def voters(self, count):
+        existing = list(User.objects.filter(username__startswith='bench-voter-').order_by('pk')[:count])
+        missing = count - len(existing)
+        if missing > 0:
+            User.objects.bulk_create([
+                User(username=f'bench-voter-{len(existing) + i}') for i in range(missing)
+            ])
+            existing = list(User.objects.filter(username__startswith='bench-voter-').order_by('pk')[:count])
+        return existing
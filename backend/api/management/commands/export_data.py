@@ -0,0 +1,39 @@
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporte questions (avec réponses, commentaires et votes) ou diplômes en NDJSON, en flux ; "
+        "--since pour un export incrémental, filigrane suivant sur la sortie d'erreur"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(export.EXPORTS))
+        parser.add_argument('--since', help="Filigrane ISO 8601 d'un export précédent")
+        parser.add_argument('--output', help="Fichier NDJSON (par défaut : sortie standard)")
+        parser.add_argument('--chunk-size', type=int, default=export.CHUNK_SIZE)
+        parser.add_argument('--database', default=None, help="Alias de base lu (un réplica, par exemple)")
+
+    def handle(self, *args, **options):
+        try:
+            since = export.parse_since(options['since'])
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        watermark = export.watermark()
+        records = export.EXPORTS[options['dataset']](
+            since, using=options['database'], chunk_size=options['chunk_size'],
+        )
+        count = 0
+        with open(options['output'], 'wb') if options['output'] else nullcontext() as output_file:
+            for record in records:
+                line = export.dump(record)
+                if output_file:
+                    output_file.write(line)
+                else:
+                    self.stdout.write(line.decode(), ending='')
+                count += 1
+        self.stderr.write(f"{count} lignes exportées ; filigrane : {watermark.isoformat()}")
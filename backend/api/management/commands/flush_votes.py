@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.votes import flush_votes
+
+
+class Command(BaseCommand):
+    help = "Agrège les votes en attente (journal api_votedelta) dans Question.votes et Answer.votes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Tourne en continu (processus dédié)")
+        parser.add_argument('--interval', type=float, default=settings.VOTE_FLUSH_INTERVAL)
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = flush_votes()
+            if not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"{flushed} variations agrégées."))
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+import secrets
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from django.core.management.base import BaseCommand
+
+from api.signing import b64encode
+
+
+class Command(BaseCommand):
+    help = "Génère une clé Ed25519 de signature des diplômes (entrée de DIPLOMA_SIGNING_KEYS)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('key_id', nargs='?', help="Identifiant de la clé (par défaut : aléatoire)")
+
+    def handle(self, *args, **options):
+        key_id = options['key_id'] or secrets.token_hex(4)
+        if ':' in key_id or ',' in key_id:
+            self.stderr.write(self.style.ERROR("L'identifiant ne peut contenir ni ':' ni ','."))
+            return
+        seed = secrets.token_bytes(32)
+        public_key = Ed25519PrivateKey.from_private_bytes(seed).public_key()
+        self.stdout.write(f"{key_id}:{b64encode(seed)}")
+        self.stderr.write(
+            f"Clé publique (x) : {b64encode(public_key.public_bytes(Encoding.Raw, PublicFormat.Raw))}\n"
+            "Ajoutez la ligne ci-dessus à DIPLOMA_SIGNING_KEYS (séparateur ',') sans retirer les anciennes clés, "
+            "puis lancez `manage.py resign_diplomas`."
+        )
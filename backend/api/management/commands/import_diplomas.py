@@ -0,0 +1,42 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.imports import FORMATS, guess_format, import_diplomas
+
+
+class Command(BaseCommand):
+    help = "Importe des diplômes depuis un fichier CSV ou JSONL (tranches validées, bulk_create, pool de rendu)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help="Déduit de l'extension par défaut")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, help="Processus de rendu (défaut : DIPLOMA_IMPORT_WORKERS, 0 : aucun)")
+        parser.add_argument('--report', help="Écrit le rapport ligne à ligne (JSON) dans ce fichier")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or guess_format(options['path'])
+        if fmt not in FORMATS:
+            raise CommandError(f"Format non reconnu : {fmt}")
+
+        def progress(report):
+            self.stdout.write(f"{report['total']} lignes lues, {report['created']} créées, {report['failed']} rejetées")
+
+        started = time.perf_counter()
+        with open(options['path'], 'rb') as stream:
+            report = import_diplomas(
+                stream, fmt, chunk_size=options['chunk_size'], workers=options['workers'], progress=progress,
+            )
+        elapsed = time.perf_counter() - started
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        for error in report['errors'][:20]:
+            self.stderr.write(f"ligne {error['row']} : {json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} diplômes créés, {report['failed']} lignes rejetées en {elapsed:.1f} s "
+            f"({report['total'] / elapsed if elapsed else 0:.0f} lignes/s)."
+        ))
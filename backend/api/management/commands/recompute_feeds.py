@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.feeds import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule le classement de toutes les questions dans les fils (hot, week, month, unanswered, "
+        "unaccepted) et retire celles sorties des fenêtres week/month"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default=None)
+
+    def handle(self, *args, **options):
+        written = rebuild(batch_size=options['batch_size'], using=options['database'])
+        self.stdout.write(self.style.SUCCESS(f"{written} classements écrits."))
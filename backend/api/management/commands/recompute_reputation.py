@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from api import reputation
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule la réputation et les statistiques des utilisateurs (api/reputation.py) depuis les "
+        "questions, réponses et votes ; par défaut, seulement ceux qui n'ont pas encore de ligne"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true', help="Recalcule aussi les utilisateurs déjà comptés")
+        parser.add_argument('--database', default=None)
+
+    def handle(self, *args, **options):
+        queryset = User.objects.using(options['database'])
+        if not options['all']:
+            queryset = queryset.filter(stats__isnull=True)
+        done, last_pk = 0, 0
+        while True:
+            # Une transaction par tranche : seules batch_size lignes de UserStats verrouillées à la fois
+            pks = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+            done += reputation.recompute(pks, using=options['database'])
+            last_pk = pks[-1]
+        self.stdout.write(self.style.SUCCESS(f"{done} utilisateurs recalculés."))
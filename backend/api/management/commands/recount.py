@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.counters import RECOUNTS, recount
+from api.votes import recount_votes
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs dénormalisés (réponses, commentaires, questions par tag)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--votes', action='store_true', help="Recalcule aussi les totaux de votes depuis api_vote")
+        parser.add_argument('--workers-stopped', action='store_true',
+                            help="VOTE_WRITE_MODE=buffer : confirme qu'aucun worker ne garde de votes en mémoire")
+
+    def handle(self, *args, **options):
+        if options['votes'] and settings.VOTE_WRITE_MODE == 'buffer' and not options['workers_stopped']:
+            # Les deltas encore en mémoire dans les workers seraient ajoutés une seconde fois à leur agrégation
+            raise CommandError(
+                "VOTE_WRITE_MODE=buffer : arrêtez les workers web avant --votes, puis relancez avec --workers-stopped."
+            )
+        results = [
+            (model, field, recount(model, field, expression, batch_size=options['batch_size']))
+            for model, field, expression in RECOUNTS
+        ]
+        if options['votes']:
+            results += recount_votes(batch_size=options['batch_size'])
+        for model, field, updated in results:
+            self.stdout.write(f"{model.__name__}.{field}: {updated} lignes recalculées")
+        self.stdout.write(self.style.SUCCESS("Compteurs à jour."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index plein texte des questions (tsvector PostgreSQL ou FTS5 SQLite)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default=None)
+
+    def handle(self, *args, **options):
+        backend = get_backend(options['database'])
+        indexed = backend.reindex(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"{indexed} questions indexées ({type(backend).__name__})."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from api import similar
+from api.models import Question
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcule le vecteur de termes (api/similar.py) des questions qui n'en ont pas ou dont le vecteur "
+        "vient d'une autre version du calcul"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true', help="Recalcule aussi les vecteurs à jour")
+        parser.add_argument('--database', default=None)
+
+    def handle(self, *args, **options):
+        queryset = Question.objects.using(options['database'])
+        if not options['all']:
+            queryset = queryset.exclude(vector__version=similar.VECTOR_VERSION)
+        done, last_pk = 0, 0
+        while True:
+            pks = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+            similar.index_questions(pks, using=options['database'])
+            done += len(pks)
+            last_pk = pks[-1]
+        self.stdout.write(self.style.SUCCESS(f"{done} questions indexées (vecteurs v{similar.VECTOR_VERSION})."))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import markup
+from api.cache import invalidate_questions
+from api.models import Question, Answer
+
+
+class Command(BaseCommand):
+    help = (
+        "Rend le Markdown des questions et réponses dont le HTML stocké vient d'une autre version "
+        "du moteur (api/markup.py), sans toucher à updated_at"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true', help="Rend aussi les lignes déjà à la version courante")
+
+    def handle(self, *args, **options):
+        for model, question_field, label in ((Question, 'pk', 'questions'), (Answer, 'question_id', 'réponses')):
+            queryset = model.objects.all()
+            if not options['all']:
+                queryset = queryset.exclude(render_version=markup.RENDERER_VERSION)
+            queryset = queryset.only('pk', model.markdown_field, question_field)
+            done, last_pk = 0, 0
+            while True:
+                # Parcours par clé primaire croissante : pas d'OFFSET, lots indépendants
+                batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                for instance in batch:
+                    fields = markup.render_fields(instance)
+                with transaction.atomic():
+                    model.objects.bulk_update(batch, fields)
+                    invalidate_questions({getattr(instance, question_field) for instance in batch}, lists=True)
+                done += len(batch)
+                self.stdout.write(f"{done} {label} rendues...")
+            self.stdout.write(self.style.SUCCESS(
+                f"{done} {label} rendues (moteur v{markup.RENDERER_VERSION})."
+            ))
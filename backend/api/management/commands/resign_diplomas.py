@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api import signing, verification
+from api.models import Diploma
+
+
+class Command(BaseCommand):
+    help = "Re-signe les diplômes signés avec une ancienne clé (ou une empreinte sha256) avec la clé active"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=settings.DIPLOMA_IMPORT_WORKERS)
+        parser.add_argument('--all', action='store_true', help="Re-signe aussi les diplômes déjà signés avec la clé active")
+
+    def handle(self, *args, **options):
+        active = signing.get_keyring().active_key_id
+        queryset = Diploma.objects.filter(is_signed=True)
+        if not options['all']:
+            queryset = queryset.exclude(signature_key_id=active)
+        fields = ('pk', *signing.SIGNED_FIELDS)
+        done, last_pk = 0, 0
+        while True:
+            # Parcours par clé primaire croissante : pas d'OFFSET, lots indépendants
+            rows = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list(*fields)[:options['batch_size']])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            signatures = signing.sign_many([row[1:] for row in rows], workers=options['workers'], chunk_size=500)
+            now = timezone.now()
+            diplomas = [
+                Diploma(pk=row[0], signature_key_id=key_id, signature_data=signature, updated_at=now)
+                for row, (key_id, signature) in zip(rows, signatures)
+            ]
+            with transaction.atomic():
+                Diploma.objects.bulk_update(diplomas, ['signature_key_id', 'signature_data', 'updated_at'])
+            verification.forget([row[1] for row in rows])
+            done += len(rows)
+            self.stdout.write(f"{done} diplômes re-signés...")
+        self.stdout.write(self.style.SUCCESS(f"{done} diplômes re-signés avec la clé {active!r}."))
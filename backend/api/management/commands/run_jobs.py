@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.jobs import run_jobs
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches en attente de la file api_job (QR codes des diplômes, ...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Tourne en continu (processus dédié)")
+        parser.add_argument('--interval', type=float, default=settings.JOB_POLL_INTERVAL or 5.0)
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        while True:
+            done = run_jobs(limit=options['batch_size'])
+            if not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f"{done} tâches exécutées."))
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,170 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api import signing
+from api.cache import invalidate, invalidate_questions
+from api.models import User, Tag, Question, Answer, Comment, Vote, Diploma
+
+WORDS = (
+    'django python react postgres sqlite index requête serveur docker api jwt token cache '
+    'migration modèle vue formulaire erreur exception déploiement nginx gunicorn réseau '
+    'javascript tableau liste dictionnaire boucle fonction classe héritage test pagination'
+).split()
+
+# Préfixes des données générées : --reset ne supprime qu'elles
+USER_PREFIX = 'seed-'
+DIPLOMA_PREFIX = 'SEED-'
+PASSWORD = 'seed-password'
+
+
+class Command(BaseCommand):
+    help = "Génère un jeu de données reproductible (utilisateurs, questions, réponses, votes, diplômes) pour les benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--questions', type=int, default=2000)
+        parser.add_argument('--answers', type=int, default=3, help="Réponses par question (moyenne)")
+        parser.add_argument('--comments', type=int, default=2, help="Commentaires par question (moyenne)")
+        parser.add_argument('--votes', type=int, default=5, help="Votes par question (moyenne)")
+        parser.add_argument('--diplomas', type=int, default=1000)
+        parser.add_argument('--days', type=int, default=90, help="Étalement des dates de création")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--reset', action='store_true', help="Supprime d'abord les données générées précédemment")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            self.reset()
+        elif User.objects.filter(username__startswith=USER_PREFIX).exists():
+            raise CommandError("Des données générées existent déjà : relancez avec --reset.")
+        if options['users'] < 1 and (options['questions'] or options['diplomas']):
+            raise CommandError("--users doit être au moins 1.")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.days = options['days']
+        with transaction.atomic():
+            users = self.users(options['users'])
+            tags = self.tags(options['tags'])
+            questions = self.questions(users, tags, options['questions'])
+            answers = self.answers(users, questions, options['answers'])
+            comments = self.comments(users, questions, answers, options['comments'])
+            votes = self.votes(users, questions, answers, options['votes'])
+            diplomas = self.diplomas(options['diplomas'])
+        # Compteurs, HTML rendu, fils, vecteurs des questions proches, réputations et index de
+        # recherche reconstruits par les outils habituels
+        call_command('recount', votes=True, batch_size=self.batch_size, stdout=self.stdout)
+        call_command('render_markdown', batch_size=self.batch_size, stdout=self.stdout)
+        call_command('recompute_feeds', batch_size=self.batch_size, stdout=self.stdout)
+        call_command('reindex_similar', batch_size=self.batch_size, stdout=self.stdout)
+        call_command('recompute_reputation', all=True, batch_size=self.batch_size, stdout=self.stdout)
+        invalidate_questions(lists=True)
+        invalidate('tags', lists=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(users)} utilisateurs, {len(tags)} tags, {len(questions)} questions, {len(answers)} réponses, "
+            f"{comments} commentaires, {votes} votes, {diplomas} diplômes générés."
+        ))
+
+    def reset(self):
+        # Questions, réponses, commentaires et votes suivent leurs auteurs (CASCADE)
+        with transaction.atomic():
+            User.objects.filter(username__startswith=USER_PREFIX).delete()
+            Tag.objects.filter(slug__startswith=USER_PREFIX).delete()
+            Diploma.objects.filter(serial_number__startswith=DIPLOMA_PREFIX).delete()
+
+    def created_at(self):
+        return self.now - timedelta(seconds=self.rng.randrange(max(self.days, 1) * 86400))
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def users(self, count):
+        password = make_password(PASSWORD)
+        return User.objects.bulk_create([
+            User(username=f'{USER_PREFIX}{i}', email=f'{USER_PREFIX}{i}@example.com', password=password)
+            for i in range(count)
+        ], batch_size=self.batch_size)
+
+    def tags(self, count):
+        names = [f'{WORDS[i % len(WORDS)]}-{i // len(WORDS)}' if i >= len(WORDS) else WORDS[i] for i in range(count)]
+        return Tag.objects.bulk_create([
+            Tag(name=f'{USER_PREFIX}{name}', slug=f'{USER_PREFIX}{name}') for name in names
+        ], batch_size=self.batch_size)
+
+    def questions(self, users, tags, count):
+        questions = Question.objects.bulk_create([
+            Question(author=self.rng.choice(users), title=self.text(6).capitalize(), description=self.text(60))
+            for _ in range(count)
+        ], batch_size=self.batch_size)
+        # auto_now_add impose la date courante à l'insertion : dates étalées ensuite
+        for question in questions:
+            question.created_at = question.updated_at = self.created_at()
+        Question.objects.bulk_update(questions, ['created_at', 'updated_at'], batch_size=self.batch_size)
+        if tags:
+            through = Question.tags.through
+            through.objects.bulk_create([
+                through(question_id=question.pk, tag_id=tag.pk)
+                for question in questions for tag in self.rng.sample(tags, min(len(tags), self.rng.randint(1, 3)))
+            ], batch_size=self.batch_size)
+        return questions
+
+    def answers(self, users, questions, average):
+        answers = Answer.objects.bulk_create([
+            Answer(author=self.rng.choice(users), question=question, content=self.text(40))
+            for question in questions for _ in range(self.rng.randint(0, 2 * average))
+        ], batch_size=self.batch_size)
+        # Une meilleure réponse sur une question sur trois (au plus une : contrainte unique_best_answer)
+        best, seen = [], set()
+        for answer in answers:
+            if answer.question_id not in seen and self.rng.random() < 0.33:
+                answer.is_best_answer = True
+                best.append(answer)
+            seen.add(answer.question_id)
+        Answer.objects.bulk_update(best, ['is_best_answer'], batch_size=self.batch_size)
+        return answers
+
+    def comments(self, users, questions, answers, average):
+        targets = [{'question': question} for question in questions] + [{'answer': answer} for answer in answers]
+        if not targets:
+            return 0
+        count = len(questions) * average
+        return len(Comment.objects.bulk_create([
+            Comment(author=self.rng.choice(users), content=self.text(12), **self.rng.choice(targets))
+            for _ in range(count)
+        ], batch_size=self.batch_size))
+
+    def votes(self, users, questions, answers, average):
+        # Un vote par (utilisateur, cible) : contraintes unique_user_question_vote / unique_user_answer_vote
+        votes = []
+        for field, targets in (('question', questions), ('answer', answers)):
+            for target in targets:
+                voters = self.rng.sample(users, min(len(users), self.rng.randint(0, 2 * average)))
+                votes.extend(
+                    Vote(user=voter, value=1 if self.rng.random() < 0.8 else -1, **{field: target}) for voter in voters
+                )
+        return len(Vote.objects.bulk_create(votes, batch_size=self.batch_size))
+
+    def diplomas(self, count):
+        diplomas = [
+            Diploma(
+                student_name=f'Étudiant {i}', student_id=f'{DIPLOMA_PREFIX}E{i:07d}', degree_name='Licence',
+                major=self.rng.choice(['Informatique', 'Mathématiques', 'Physique', 'Économie']),
+                graduation_date=(self.now - timedelta(days=self.rng.randrange(3650))).date(),
+                serial_number=f'{DIPLOMA_PREFIX}{i:07d}', is_signed=self.rng.random() < 0.9, qr_status='READY',
+            )
+            for i in range(count)
+        ]
+        signed = [diploma for diploma in diplomas if diploma.is_signed]
+        signatures = signing.sign_many([[getattr(d, field) for field in signing.SIGNED_FIELDS] for d in signed])
+        for diploma, (key_id, signature) in zip(signed, signatures):
+            diploma.signature_key_id, diploma.signature_data = key_id, signature
+        return len(Diploma.objects.bulk_create(diplomas, batch_size=self.batch_size))
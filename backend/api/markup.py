@@ -0,0 +1,80 @@
+"""
+Rendu Markdown côté serveur : les questions et réponses sont rendues et assainies une fois, à
+l'enregistrement, et le HTML est stocké à côté du Markdown avec la version du moteur qui l'a
+produit. Changer de moteur ou d'options : incrémenter RENDERER_VERSION puis lancer
+`render_markdown`, qui ne reprend que les lignes d'une autre version ; d'ici là, elles sont
+rendues à la volée à la lecture.
+"""
+import html
+import re
+
+import nh3
+from django.utils.text import Truncator
+from markdown_it import MarkdownIt
+
+RENDERER_VERSION = 1
+EXCERPT_LENGTH = 200
+
+# CommonMark et les extensions GFM utilisées par le frontend (remark-gfm) : tableaux, barré.
+# HTML brut échappé ; liens javascript:, vbscript:, data: refusés par le parseur
+_parser = MarkdownIt('commonmark', {'html': False}).enable(['table', 'strikethrough'])
+
+# Assainissement en plus du parseur : seules les balises que celui-ci produit sont gardées
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'ul', 'ol', 'li',
+    'pre', 'code', 'em', 'strong', 's', 'a', 'img', 'table', 'thead', 'tbody', 'tr', 'th', 'td',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title'},
+    'ol': {'start'},
+    'code': {'class'},
+    'th': {'style'},
+    'td': {'style'},
+}
+_whitespace = re.compile(r'\s+')
+
+
+def render(text):
+    """Markdown -> HTML assaini."""
+    return nh3.clean(
+        _parser.render(text),
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes={'http', 'https', 'mailto'},
+        filter_style_properties={'text-align'},
+        link_rel='nofollow noopener noreferrer',
+    )
+
+
+def excerpt(rendered):
+    """Début du texte brut d'un HTML rendu, pour les listes."""
+    text = html.unescape(nh3.clean(rendered, tags=set()))
+    return Truncator(_whitespace.sub(' ', text).strip()).chars(EXCERPT_LENGTH)
+
+
+def render_fields(instance):
+    """
+    Rend le Markdown d'une question ou d'une réponse dans ses champs HTML (et extrait) ;
+    renvoie les noms des champs modifiés.
+    """
+    rendered = render(getattr(instance, instance.markdown_field))
+    values = {instance.html_field: rendered, 'render_version': RENDERER_VERSION}
+    if instance.excerpt_field:
+        values[instance.excerpt_field] = excerpt(rendered)
+    for name, value in values.items():
+        setattr(instance, name, value)
+    return list(values)
+
+
+def html_of(instance):
+    # Lignes d'une ancienne version du moteur : rendues à la volée jusqu'à `render_markdown`
+    if instance.render_version == RENDERER_VERSION:
+        return getattr(instance, instance.html_field)
+    return render(getattr(instance, instance.markdown_field))
+
+
+def excerpt_of(instance):
+    if instance.render_version == RENDERER_VERSION:
+        return getattr(instance, instance.excerpt_field)
+    return excerpt(render(getattr(instance, instance.markdown_field)))
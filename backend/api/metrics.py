@@ -0,0 +1,397 @@
+"""
+Instrumentation par requête : MetricsMiddleware mesure chaque requête (vue, requêtes SQL
+et leur durée, sérialisation, cache, taille de la réponse), agrège dans des histogrammes
+du processus et journalise les requêtes lentes. `metrics_view` expose le tout au format
+Prometheus ; avec METRICS_DIR, chaque worker gunicorn y dépose un instantané et la vue
+les additionne. Le middleware fonctionne en WSGI comme en ASGI.
+"""
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import renderers
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Nom -> (type, aide, bornes des histogrammes)
+METRICS = {
+    'api_requests_total': ('counter', "Requêtes HTTP traitées", None),
+    'api_request_duration_seconds': ('histogram', "Durée totale de la requête", DURATION_BUCKETS),
+    'api_db_queries': ('histogram', "Requêtes SQL par requête HTTP", QUERY_BUCKETS),
+    'api_db_duration_seconds': ('histogram', "Temps passé en base par requête HTTP", DURATION_BUCKETS),
+    'api_serialization_duration_seconds': ('histogram', "Sérialisation DRF et rendu de la réponse", DURATION_BUCKETS),
+    'api_response_size_bytes': ('histogram', "Taille du corps de la réponse", SIZE_BUCKETS),
+    'api_cache_requests_total': ('counter', "Lectures du cache applicatif, par résultat", None),
+    'api_slow_requests_total': ('counter', "Requêtes au-delà de SLOW_REQUEST_THRESHOLD_MS", None),
+}
+# SQL conservé par requête pour le journal des requêtes lentes
+MAX_RECORDED_QUERIES = 200
+SLOW_QUERIES_LOGGED = 5
+
+
+class Registry:
+    """Compteurs et histogrammes du processus, indexés par (métrique, étiquettes)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        # (métrique, étiquettes) -> [effectifs par borne (non cumulés) + dépassements, somme, nombre]
+        self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self.lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[name, labels] = [[0] * (len(buckets) + 1), 0.0, 0]
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, list(labels), list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self.histograms.items()
+                ],
+            }
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+registry = Registry()
+
+
+def merge(snapshots):
+    counters, histograms = defaultdict(float), {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, counts, total, count in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    # Pas de notation abrégée (`:g`) : un compteur élevé garderait 6 chiffres significatifs
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def format_bound(bound):
+    return repr(float(bound))
+
+
+def exposition(snapshots):
+    """Format texte Prometheus 0.0.4 de la somme des instantanés."""
+    counters, histograms = merge(snapshots)
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+            continue
+        for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip([*map(format_bound, buckets), '+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{format_labels(labels, le=bound)} {cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} {format_value(total)}')
+            lines.append(f'{name}_count{format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+class SnapshotFile:
+    """Instantané du processus dans METRICS_DIR, relu par les autres workers."""
+
+    def __init__(self):
+        # pid + jeton : un worker relancé avec le même pid n'écrase pas les compteurs du précédent
+        self.name = f'metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+        self.pid = os.getpid()
+        self.written_at = 0.0
+        self.lock = threading.Lock()
+
+    def path(self, directory):
+        if os.getpid() != self.pid:
+            # Processus issu d'un fork (gunicorn --preload) : son propre fichier
+            self.__init__()
+        return os.path.join(directory, self.name)
+
+    def write(self, directory, force=False):
+        now = time.monotonic()
+        if not force and now - self.written_at < settings.METRICS_FLUSH_INTERVAL:
+            return
+        with self.lock:
+            self.written_at = now
+            path = self.path(directory)
+            temporary = f'{path}.tmp'
+            with open(temporary, 'w') as snapshot_file:
+                json.dump(registry.snapshot(), snapshot_file)
+            # Remplacement atomique : un lecteur ne voit jamais un fichier à moitié écrit
+            os.replace(temporary, path)
+
+    def read_others(self, directory):
+        own = self.path(directory)
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+            if path == own:
+                continue
+            try:
+                with open(path) as snapshot_file:
+                    snapshots.append(json.load(snapshot_file))
+            except (OSError, ValueError):
+                logger.warning("Instantané de métriques illisible : %s", path)
+        return snapshots
+
+
+snapshot_file = SnapshotFile()
+
+
+class RequestMetrics:
+    """Mesures d'une requête en cours, accessibles via `current()`."""
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.queries = []
+        self.serialization_time = 0.0
+        self.serialization_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper : durée et SQL (sans paramètres) de chaque requête
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.db_count += 1
+            self.db_time += elapsed
+            if len(self.queries) < MAX_RECORDED_QUERIES:
+                self.queries.append((elapsed, sql))
+
+
+_current = contextvars.ContextVar('api_request_metrics', default=None)
+
+
+def current():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    # Posé une fois pour toutes sur chaque connexion : l'ORM asynchrone exécute les requêtes
+    # dans des threads (sync_to_async) dont les connexions ne sont pas celles de la requête.
+    # Le contexte, lui, y est copié : current() désigne bien la requête en cours.
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    return request_metrics(execute, sql, params, many, context)
+
+
+def instrument_connection(sender, connection, **kwargs):
+    # Signal connection_created ; la liste survit aux reconnexions du même DatabaseWrapper
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def cache_event(hits=0, misses=0):
+    request_metrics = current()
+    if request_metrics is not None:
+        request_metrics.cache_hits += hits
+        request_metrics.cache_misses += misses
+
+
+class TimedSerializerMixin:
+    """
+    Temps de `to_representation` compté une fois par objet de premier niveau (pas par objet imbriqué).
+    Réservé aux sérialiseurs des listes et détails mesurés (questions, réponses, diplômes) : les
+    autres n'ont que le temps du rendu JSON.
+    """
+
+    def to_representation(self, instance):
+        request_metrics = current()
+        if request_metrics is None or request_metrics.serialization_depth:
+            return super().to_representation(instance)
+        request_metrics.serialization_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            request_metrics.serialization_time += time.perf_counter() - start
+            request_metrics.serialization_depth -= 1
+
+
+class TimedRendererMixin:
+    """Temps d'encodage de la réponse (JSON, API navigable) ajouté à la sérialisation."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            request_metrics = current()
+            if request_metrics is not None:
+                request_metrics.serialization_time += time.perf_counter() - start
+
+
+class JSONRenderer(TimedRendererMixin, renderers.JSONRenderer):
+    pass
+
+
+class BrowsableAPIRenderer(TimedRendererMixin, renderers.BrowsableAPIRenderer):
+    pass
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    # Nom de route (question-list, diploma-verify...) : cardinalité bornée, contrairement au chemin
+    return (match.view_name or match.route) if match is not None else 'unmatched'
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Sous ASGI, la chaîne reste asynchrone : pas de thread bloqué par requête
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, request_metrics, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, request_metrics, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, request_metrics, duration):
+        view = view_name(request)
+        labels = (('view', view),)
+        registry.inc('api_requests_total', (('method', request.method), ('status', str(response.status_code)), *labels))
+        registry.observe('api_request_duration_seconds', labels, duration)
+        registry.observe('api_db_queries', labels, request_metrics.db_count)
+        registry.observe('api_db_duration_seconds', labels, request_metrics.db_time)
+        registry.observe('api_serialization_duration_seconds', labels, request_metrics.serialization_time)
+        size = None if response.streaming else len(response.content)
+        if size is not None:
+            registry.observe('api_response_size_bytes', labels, size)
+        if request_metrics.cache_hits:
+            registry.inc('api_cache_requests_total', (('result', 'hit'), *labels), request_metrics.cache_hits)
+        if request_metrics.cache_misses:
+            registry.inc('api_cache_requests_total', (('result', 'miss'), *labels), request_metrics.cache_misses)
+
+        threshold = settings.SLOW_REQUEST_THRESHOLD_MS
+        if threshold and duration * 1000 >= threshold:
+            registry.inc('api_slow_requests_total', labels)
+            slowest = sorted(request_metrics.queries, key=lambda query: query[0], reverse=True)[:SLOW_QUERIES_LOGGED]
+            record = {
+                'event': 'slow_request',
+                'view': view,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 1),
+                'db_queries': request_metrics.db_count,
+                'db_ms': round(request_metrics.db_time * 1000, 1),
+                'serialization_ms': round(request_metrics.serialization_time * 1000, 1),
+                'cache_hits': request_metrics.cache_hits,
+                'cache_misses': request_metrics.cache_misses,
+                'response_bytes': size,
+                # SQL sans ses paramètres : pas de données personnelles dans les journaux
+                'slowest_queries': [{'ms': round(elapsed * 1000, 2), 'sql': sql} for elapsed, sql in slowest],
+            }
+            logger.warning('slow_request %s', json.dumps(record, ensure_ascii=False), extra={'slow_request': record})
+
+        if settings.METRICS_DIR:
+            try:
+                snapshot_file.write(settings.METRICS_DIR)
+            except OSError:
+                logger.exception("Écriture de l'instantané de métriques impossible")
+
+
+def metrics_view(request):
+    # Jeton facultatif (METRICS_TOKEN) : Prometheus l'envoie via `authorization: {credentials: ...}`
+    expected = settings.METRICS_TOKEN
+    if expected and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {expected}'):
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+    snapshots = [registry.snapshot()]
+    if settings.METRICS_DIR:
+        snapshot_file.write(settings.METRICS_DIR, force=True)
+        snapshots += snapshot_file.read_others(settings.METRICS_DIR)
+    return HttpResponse(exposition(snapshots), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@register(Tags.security, deploy=True)
+def check_metrics_token(app_configs, **kwargs):
+    if settings.METRICS_TOKEN or not settings.METRICS_ENABLED:
+        return []
+    return [Warning(
+        "METRICS_TOKEN n'est pas défini : /metrics est accessible sans authentification.",
+        hint="Définissez METRICS_TOKEN et configurez le même jeton dans Prometheus.",
+        id='api.W002',
+    )]
@@ -0,0 +1,38 @@
+"""
+Middleware adapté à ASGI. Les middlewares de Django sont asynchrones ou passent leurs étapes
+par un thread ; WhiteNoise, lui, n'est que synchrone et ferait passer toute la chaîne dans un
+thread par requête.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise utilisable sous ASGI. Le middleware d'origine n'est que synchrone : Django
+    passerait alors toute la suite de la chaîne, vues asynchrones comprises, dans un thread
+    par requête. Ici seuls les fichiers statiques sont servis depuis un thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
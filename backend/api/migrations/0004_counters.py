@@ -0,0 +1,55 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:35
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, fk):
+    return Coalesce(Subquery(
+        queryset.filter(**{fk: OuterRef('pk')}).order_by().values(fk).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def populate_counters(apps, schema_editor):
+    Tag = apps.get_model('api', 'Tag')
+    Question = apps.get_model('api', 'Question')
+    Answer = apps.get_model('api', 'Answer')
+    Comment = apps.get_model('api', 'Comment')
+    Question.objects.update(
+        answer_count=_count(Answer.objects.all(), 'question'),
+        comment_count=_count(Comment.objects.all(), 'question'),
+    )
+    Answer.objects.update(comment_count=_count(Comment.objects.all(), 'answer'))
+    Tag.objects.update(question_count=_count(Question.tags.through.objects.all(), 'tag'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_diploma'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='answer_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
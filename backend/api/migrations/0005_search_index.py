@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("ALTER TABLE api_question ADD COLUMN search_vector tsvector")
+        schema_editor.execute(
+            """
+            UPDATE api_question q SET search_vector =
+                setweight(to_tsvector(%(config)s::regconfig, coalesce(q.title, '')), 'A') ||
+                setweight(to_tsvector(%(config)s::regconfig, coalesce((
+                    SELECT string_agg(t.name, ' ') FROM api_tag t
+                    JOIN api_question_tags qt ON qt.tag_id = t.id
+                    WHERE qt.question_id = q.id
+                ), '')), 'B') ||
+                setweight(to_tsvector(%(config)s::regconfig, coalesce(q.description, '')), 'C')
+            """,
+            {'config': getattr(settings, 'SEARCH_CONFIG', 'simple')},
+        )
+        schema_editor.execute("CREATE INDEX api_question_search_gin ON api_question USING gin (search_vector)")
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE api_question_fts USING fts5("
+            "title, tags, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            """
+            INSERT INTO api_question_fts (rowid, title, tags, description)
+            SELECT q.id, q.title, coalesce((
+                SELECT group_concat(t.name, ' ') FROM api_tag t
+                JOIN api_question_tags qt ON qt.tag_id = t.id
+                WHERE qt.question_id = q.id
+            ), ''), q.description
+            FROM api_question q
+            """
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS api_question_search_gin")
+        schema_editor.execute("ALTER TABLE api_question DROP COLUMN IF EXISTS search_vector")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS api_question_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.SmallIntegerField()),
+                ('answer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.answer')),
+                ('question', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.question')),
+            ],
+        ),
+    ]
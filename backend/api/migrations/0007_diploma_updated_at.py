@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_vote_delta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diploma',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
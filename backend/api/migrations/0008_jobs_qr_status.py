@@ -0,0 +1,47 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:51
+
+from django.db import migrations, models
+
+
+def queue_missing_qr_codes(apps, schema_editor):
+    Diploma = apps.get_model('api', 'Diploma')
+    Job = apps.get_model('api', 'Job')
+    Diploma.objects.exclude(qr_code__isnull=True).exclude(qr_code='').update(qr_status='READY')
+    pending = Diploma.objects.filter(qr_status='PENDING').values_list('pk', flat=True)
+    Job.objects.bulk_create(
+        [Job(kind='qr_code', key=f'qr_code:{pk}', payload={'diploma_id': pk}) for pk in pending.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_diploma_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diploma',
+            name='qr_status',
+            field=models.CharField(choices=[('PENDING', 'En attente'), ('READY', 'Disponible'), ('FAILED', 'Échec')], default='PENDING', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('PENDING', 'En attente'), ('RUNNING', 'En cours'), ('FAILED', 'Échec')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='api_job_status_idx')],
+            },
+        ),
+        migrations.RunPython(queue_missing_qr_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+# Colonnes lues par api.verification.VERIFY_FIELDS
+COVERED = 'student_id, student_name, degree_name, major, graduation_date, is_signed, signature_data'
+
+
+def create_verify_index(apps, schema_editor):
+    # Index couvrant : la vérification se contente d'un Index Only Scan. SQLite garde l'index
+    # unique sur serial_number (son planificateur préfère celui-ci à un index composite)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"CREATE INDEX api_diploma_verify_idx ON api_diploma (serial_number) INCLUDE ({COVERED})")
+
+
+def drop_verify_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS api_diploma_verify_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_diploma_import'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_verify_index, drop_verify_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:04
+
+from django.db import migrations, models
+
+# Colonnes lues par api.verification.VERIFY_FIELDS (voir 0010_diploma_verify_index)
+COVERED = 'student_id, student_name, degree_name, major, graduation_date, is_signed, signature_data'
+
+
+def rebuild_verify_index(covered):
+    def rebuild(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute("DROP INDEX IF EXISTS api_diploma_verify_idx")
+            schema_editor.execute(f"CREATE INDEX api_diploma_verify_idx ON api_diploma (serial_number) INCLUDE ({covered})")
+    return rebuild
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_diploma_verify_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diploma',
+            name='signature_key_id',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        # Signatures existantes : empreintes sha256, identifiant de clé vide (signing.LEGACY_KEY_ID)
+        migrations.RunPython(
+            rebuild_verify_index(f'{COVERED}, signature_key_id'),
+            rebuild_verify_index(COVERED),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:06
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def keep_latest_best_answer(apps, schema_editor):
+    # Avant la contrainte : une seule meilleure réponse par question, la plus récente
+    Answer = apps.get_model('api', 'Answer')
+    best = Answer.objects.filter(is_best_answer=True)
+    latest = best.values('question').annotate(latest=Max('id')).values('latest')
+    best.exclude(pk__in=list(latest)).update(is_best_answer=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_diploma_signature_key_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diploma',
+            index=models.Index(fields=['issue_date', 'id'], name='api_diploma_issue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['created_at', 'id'], name='api_question_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['votes', 'id'], name='api_question_votes_idx'),
+        ),
+        migrations.RunPython(keep_latest_best_answer, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='answer',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_best_answer', True)), fields=('question',), name='unique_best_answer'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='answer',
+            name='render_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='description_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='render_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
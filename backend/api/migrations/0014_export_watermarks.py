@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-18 08:53
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    # Commentaires existants : pas de modification connue depuis leur création
+    apps.get_model('api', 'Comment').objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_rendered_markdown'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['updated_at'], name='api_answer_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['updated_at'], name='api_comment_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diploma',
+            index=models.Index(fields=['updated_at'], name='api_diploma_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['updated_at'], name='api_question_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_export_watermarks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=20)),
+                ('score', models.FloatField()),
+                ('created_at', models.DateTimeField()),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='api.question')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['feed', 'score', 'question'], name='api_feedrank_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('feed', 'question'), name='unique_feed_question')],
+            },
+        ),
+    ]
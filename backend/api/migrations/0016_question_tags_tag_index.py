@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:12
+
+from django.db import migrations
+
+# Table de liaison créée par le ManyToManyField : index couvrant pour `?tag=` (api/search.py),
+# qui lit les questions d'un tag sans revenir à la table
+INDEX = 'api_question_tags_tag_question_idx'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_feed_ranks'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX {INDEX} ON api_question_tags (tag_id, question_id)',
+            f'DROP INDEX {INDEX}',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_question_tags_tag_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionVector',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='vector', serialize=False, to='api.question')),
+                ('data', models.BinaryField()),
+                ('version', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_question_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('reputation', models.IntegerField(default=0)),
+                ('question_count', models.IntegerField(default=0)),
+                ('answer_count', models.IntegerField(default=0)),
+                ('accepted_count', models.IntegerField(default=0)),
+                ('votes_cast', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-reputation', 'user'], name='api_userstats_rank_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,141 @@
+from django.conf import settings
+from django.db import migrations
+
+# Index plein texte tenu par la base : toute écriture (vues, admin, bulk_create, update(),
+# seed_data, SQL direct) le met à jour dans la même transaction.
+POSTGRES_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION api_question_search_document(question_id bigint, title text, description text)
+RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector({config}::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector({config}::regconfig, coalesce((
+            SELECT string_agg(t.name, ' ') FROM api_tag t
+            JOIN api_question_tags qt ON qt.tag_id = t.id
+            WHERE qt.question_id = api_question_search_document.question_id
+        ), '')), 'B') ||
+        setweight(to_tsvector({config}::regconfig, coalesce(description, '')), 'C')
+$$;
+
+CREATE FUNCTION api_question_search_row() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := api_question_search_document(NEW.id, NEW.title, NEW.description);
+    RETURN NEW;
+END
+$$;
+
+CREATE FUNCTION api_question_tags_search() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE api_question q SET search_vector = api_question_search_document(q.id, q.title, q.description)
+    WHERE q.id IN (SELECT question_id FROM changed);
+    RETURN NULL;
+END
+$$;
+
+CREATE FUNCTION api_tag_search() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE api_question q SET search_vector = api_question_search_document(q.id, q.title, q.description)
+    WHERE q.id IN (SELECT question_id FROM api_question_tags WHERE tag_id = NEW.id);
+    RETURN NULL;
+END
+$$;
+"""
+
+# Tags ajoutés ou retirés en bloc (tags.set, bulk_create) : une mise à jour par instruction
+POSTGRES_TRIGGERS = """
+CREATE TRIGGER api_question_search BEFORE INSERT OR UPDATE OF title, description ON api_question
+    FOR EACH ROW EXECUTE FUNCTION api_question_search_row();
+CREATE TRIGGER api_question_tags_search_insert AFTER INSERT ON api_question_tags
+    REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION api_question_tags_search();
+CREATE TRIGGER api_question_tags_search_delete AFTER DELETE ON api_question_tags
+    REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION api_question_tags_search();
+CREATE TRIGGER api_tag_search AFTER UPDATE OF name ON api_tag
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) EXECUTE FUNCTION api_tag_search();
+"""
+
+POSTGRES_DROP = """
+DROP TRIGGER IF EXISTS api_tag_search ON api_tag;
+DROP TRIGGER IF EXISTS api_question_tags_search_delete ON api_question_tags;
+DROP TRIGGER IF EXISTS api_question_tags_search_insert ON api_question_tags;
+DROP TRIGGER IF EXISTS api_question_search ON api_question;
+DROP FUNCTION IF EXISTS api_tag_search();
+DROP FUNCTION IF EXISTS api_question_tags_search();
+DROP FUNCTION IF EXISTS api_question_search_row();
+DROP FUNCTION IF EXISTS api_question_search_document(bigint, text, text);
+"""
+
+SQLITE_TAGS = """
+    UPDATE api_question_fts SET tags = coalesce((
+        SELECT group_concat(t.name, ' ') FROM api_tag t
+        JOIN api_question_tags qt ON qt.tag_id = t.id
+        WHERE qt.question_id = {row}.question_id
+    ), '') WHERE rowid = {row}.question_id;
+"""
+
+# Attention : SQLite supprime les triggers d'une table reconstruite par une migration
+# (AlterField, RemoveField...) ; les recréer dans la même migration
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER api_question_fts_insert AFTER INSERT ON api_question BEGIN
+        INSERT INTO api_question_fts (rowid, title, tags, description) VALUES (new.id, new.title, '', new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER api_question_fts_update AFTER UPDATE OF title, description ON api_question BEGIN
+        UPDATE api_question_fts SET title = new.title, description = new.description WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_question_fts_delete AFTER DELETE ON api_question BEGIN
+        DELETE FROM api_question_fts WHERE rowid = old.id;
+    END
+    """,
+    f"CREATE TRIGGER api_question_tags_fts_insert AFTER INSERT ON api_question_tags BEGIN {SQLITE_TAGS.format(row='new')} END",
+    f"CREATE TRIGGER api_question_tags_fts_delete AFTER DELETE ON api_question_tags BEGIN {SQLITE_TAGS.format(row='old')} END",
+    """
+    CREATE TRIGGER api_tag_fts_update AFTER UPDATE OF name ON api_tag WHEN old.name IS NOT new.name BEGIN
+        UPDATE api_question_fts SET tags = coalesce((
+            SELECT group_concat(t.name, ' ') FROM api_tag t
+            JOIN api_question_tags qt ON qt.tag_id = t.id
+            WHERE qt.question_id = api_question_fts.rowid
+        ), '') WHERE rowid IN (SELECT question_id FROM api_question_tags WHERE tag_id = new.id);
+    END
+    """,
+]
+
+SQLITE_DROP = [
+    f'DROP TRIGGER IF EXISTS {name}' for name in (
+        'api_question_fts_insert', 'api_question_fts_update', 'api_question_fts_delete',
+        'api_question_tags_fts_insert', 'api_question_tags_fts_delete', 'api_tag_fts_update',
+    )
+]
+
+
+def create_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        config = schema_editor.quote_value(getattr(settings, 'SEARCH_CONFIG', 'simple'))
+        # Sans paramètres : plusieurs instructions dans un même execute
+        schema_editor.execute(POSTGRES_FUNCTIONS.format(config=config), None)
+        schema_editor.execute(POSTGRES_TRIGGERS, None)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+def drop_triggers(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_DROP, None)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_user_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -1,11 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
-import qrcode
-from io import BytesIO
-from django.core.files import File
 import uuid
-import hashlib
-from decouple import config
+from django.conf import settings
+from . import markup, signing
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -24,30 +21,73 @@ class User(AbstractUser):
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True)
+    question_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
 
-class Question(models.Model):
+class RenderedMarkdownMixin:
+    # HTML assaini rendu à l'enregistrement (api/markup.py) ; bulk_create et update() ne le font pas
+    excerpt_field = None
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.markdown_field in update_fields:
+            rendered = markup.render_fields(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *rendered}
+        super().save(*args, **kwargs)
+
+class Question(RenderedMarkdownMixin, models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='questions')
     title = models.CharField(max_length=255)
     description = models.TextField() # Markdown content
+    description_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=markup.EXCERPT_LENGTH, blank=True, editable=False)
+    # Version du moteur qui a produit description_html ; 0 : jamais rendu
+    render_version = models.PositiveSmallIntegerField(default=0, editable=False)
     tags = models.ManyToManyField(Tag, related_name='questions')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     votes = models.IntegerField(default=0)
+    # Compteurs dénormalisés (voir api/counters.py)
+    answer_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Tris de la liste avec départage par id (voir api/pagination.py), parcourus en sens inverse
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='api_question_created_idx'),
+            models.Index(fields=['votes', 'id'], name='api_question_votes_idx'),
+            # Export incrémental (api/export.py)
+            models.Index(fields=['updated_at'], name='api_question_updated_idx'),
+        ]
+
+    markdown_field, html_field, excerpt_field = 'description', 'description_html', 'excerpt'
 
     def __str__(self):
         return self.title
 
-class Answer(models.Model):
+class Answer(RenderedMarkdownMixin, models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='answers')
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
     content = models.TextField() # Markdown content
+    content_html = models.TextField(blank=True, editable=False)
+    render_version = models.PositiveSmallIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     votes = models.IntegerField(default=0)
     is_best_answer = models.BooleanField(default=False)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Index partiel : au plus une meilleure réponse par question, retrouvée sans parcourir les autres
+            models.UniqueConstraint(fields=['question'], name='unique_best_answer', condition=models.Q(is_best_answer=True)),
+        ]
+        indexes = [models.Index(fields=['updated_at'], name='api_answer_updated_idx')]
+
+    markdown_field, html_field = 'content', 'content_html'
 
     def __str__(self):
         return f"Answer to {self.question.title} by {self.author.username}"
@@ -58,10 +98,52 @@ class Comment(models.Model):
     answer = models.ForeignKey(Answer, on_delete=models.CASCADE, related_name='comments', null=True, blank=True)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['updated_at'], name='api_comment_updated_idx')]
 
     def __str__(self):
         return f"Comment by {self.author.username}"
 
+class FeedRank(models.Model):
+    # Classement matérialisé d'une question dans un fil (voir api/feeds.py), tenu à jour à chaque vote,
+    # réponse ou meilleure réponse ; une ligne par fil dont la question fait partie
+    feed = models.CharField(max_length=20)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='ranks')
+    score = models.FloatField()
+    # Copie de Question.created_at : fenêtres des fils week/month sans jointure
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['feed', 'question'], name='unique_feed_question')]
+        # Page d'un fil : parcours d'un intervalle de cet index, dans l'ordre (score, id)
+        indexes = [models.Index(fields=['feed', 'score', 'question'], name='api_feedrank_score_idx')]
+
+class QuestionVector(models.Model):
+    # Termes pondérés de la question pour les suggestions de questions proches (voir api/similar.py) :
+    # empreintes uint32 puis poids float32, recalculés à chaque écriture de la question
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name='vector')
+    data = models.BinaryField()
+    version = models.PositiveSmallIntegerField(default=0)
+    # Chargement incrémental des index en mémoire : vecteurs écrits depuis le dernier passage
+    updated_at = models.DateTimeField(db_index=True)
+
+class UserStats(models.Model):
+    # Compteurs d'activité d'un utilisateur (voir api/reputation.py), tenus à jour dans la transaction
+    # de chaque question, réponse, vote et meilleure réponse ; `recompute_reputation` les reconstruit.
+    # Entiers signés : un delta peut précéder la ligne (INSERT ... ON CONFLICT)
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    reputation = models.IntegerField(default=0)
+    question_count = models.IntegerField(default=0)
+    answer_count = models.IntegerField(default=0)
+    accepted_count = models.IntegerField(default=0)
+    votes_cast = models.IntegerField(default=0)
+
+    class Meta:
+        # Classement : parcours de cet index dans l'ordre (réputation décroissante, id)
+        indexes = [models.Index(fields=['-reputation', 'user'], name='api_userstats_rank_idx')]
+
 class Vote(models.Model):
     VOTE_TYPES = (
         (1, 'Upvote'),
@@ -78,7 +160,41 @@ class Vote(models.Model):
             models.UniqueConstraint(fields=['user', 'answer'], name='unique_user_answer_vote', condition=models.Q(question__isnull=True)),
         ]
 
+class VoteDelta(models.Model):
+    # Journal append-only des variations de votes, agrégé par api.votes.flush_votes (mode write-behind)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    answer = models.ForeignKey(Answer, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    delta = models.SmallIntegerField()
+
+class Job(models.Model):
+    # File de tâches en base (voir api/jobs.py) ; une tâche terminée est supprimée
+    STATUS_CHOICES = (
+        ('PENDING', 'En attente'),
+        ('RUNNING', 'En cours'),
+        ('FAILED', 'Échec'),
+    )
+    kind = models.CharField(max_length=50)
+    # Clé de déduplication : une seule tâche vivante par clé
+    key = models.CharField(max_length=255, unique=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'], name='api_job_status_idx')]
+
+    def __str__(self):
+        return f"{self.kind} {self.key} ({self.status})"
+
 class Diploma(models.Model):
+    QR_STATUS_CHOICES = (
+        ('PENDING', 'En attente'),
+        ('READY', 'Disponible'),
+        ('FAILED', 'Échec'),
+    )
     student_name = models.CharField(max_length=255)
     student_id = models.CharField(max_length=50, unique=True)
     degree_name = models.CharField(max_length=255)
@@ -87,36 +203,66 @@ class Diploma(models.Model):
     issue_date = models.DateField(auto_now_add=True)
     serial_number = models.CharField(max_length=100, unique=True)
     qr_code = models.ImageField(upload_to='qrcodes/', null=True, blank=True)
+    # Le PNG est produit en arrière-plan (api/qrcodes.py) ; READY d'emblée en mode SVG
+    qr_status = models.CharField(max_length=10, choices=QR_STATUS_CHOICES, default='PENDING')
     is_signed = models.BooleanField(default=False)
     signature_data = models.TextField(null=True, blank=True)
+    # Version de la clé de signature (api/signing.py) ; vide : ancienne empreinte sha256
+    signature_key_id = models.CharField(max_length=50, blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['issue_date', 'id'], name='api_diploma_issue_idx'),
+            models.Index(fields=['updated_at'], name='api_diploma_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Diploma {self.serial_number} - {self.student_name}"
 
+    @staticmethod
+    def new_serial_number():
+        return f"DIP-{uuid.uuid4().hex[:8].upper()}"
+
     def save(self, *args, **kwargs):
         if not self.serial_number:
-            self.serial_number = f"DIP-{uuid.uuid4().hex[:8].upper()}"
+            self.serial_number = self.new_serial_number()
         
-        if not self.qr_code:
-            qr_content = f"https://uasz.sn/verify/{self.serial_number}"
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_content)
-            qr.make(fit=True)
-
-            img = qr.make_image(fill_color="black", back_color="white")
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            filename = f"qr-{self.serial_number}.png"
-            self.qr_code.save(filename, File(buffer), save=False)
+        # Plus de rendu du QR code dans la requête : il est mis en file après l'enregistrement
+        self.qr_status = 'READY' if self.qr_code or settings.QR_CODE_FORMAT == 'svg' else 'PENDING'
             
-        if self.is_signed and not self.signature_data:
-            data_to_sign = f"{self.serial_number}|{self.student_id}|{self.graduation_date}"
-            secret = config('SECRET_KEY')
-            self.signature_data = hashlib.sha256(f"{data_to_sign}{secret}".encode()).hexdigest()
+        if self.is_signed:
+            # Signature Ed25519 avec la clé active ; refaite si les données signées ont changé
+            signing.ensure_signed(self)
 
         super().save(*args, **kwargs)
+        if self.qr_status == 'PENDING':
+            from .qrcodes import schedule_qr_code
+            schedule_qr_code(self)
+
+class DiplomaImport(models.Model):
+    # Import en masse d'un fichier CSV/JSONL, exécuté par la file de tâches (voir api/imports.py)
+    FORMAT_CHOICES = (
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    )
+    STATUS_CHOICES = (
+        ('PENDING', 'En attente'),
+        ('RUNNING', 'En cours'),
+        ('DONE', 'Terminé'),
+        ('FAILED', 'Échec'),
+    )
+    file = models.FileField(upload_to='imports/')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    total = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # Rapport par ligne : [{"row": n, "errors": {...}}, ...]
+    errors = models.JSONField(default=list, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import {self.pk} ({self.status})"
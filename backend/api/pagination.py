@@ -0,0 +1,155 @@
+import base64
+import json
+import math
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.encoding import force_str
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination par curseur (keyset) sur le couple (champ de tri, id).
+
+    Le curseur encode la valeur du champ de tri et l'id du dernier élément de la
+    page : la page suivante est obtenue par un `WHERE (champ, id) < (v, pk)` qui
+    reste indexable, quelle que soit la profondeur de la page. Il encode aussi le
+    tri : relu avec un autre `?ordering=`, il est refusé (404).
+    """
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_param = api_settings.ORDERING_PARAM
+    ordering = '-pk'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # On lit un élément de plus pour savoir s'il existe une page suivante
+        return self.paginate_results(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # Variante pour les vues asynchrones (api/async_views.py) : même requête, ORM asynchrone
+        return self.paginate_results([obj async for obj in self.page_queryset(queryset, request, view)])
+
+    def page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+        self.field = self.ordering.lstrip('-')
+        self.descending = self.ordering.startswith('-')
+        self.pk_field = self.get_pk_field(view)
+
+        tie_breaker = f'-{self.pk_field}' if self.descending else self.pk_field
+        if self.field == 'pk':
+            queryset = queryset.order_by(self.ordering)
+        else:
+            queryset = queryset.order_by(self.ordering, tie_breaker)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        if cursor is not None:
+            queryset = queryset.filter(self.get_cursor_filter(*cursor))
+        return queryset[:self.page_size + 1]
+
+    def paginate_results(self, results):
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, view):
+        allowed = getattr(view, 'ordering_fields', None) or []
+        param = request.query_params.get(self.ordering_param, '').strip()
+        if param and param.lstrip('-') in allowed:
+            return param
+        # La vue peut calculer son tri par défaut (ex. pertinence pendant une recherche)
+        get_ordering = getattr(view, 'get_ordering', None)
+        ordering = (get_ordering() if callable(get_ordering) else getattr(view, 'ordering', None)) or self.ordering
+        if isinstance(ordering, (list, tuple)):
+            ordering = ordering[0]
+        return ordering
+
+    def get_pk_field(self, view):
+        # Départage : la vue peut désigner une colonne égale à l'id mais couverte par l'index
+        # du tri (ex. FeedRank.question pour les fils, voir api/feeds.py)
+        get_pk_field = getattr(view, 'get_cursor_pk_field', None)
+        return (get_pk_field() if callable(get_pk_field) else None) or 'pk'
+
+    def get_cursor_filter(self, value, pk):
+        lookup = 'lt' if self.descending else 'gt'
+        pk_field = getattr(self, 'pk_field', 'pk')
+        if self.field == 'pk':
+            return Q(**{f'pk__{lookup}': pk})
+        return Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'{pk_field}__{lookup}': pk})
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        if isinstance(last, dict):
+            value, pk = last.get(self.field), last.get('id', last.get('pk'))
+        else:
+            value, pk = getattr(last, self.field), last.pk
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(value, pk))
+
+    def encode_cursor(self, value, pk):
+        if value is not None and not isinstance(value, (int, float, str)):
+            value = value.isoformat() if hasattr(value, 'isoformat') else force_str(value)
+        payload = json.dumps([value, pk, self.ordering], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            value, pk, ordering = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if ordering != self.ordering:
+                raise ValueError(f'Cursor for another ordering: {ordering!r}')
+            pk = int(pk)
+            if self.field != 'pk':
+                value = self.field_to_python(model, value)
+        except (TypeError, ValueError, ValidationError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def field_to_python(self, model, value):
+        try:
+            field = model._meta.get_field(self.field)
+        except FieldDoesNotExist:
+            # Tri sur une annotation numérique (pertinence, score d'un fil) : un nombre fini, sinon
+            # l'ORM lèverait une TypeError au filtrage
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise ValueError(f'Invalid cursor value: {value!r}')
+            return float(value)
+        return field.to_python(value)
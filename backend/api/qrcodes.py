@@ -0,0 +1,65 @@
+from io import BytesIO
+
+import qrcode
+import qrcode.image.svg
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .cache import get_cache
+from .jobs import enqueue, register
+from .models import Diploma
+
+QR_UPLOAD_TO = Diploma._meta.get_field('qr_code').upload_to
+
+
+def verify_url(serial_number):
+    return f"https://uasz.sn/verify/{serial_number}"
+
+
+def make_qr(serial_number):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(verify_url(serial_number))
+    qr.make(fit=True)
+    return qr
+
+
+def render_png(serial_number):
+    buffer = BytesIO()
+    make_qr(serial_number).make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_svg(serial_number):
+    # Le contenu ne dépend que du numéro de série : mis en cache sans expiration
+    def render():
+        return make_qr(serial_number).make_image(image_factory=qrcode.image.svg.SvgPathImage).to_string(encoding='unicode')
+    return get_cache().get_or_set(f'api:qr:svg:{serial_number}', render, timeout=None)
+
+
+def schedule_qr_code(diploma):
+    enqueue('qr_code', f'qr_code:{diploma.pk}', diploma_id=diploma.pk)
+
+
+def qr_code_failed(diploma_id):
+    Diploma.objects.filter(pk=diploma_id).update(qr_status='FAILED', updated_at=timezone.now())
+
+
+@register('qr_code', on_failure=qr_code_failed)
+def generate_qr_code(diploma_id):
+    diploma = Diploma.objects.filter(pk=diploma_id).only('serial_number', 'qr_code').first()
+    if diploma is None:
+        return
+    name = diploma.qr_code.name
+    if not name:
+        # Même numéro de série, même image : un fichier déjà présent est réutilisé
+        name = f"{QR_UPLOAD_TO}qr-{diploma.serial_number}.png"
+        if not default_storage.exists(name):
+            name = default_storage.save(name, ContentFile(render_png(diploma.serial_number)))
+    # UPDATE ciblé : pas de nouveau passage par Diploma.save()
+    Diploma.objects.filter(pk=diploma_id).update(qr_code=name, qr_status='READY', updated_at=timezone.now())
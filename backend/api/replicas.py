@@ -0,0 +1,101 @@
+"""
+Lectures sur les réplicas (DATABASE_REPLICA_URLS, alias dans DATABASE_REPLICAS).
+
+ReplicaRouter n'envoie une lecture sur un réplica que pendant une action de lecture d'un
+ViewSet (`list`, `retrieve`, `verify`, voir ReplicaReadMixin) ; écritures, commandes,
+tâches de fond et lectures faites pendant une écriture restent sur le primaire.
+
+Lire ses propres écritures : après une écriture réussie (vote, question, réponse...), son
+auteur lit sur le primaire pendant REPLICA_STICKY_SECONDS. Les invalidations du cache de
+réponses (api/cache.py) ramènent de même sur le primaire toutes les lectures de l'espace
+concerné : un réplica en retard n'y remet pas en cache l'état d'avant l'écriture.
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from rest_framework import permissions
+
+from .cache import get_cache, written_key
+
+# Réplica des lectures de la requête en cours ; None : primaire
+_read_alias = contextvars.ContextVar('api_read_alias', default=None)
+
+
+def sticky_key(user_id):
+    return f'api:replicas:primary:{user_id}'
+
+
+def stick_to_primary(user):
+    if settings.DATABASE_REPLICAS and user.is_authenticated:
+        get_cache().set(sticky_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def choose_replica(user, namespace=None):
+    """Réplica pour les lectures de `user`, ou None s'il doit lire sur le primaire."""
+    if not settings.DATABASE_REPLICAS:
+        return None
+    keys = [sticky_key(user.pk)] if user.is_authenticated else []
+    if namespace:
+        keys.append(written_key(namespace))
+    if keys and get_cache().get_many(keys):
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Cache en base (DatabaseCache) : toujours le primaire, un réplica en retard rendrait
+        # des jetons de version périmés
+        if model._meta.app_label == 'django_cache':
+            return 'default'
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données sur le primaire et ses réplicas
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Le schéma arrive sur les réplicas par la réplication
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """
+    Routage des actions de lecture d'un ViewSet vers un réplica (voir le module).
+    `replica_actions` ne doit lister que des actions sans écriture, même en POST.
+    """
+    replica_actions = ('list', 'retrieve', 'verify')
+    # Espace marqué par les invalidations ; par défaut celui du cache de réponses
+    replica_namespace = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            namespace = self.replica_namespace or getattr(self, 'cache_namespace', None)
+            alias = choose_replica(request.user, namespace)
+            if alias is not None:
+                # Valeur précédente restaurée par release_replica, sans jeton : le contexte
+                # peut avoir été copié entre-temps (sync_to_async des vues asynchrones)
+                self.previous_read_alias = _read_alias.get()
+                _read_alias.set(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (request.method not in permissions.SAFE_METHODS and self.action not in self.replica_actions
+                and response.status_code < 400):
+            stick_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            self.release_replica()
+
+    def release_replica(self):
+        if hasattr(self, 'previous_read_alias'):
+            _read_alias.set(self.previous_read_alias)
+            del self.previous_read_alias
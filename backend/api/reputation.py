@@ -0,0 +1,170 @@
+"""
+Réputation et statistiques par utilisateur, lues en O(1) sur UserStats (profil, `users/me/`,
+classement) au lieu d'agréger Vote, Answer et Question à chaque affichage.
+
+Les compteurs sont modifiés dans la transaction de l'écriture : question ou réponse publiée,
+vote posé, retiré ou inversé (votant et auteur de la cible), meilleure réponse choisie.
+`apply` écrit tous les deltas d'une écriture en un seul INSERT ... ON CONFLICT DO UPDATE, lignes
+dans l'ordre des ids : deux votes croisés entre deux utilisateurs ne s'interbloquent pas.
+Une suppression de question ou de réponse retire des votes et des réponses d'autres
+utilisateurs : leurs lignes sont recalculées (`recompute`), comme par `recompute_reputation`.
+
+Barème : vote positif reçu sur une question ou une réponse +10, vote négatif reçu -2,
+réponse choisie comme meilleure +15.
+"""
+from collections import defaultdict
+
+from django.db import connections, router, transaction
+from django.db.models import Case, Count, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import User, Question, Answer, Vote, UserStats
+
+QUESTION_UPVOTE = 10
+ANSWER_UPVOTE = 10
+DOWNVOTE = -2
+ACCEPTED = 15
+FIELDS = ('reputation', 'question_count', 'answer_count', 'accepted_count', 'votes_cast')
+TABLE = UserStats._meta.db_table
+LEADERBOARD_LIMIT = 20
+MAX_LEADERBOARD_LIMIT = 100
+
+
+def as_dict(stats):
+    """Statistiques d'un utilisateur ; zéros s'il n'a pas encore de ligne."""
+    return {field: getattr(stats, field, 0) for field in FIELDS}
+
+
+def apply(changes, using=None):
+    """Ajoute les deltas {id utilisateur: {champ: delta}} ; lignes créées au besoin."""
+    rows = [
+        (user_id, *(deltas.get(field, 0) for field in FIELDS))
+        for user_id, deltas in sorted(changes.items()) if user_id and any(deltas.values())
+    ]
+    if not rows:
+        return
+    alias = using or router.db_for_write(UserStats)
+    columns = ', '.join(FIELDS)
+    placeholders = ', '.join(['(%s' + ', %s' * len(FIELDS) + ')'] * len(rows))
+    updates = ', '.join(f'{field} = {TABLE}.{field} + excluded.{field}' for field in FIELDS)
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {TABLE} (user_id, {columns}) VALUES {placeholders} '
+            f'ON CONFLICT (user_id) DO UPDATE SET {updates}',
+            [value for row in rows for value in row],
+        )
+
+
+def points(model, value):
+    if value > 0:
+        return QUESTION_UPVOTE if model is Question else ANSWER_UPVOTE
+    return DOWNVOTE if value < 0 else 0
+
+
+def vote_cast(voter_id, target, value, delta, using=None):
+    """Vote `value` dont l'enregistrement a changé la somme de `delta` (voir votes.record_vote)."""
+    if not delta:
+        return
+    # Vote ajouté (delta = value), retiré (-value) ou inversé (2 × value) : ancienne et nouvelle valeur
+    old, new = {value: (0, value), -value: (value, 0), 2 * value: (-value, value)}[delta]
+    model = type(target)
+    changes = defaultdict(lambda: defaultdict(int))
+    changes[voter_id]['votes_cast'] += abs(new) - abs(old)
+    changes[target.author_id]['reputation'] += points(model, new) - points(model, old)
+    apply(changes, using)
+
+
+def question_created(question, using=None):
+    apply({question.author_id: {'question_count': 1}}, using)
+
+
+def answer_created(answer, using=None):
+    apply({answer.author_id: {'answer_count': 1}}, using)
+
+
+def best_answer_changed(previous, answer, using=None):
+    """`previous` : (id, auteur) des meilleures réponses de la question avant le choix de `answer`."""
+    changes = defaultdict(lambda: defaultdict(int))
+    for pk, author_id in previous:
+        if pk != answer.pk:
+            changes[author_id]['accepted_count'] -= 1
+            changes[author_id]['reputation'] -= ACCEPTED
+    if answer.pk not in {pk for pk, _ in previous}:
+        changes[answer.author_id]['accepted_count'] += 1
+        changes[answer.author_id]['reputation'] += ACCEPTED
+    apply(changes, using)
+
+
+def affected_by_answers(answers):
+    """Utilisateurs dont les compteurs dépendent de ces réponses : auteurs et votants."""
+    users = set(answers.values_list('author_id', flat=True))
+    users.update(Vote.objects.using(answers.db).filter(answer__in=answers).values_list('user_id', flat=True))
+    return users
+
+
+def affected_by_question(question):
+    users = {question.author_id}
+    users.update(Vote.objects.filter(question=question).values_list('user_id', flat=True))
+    return users | affected_by_answers(Answer.objects.filter(question=question))
+
+
+def _subquery(queryset, fk, aggregate):
+    return Coalesce(Subquery(
+        queryset.filter(**{fk: OuterRef('pk')}).order_by().values(fk).annotate(total=aggregate).values('total')
+    ), 0)
+
+
+def _received(votes, author, upvote):
+    # Points des votes reçus sur les questions ou les réponses dont l'utilisateur est l'auteur
+    return _subquery(votes, author, Sum(Case(
+        When(value__gt=0, then=Value(upvote)), default=Value(DOWNVOTE), output_field=IntegerField(),
+    )))
+
+
+def expressions():
+    return {
+        'reputation': (
+            _received(Vote.objects.filter(answer__isnull=True), 'question__author', QUESTION_UPVOTE)
+            + _received(Vote.objects.filter(question__isnull=True), 'answer__author', ANSWER_UPVOTE)
+            + ACCEPTED * _subquery(Answer.objects.filter(is_best_answer=True), 'author', Count('pk'))
+        ),
+        'question_count': _subquery(Question.objects.all(), 'author', Count('pk')),
+        'answer_count': _subquery(Answer.objects.all(), 'author', Count('pk')),
+        'accepted_count': _subquery(Answer.objects.filter(is_best_answer=True), 'author', Count('pk')),
+        'votes_cast': _subquery(Vote.objects.all(), 'user', Count('pk')),
+    }
+
+
+def recompute(user_ids, using=None):
+    """Recalcule entièrement les compteurs de ces utilisateurs ; renvoie le nombre de lignes."""
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return 0
+    manager = UserStats.objects.using(using)
+    with transaction.atomic(using=using):
+        # Lignes verrouillées avant la lecture : une écriture concurrente attend, puis ajoute son
+        # delta au total recalculé (sans verrou, il serait compté deux fois ou perdu)
+        manager.bulk_create([UserStats(user_id=pk) for pk in user_ids], ignore_conflicts=True)
+        list(manager.select_for_update().filter(user_id__in=user_ids).order_by('user_id').values_list('pk', flat=True))
+        stats = [
+            UserStats(user_id=row['pk'], **{field: row[f'new_{field}'] for field in FIELDS})
+            for row in User.objects.using(using).filter(pk__in=user_ids).values('pk').annotate(**{
+                f'new_{field}': expression for field, expression in expressions().items()
+            })
+        ]
+        manager.bulk_create(stats, update_conflicts=True, unique_fields=['user'], update_fields=list(FIELDS))
+    return len(stats)
+
+
+def ranking(using=None):
+    # Ordre de l'index api_userstats_rank_idx : les premières lignes sans tri
+    return UserStats.objects.using(using).order_by('-reputation', 'user').values('user', 'user__username', *FIELDS)
+
+
+def leaderboard(limit=LEADERBOARD_LIMIT, using=None):
+    """Utilisateurs de plus forte réputation, avec leur rang."""
+    rows = ranking(using)[:limit]
+    return [
+        {'rank': rank, 'id': row['user'], 'username': row['user__username'], **{field: row[field] for field in FIELDS}}
+        for rank, row in enumerate(rows, start=1)
+    ]
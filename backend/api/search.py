@@ -0,0 +1,254 @@
+import re
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import BooleanField, Exists, FloatField, OuterRef, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .models import Tag, Question
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+QUESTION_TABLE = Question._meta.db_table
+QUESTION_TAGS_TABLE = Question.tags.through._meta.db_table
+TAG_TABLE = Tag._meta.db_table
+FTS_TABLE = f'{QUESTION_TABLE}_fts'
+TRIGGERS_MIGRATION = ('api', '0019_search_triggers')
+
+
+class BaseSearchBackend:
+    # Annotation utilisée pour le tri par pertinence (plus grand = plus pertinent)
+    rank_field = 'search_rank'
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def search(self, queryset, text):
+        raise NotImplementedError
+
+    def index(self, question_ids):
+        pass
+
+    def remove(self, question_ids):
+        pass
+
+    def reindex(self, batch_size=1000):
+        indexed = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                Question.objects.using(self.alias).filter(pk__gt=last_pk)
+                .order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                return indexed
+            self.remove(pks)
+            self.index(pks)
+            indexed += len(pks)
+            last_pk = pks[-1]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Colonne `search_vector` (tsvector pondéré titre > tags > description) et index GIN, tenue
+    par des triggers (migration 0019) : les écritures hors des vues la mettent aussi à jour.
+    """
+
+    # Document d'une question, partagé par les triggers ; recréé par reindex_search pour suivre
+    # SEARCH_CONFIG
+    DOCUMENT_FUNCTION = """
+        CREATE OR REPLACE FUNCTION api_question_search_document(question_id bigint, title text, description text)
+        RETURNS tsvector LANGUAGE sql STABLE AS $$
+            SELECT setweight(to_tsvector({config}::regconfig, coalesce(title, '')), 'A') ||
+                setweight(to_tsvector({config}::regconfig, coalesce((
+                    SELECT string_agg(t.name, ' ') FROM api_tag t
+                    JOIN api_question_tags qt ON qt.tag_id = t.id
+                    WHERE qt.question_id = api_question_search_document.question_id
+                ), '')), 'B') ||
+                setweight(to_tsvector({config}::regconfig, coalesce(description, '')), 'C')
+        $$
+    """
+
+    def __init__(self, alias):
+        super().__init__(alias)
+        self.config = getattr(settings, 'SEARCH_CONFIG', 'simple')
+
+    def search(self, queryset, text):
+        tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+        return queryset.filter(
+            RawSQL(f'{QUESTION_TABLE}.search_vector @@ {tsquery}', (self.config, text), output_field=BooleanField())
+        ).annotate(**{
+            # ts_rank_cd rend un real : converti en double, la valeur du curseur (float Python)
+            # se compare exactement au rang recalculé, sans doublon ni trou entre les pages
+            self.rank_field: RawSQL(
+                f'ts_rank_cd({QUESTION_TABLE}.search_vector, {tsquery})::double precision', (self.config, text),
+                output_field=FloatField(),
+            )
+        })
+
+    def index(self, question_ids):
+        if not question_ids:
+            return
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {QUESTION_TABLE} q SET search_vector = api_question_search_document(q.id, q.title, q.description)
+                WHERE q.id = ANY(%s)
+                """,
+                [list(question_ids)],
+            )
+
+    def reindex(self, batch_size=1000):
+        connection = connections[self.alias]
+        with connection.cursor() as cursor:
+            config = connection.ops.compose_sql('%s', [self.config])
+            cursor.execute(self.DOCUMENT_FUNCTION.format(config=config))
+        return super().reindex(batch_size)
+
+
+class SqliteSearchBackend(BaseSearchBackend):
+    """
+    Table virtuelle FTS5 dont le rowid est l'id de la question (environnement local et tests),
+    tenue par des triggers (migration 0019).
+    """
+
+    # Poids bm25 des colonnes (title, tags, description)
+    weights = (10.0, 5.0, 1.0)
+
+    def search(self, queryset, text):
+        match = self.match_expression(text)
+        if not match:
+            return queryset.none()
+        bm25 = 'bm25({fts}, {w})'.format(fts=FTS_TABLE, w=', '.join(str(w) for w in self.weights))
+        # Questions trouvées lues sur la table FTS5 (pk IN), puis bm25 par une sous-requête
+        # corrélée sur le rowid : bm25 n'existe que dans la requête qui porte le MATCH
+        found = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        rank = RawSQL(
+            f'SELECT -{bm25} FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {QUESTION_TABLE}.id',
+            (match,), output_field=FloatField(),
+        )
+        # bm25 est négatif (plus petit = meilleur) : on inverse le signe
+        return queryset.filter(pk__in=found).annotate(**{self.rank_field: rank})
+
+    def match_expression(self, text):
+        # Chaque mot devient un terme entre guillemets avec préfixe : aucun opérateur FTS5 n'est interprété
+        return ' '.join(f'"{word}"*' for word in WORD_RE.findall(text))
+
+    def index(self, question_ids):
+        if not question_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(question_ids))
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {FTS_TABLE} (rowid, title, tags, description)
+                SELECT q.id, q.title, coalesce((
+                    SELECT group_concat(t.name, ' ') FROM {TAG_TABLE} t
+                    JOIN {QUESTION_TAGS_TABLE} qt ON qt.tag_id = t.id
+                    WHERE qt.question_id = q.id
+                ), ''), q.description
+                FROM {QUESTION_TABLE} q WHERE q.id IN ({placeholders})
+                """,
+                list(question_ids),
+            )
+
+    def remove(self, question_ids):
+        if not question_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(question_ids))
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', list(question_ids))
+
+    def restore_triggers(self):
+        """Recrée les triggers de la migration 0019 qui manquent ; renvoie leurs noms."""
+        statements = {
+            re.search(r'CREATE TRIGGER (\w+)', statement).group(1): statement
+            for statement in import_module('api.migrations.0019_search_triggers').SQLITE_TRIGGERS
+        }
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            missing = sorted(set(statements) - {name for name, in cursor.fetchall()})
+            for name in missing:
+                cursor.execute(statements[name])
+        return missing
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """Repli pour les autres SGBD : icontains sans jointure dupliquante sur les tags."""
+
+    def search(self, queryset, text):
+        for word in WORD_RE.findall(text):
+            tagged = Question.tags.through.objects.filter(question=OuterRef('pk'), tag__name__icontains=word)
+            queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word) | Exists(tagged))
+        return queryset.annotate(**{self.rank_field: Value(0.0, output_field=FloatField())})
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SqliteSearchBackend,
+}
+
+
+def get_backend(alias=None):
+    alias = alias or Question.objects.db
+    vendor = connections[alias].vendor
+    return BACKENDS.get(vendor, LikeSearchBackend)(alias)
+
+
+def restore_triggers(using='default', **kwargs):
+    """
+    Gestionnaire de post_migrate. SQLite supprime les triggers d'une table reconstruite par
+    une migration (AlterField, RemoveField...) : ils sont recréés après chaque migrate, et
+    l'index reconstruit s'il en manquait (écritures faites entre-temps).
+    """
+    backend = get_backend(using)
+    if not isinstance(backend, SqliteSearchBackend):
+        return
+    if TRIGGERS_MIGRATION not in MigrationRecorder(connections[using]).applied_migrations():
+        return
+    if backend.restore_triggers():
+        backend.reindex()
+
+
+def filter_tags(queryset, slugs):
+    """
+    Questions portant tous ces tags, sans jointure (donc sans lignes dupliquées). Les ids des
+    tags sont lus d'abord : en littéral, PostgreSQL estime la fréquence de chaque tag et lit
+    les questions d'un tag peu utilisé sur l'index (tag_id, question_id) au lieu de parcourir
+    api_question dans l'ordre du tri. Le tag le moins utilisé restreint par `id IN (...)`, les
+    suivants sont vérifiés par EXISTS sur l'index unique (question_id, tag_id).
+    """
+    slugs = set(slugs)
+    if not slugs:
+        return queryset
+    tags = Tag.objects.using(queryset.db).filter(slug__in=slugs).order_by('question_count', 'pk')
+    tags = list(tags.values_list('pk', flat=True))
+    if len(tags) < len(slugs):
+        return queryset.none()
+    through = Question.tags.through.objects
+    for position, tag_id in enumerate(tags):
+        if position == 0:
+            queryset = queryset.filter(pk__in=through.filter(tag_id=tag_id).values('question_id'))
+        else:
+            queryset = queryset.filter(Exists(through.filter(question=OuterRef('pk'), tag_id=tag_id)))
+    return queryset
+
+
+class QuestionSearchFilter(BaseFilterBackend):
+    """`?search=` plein texte classé par pertinence, `?tag=` (répétable) pour restreindre aux tags."""
+    search_param = api_settings.SEARCH_PARAM
+    tag_param = 'tag'
+
+    def get_search_text(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        text = self.get_search_text(request)
+        if text:
+            queryset = get_backend(queryset.db).search(queryset, text)
+        tags = [slug for slug in request.query_params.getlist(self.tag_param) if slug]
+        return filter_tags(queryset, tags)
@@ -1,16 +1,59 @@
-from rest_framework import serializers
-from .models import User, Tag, Question, Answer, Comment, Vote, Diploma
+from collections import defaultdict
+
+from django.urls import reverse
+from django.utils.functional import cached_property
+from rest_framework import permissions, serializers
+from . import markup, reputation
+from .metrics import TimedSerializerMixin
+from .models import User, Tag, Question, Answer, Comment, Vote, Diploma, DiplomaImport
+
+BODY_FORMATS = ('markdown', 'html')
+
+
+def body_format(request):
+    """Format des corps demandé par `?body_format=` ; les écritures renvoient toujours tout."""
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return None
+    value = request.query_params.get('body_format', 'markdown')
+    if value not in BODY_FORMATS:
+        raise serializers.ValidationError({'body_format': f"Expected one of: {', '.join(BODY_FORMATS)}"})
+    return value
+
+
+class BodyFormatMixin:
+    """
+    `?body_format=markdown` (défaut) : corps Markdown brut. `html` : HTML assaini rendu à
+    l'écriture (api/markup.py), le client n'a plus de Markdown à analyser. `body_fields` associe
+    à chaque format le champ renvoyé ; les autres sont retirés.
+    """
+    body_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = body_format(self.context.get('request'))
+        if selected is not None:
+            for name in set(self.body_fields.values()) - {self.body_fields[selected]}:
+                fields.pop(name)
+        return fields
+
 
 class UserSerializer(serializers.ModelSerializer):
+    # Réputation et compteurs d'activité (api/reputation.py), lus sur UserStats
+    stats = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'role', 'avatar', 'bio')
+        fields = ('id', 'username', 'email', 'role', 'avatar', 'bio', 'stats')
         read_only_fields = ('id',)
 
+    def get_stats(self, obj):
+        return reputation.as_dict(getattr(obj, 'stats', None))
+
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = '__all__'
+        read_only_fields = ('question_count',)
 
 class CommentSerializer(serializers.ModelSerializer):
     author_name = serializers.ReadOnlyField(source='author.username')
@@ -20,40 +63,182 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'author', 'author_name', 'question', 'answer', 'content', 'created_at')
         read_only_fields = ('id', 'author', 'created_at')
 
-class AnswerSerializer(serializers.ModelSerializer):
+class AnswerSerializer(BodyFormatMixin, TimedSerializerMixin, serializers.ModelSerializer):
     author_name = serializers.ReadOnlyField(source='author.username')
+    content_html = serializers.SerializerMethodField()
     comments = CommentSerializer(many=True, read_only=True)
+    body_fields = {'markdown': 'content', 'html': 'content_html'}
     
     class Meta:
         model = Answer
-        fields = ('id', 'author', 'author_name', 'question', 'content', 'created_at', 'updated_at', 'votes', 'is_best_answer', 'comments')
-        read_only_fields = ('id', 'author', 'created_at', 'updated_at', 'votes')
+        fields = ('id', 'author', 'author_name', 'question', 'content', 'content_html', 'created_at', 'updated_at', 'votes', 'is_best_answer', 'comment_count', 'comments')
+        read_only_fields = ('id', 'author', 'created_at', 'updated_at', 'votes', 'comment_count')
+
+    def get_content_html(self, obj):
+        return markup.html_of(obj)
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(BodyFormatMixin, TimedSerializerMixin, serializers.ModelSerializer):
     author_name = serializers.ReadOnlyField(source='author.username')
     tags_detail = TagSerializer(many=True, read_only=True, source='tags')
-    answers_count = serializers.SerializerMethodField()
+    answers_count = serializers.ReadOnlyField(source='answer_count')
+    excerpt = serializers.SerializerMethodField()
+    # Liste : un extrait en texte brut plutôt que le corps entier
+    body_fields = {'markdown': 'description', 'html': 'excerpt'}
     
     class Meta:
         model = Question
-        fields = ('id', 'author', 'author_name', 'title', 'description', 'tags', 'tags_detail', 'created_at', 'updated_at', 'votes', 'answers_count')
-        read_only_fields = ('id', 'author', 'tags', 'created_at', 'updated_at', 'votes')
+        fields = ('id', 'author', 'author_name', 'title', 'description', 'excerpt', 'tags', 'tags_detail', 'created_at', 'updated_at', 'votes', 'answers_count', 'comment_count')
+        read_only_fields = ('id', 'author', 'tags', 'created_at', 'updated_at', 'votes', 'comment_count')
+
+    def get_excerpt(self, obj):
+        return markup.excerpt_of(obj)
+
+# Champs de la liste des questions -> colonnes lues par `.values()` (QuestionViewSet.get_queryset)
+LIST_FIELDS = {
+    'id': ('id',),
+    'author': ('author_id',),
+    'author_name': ('author__username',),
+    'title': ('title',),
+    'description': ('description',),
+    'excerpt': ('excerpt', 'render_version'),
+    'tags': (),
+    'tags_detail': (),
+    'created_at': ('created_at',),
+    'updated_at': ('updated_at',),
+    'votes': ('votes',),
+    'answers_count': ('answer_count',),
+    'comment_count': ('comment_count',),
+}
+# Toujours lues : tri de la pagination par curseur
+LIST_ORDERING_COLUMNS = ('id', 'created_at', 'votes')
+
+
+def list_fields(request):
+    """
+    Champs de la liste demandés par `?fields=a,b` (`id` toujours inclus) ; sans paramètre,
+    ceux de QuestionSerializer pour le `body_format` demandé.
+    """
+    param = request.query_params.get('fields') if request.method in permissions.SAFE_METHODS else None
+    if not param:
+        hidden = {'markdown': 'excerpt', 'html': 'description'}[body_format(request) or 'markdown']
+        return [name for name in LIST_FIELDS if name != hidden]
+    requested = {name.strip() for name in param.split(',') if name.strip()}
+    unknown = requested - set(LIST_FIELDS)
+    if unknown:
+        raise serializers.ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}"})
+    return [name for name in LIST_FIELDS if name == 'id' or name in requested]
+
+
+def list_columns(fields):
+    return {*LIST_ORDERING_COLUMNS, *(column for name in fields for column in LIST_FIELDS[name])}
 
-    def get_answers_count(self, obj):
-        return obj.answers.count()
+
+class QuestionRowsSerializer(serializers.ListSerializer):
+    def queries(self, rows):
+        # Une requête par page, comme prefetch_related('tags') : tags, et Markdown des lignes
+        # pas encore rendues par `render_markdown` (extrait calculé à la volée)
+        fields = self.child.fields_selected
+        queries = {}
+        if 'tags' in fields or 'tags_detail' in fields:
+            through = Question.tags.through.objects.filter(question_id__in=[row['id'] for row in rows])
+            queries['tags'] = through.order_by('pk').values_list(
+                'question_id', 'tag_id', 'tag__name', 'tag__slug', 'tag__question_count'
+            )
+        stale = [row['id'] for row in rows if 'excerpt' in fields and row['render_version'] != markup.RENDERER_VERSION]
+        if stale:
+            queries['stale'] = Question.objects.filter(pk__in=stale).values_list('pk', 'description')
+        return queries
+
+    def load(self, rows):
+        self.child.attach({name: list(query) for name, query in self.queries(rows).items()})
+
+    async def aload(self, rows):
+        # Variante pour les vues asynchrones (api/async_views.py)
+        self.child.attach({name: [item async for item in query] for name, query in self.queries(rows).items()})
+
+    def to_representation(self, data):
+        rows = list(data)
+        if self.child.tags is None:
+            self.load(rows)
+        return [self.child.to_representation(row) for row in rows]
+
+
+class QuestionListSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Liste des questions, en lecture seule : lignes de `.values()`, sans l'introspection de
+    ModelSerializer ni d'instances de modèles. Mêmes clés et valeurs que QuestionSerializer,
+    restreintes par `?fields=`.
+    """
+    datetime_field = serializers.DateTimeField()
+    tags = None
+
+    class Meta:
+        list_serializer_class = QuestionRowsSerializer
+
+    @cached_property
+    def fields_selected(self):
+        return list_fields(self.context['request'])
+
+    def attach(self, results):
+        self.tags = defaultdict(list)
+        for question_id, *tag in results.get('tags', ()):
+            self.tags[question_id].append(tag)
+        self.stale_excerpts = {pk: markup.excerpt(markup.render(text)) for pk, text in results.get('stale', ())}
+
+    def to_representation(self, row):
+        data = {}
+        for name in self.fields_selected:
+            if name == 'tags':
+                data[name] = [tag[0] for tag in self.tags[row['id']]]
+            elif name == 'tags_detail':
+                data[name] = [
+                    {'id': pk, 'name': tag_name, 'slug': slug, 'question_count': count}
+                    for pk, tag_name, slug, count in self.tags[row['id']]
+                ]
+            elif name == 'excerpt':
+                data[name] = self.stale_excerpts.get(row['id'], row['excerpt'])
+            elif name in ('created_at', 'updated_at'):
+                data[name] = self.datetime_field.to_representation(row[name])
+            else:
+                data[name] = row[LIST_FIELDS[name][0]]
+        return data
 
 class QuestionDetailSerializer(QuestionSerializer):
+    description_html = serializers.SerializerMethodField()
     answers = AnswerSerializer(many=True, read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
+    body_fields = {'markdown': 'description', 'html': 'description_html'}
 
     class Meta(QuestionSerializer.Meta):
-        fields = QuestionSerializer.Meta.fields + ('answers', 'comments')
+        fields = tuple(name for name in QuestionSerializer.Meta.fields if name != 'excerpt') + ('description_html', 'answers', 'comments')
+
+    def get_description_html(self, obj):
+        return markup.html_of(obj)
+
+class DiplomaSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # PNG stocké s'il existe, sinon rendu SVG à la demande
+    qr_url = serializers.SerializerMethodField()
 
-class DiplomaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Diploma
         fields = '__all__'
-        read_only_fields = ('id', 'issue_date', 'qr_code')
+        read_only_fields = ('id', 'issue_date', 'qr_code', 'qr_status')
+
+    def get_qr_url(self, obj):
+        if obj.qr_code:
+            url = obj.qr_code.url
+        elif obj.qr_status == 'READY':
+            url = reverse('diploma-qr', kwargs={'pk': obj.pk})
+        else:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+class DiplomaImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DiplomaImport
+        fields = ('id', 'format', 'status', 'total', 'created', 'failed', 'errors', 'created_at', 'finished_at')
+        read_only_fields = fields
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
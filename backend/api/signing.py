@@ -0,0 +1,168 @@
+import base64
+import hashlib
+import hmac
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import django
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# Champs signés, dans l'ordre du message canonique (voir `payload`)
+SIGNED_FIELDS = ('serial_number', 'student_id', 'student_name', 'degree_name', 'major', 'graduation_date')
+PAYLOAD_VERSION = 'diploma-v1'
+# Signatures antérieures au service : sha256(données + SECRET_KEY), sans identifiant de clé
+LEGACY_KEY_ID = ''
+
+
+def b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def payload(values):
+    """
+    Message signé : tableau JSON compact ["diploma-v1", numéro de série, matricule, nom,
+    diplôme, spécialité, date AAAA-MM-JJ], encodé en UTF-8. `values` suit SIGNED_FIELDS.
+    """
+    return json.dumps([PAYLOAD_VERSION, *(str(value) for value in values)], ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def legacy_signature(serial_number, student_id, graduation_date):
+    data_to_sign = f"{serial_number}|{student_id}|{graduation_date}"
+    return hashlib.sha256(f"{data_to_sign}{settings.SECRET_KEY}".encode()).hexdigest()
+
+
+class KeyRing:
+    """Clés Ed25519 versionnées : la clé active signe, toutes les clés connues vérifient."""
+
+    def __init__(self, private_keys, active_key_id):
+        if active_key_id not in private_keys:
+            raise ImproperlyConfigured(f"Clé de signature active inconnue : {active_key_id!r}")
+        self.private_keys = private_keys
+        self.public_keys = {key_id: key.public_key() for key_id, key in private_keys.items()}
+        self.active_key_id = active_key_id
+
+    @classmethod
+    def from_settings(cls):
+        # DIPLOMA_SIGNING_KEYS = "kid:graine_base64url,..." (graine Ed25519 de 32 octets)
+        private_keys = {}
+        for entry in filter(None, (part.strip() for part in settings.DIPLOMA_SIGNING_KEYS.split(','))):
+            key_id, _, seed = entry.partition(':')
+            try:
+                private_keys[key_id] = Ed25519PrivateKey.from_private_bytes(b64decode(seed))
+            except ValueError as exc:
+                raise ImproperlyConfigured(f"Clé de signature {key_id!r} invalide : {exc}") from exc
+        if not private_keys:
+            # Développement : clé dérivée de SECRET_KEY (signalée par `check --deploy`)
+            seed = hashlib.sha256(f"diploma-signing:{settings.SECRET_KEY}".encode()).digest()
+            private_keys['dev'] = Ed25519PrivateKey.from_private_bytes(seed)
+        return cls(private_keys, settings.DIPLOMA_SIGNING_KEY_ID or list(private_keys)[-1])
+
+    def sign(self, message):
+        return self.active_key_id, b64encode(self.private_keys[self.active_key_id].sign(message))
+
+    def verify(self, key_id, message, signature):
+        key = self.public_keys.get(key_id)
+        if key is None or not signature:
+            return False
+        try:
+            key.verify(b64decode(signature), message)
+        except (InvalidSignature, ValueError):
+            return False
+        return True
+
+    def public_jwks(self):
+        # Format JWK (RFC 8037) : de quoi vérifier hors ligne, sans accès à l'API
+        return [
+            {
+                'kid': key_id, 'kty': 'OKP', 'crv': 'Ed25519', 'alg': 'EdDSA', 'use': 'sig',
+                'x': b64encode(key.public_bytes(Encoding.Raw, PublicFormat.Raw)),
+            }
+            for key_id, key in self.public_keys.items()
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_keyring():
+    # Chargée une fois par processus (ApiConfig.ready), rechargée si les réglages changent
+    return KeyRing.from_settings()
+
+
+@receiver(setting_changed)
+def reset_keyring(setting, **kwargs):
+    if setting in ('DIPLOMA_SIGNING_KEYS', 'DIPLOMA_SIGNING_KEY_ID', 'SECRET_KEY'):
+        get_keyring.cache_clear()
+
+
+@register(Tags.security, deploy=True)
+def check_signing_keys(app_configs, **kwargs):
+    if settings.DIPLOMA_SIGNING_KEYS:
+        return []
+    return [Warning(
+        "DIPLOMA_SIGNING_KEYS n'est pas défini : les diplômes sont signés avec une clé dérivée de SECRET_KEY.",
+        hint="Générez une clé avec `manage.py generate_signing_key`.",
+        id='api.W001',
+    )]
+
+
+def sign(values):
+    """(identifiant de clé, signature base64url) des valeurs SIGNED_FIELDS avec la clé active."""
+    return get_keyring().sign(payload(values))
+
+
+def verify(values, key_id, signature):
+    if key_id == LEGACY_KEY_ID:
+        serial_number, student_id, *_, graduation_date = values
+        return hmac.compare_digest(legacy_signature(serial_number, student_id, graduation_date), signature or '')
+    return get_keyring().verify(key_id, payload(values), signature)
+
+
+def ensure_signed(diploma):
+    """Signe `diploma` avec la clé active sauf si sa signature est déjà à jour et valide."""
+    values = [getattr(diploma, field) for field in SIGNED_FIELDS]
+    key_id = diploma.signature_key_id
+    if diploma.signature_data and key_id == get_keyring().active_key_id and verify(values, key_id, diploma.signature_data):
+        return False
+    diploma.signature_key_id, diploma.signature_data = sign(values)
+    return True
+
+
+def _sign_chunk(rows):
+    return [sign(values) for values in rows]
+
+
+def _verify_chunk(rows):
+    return [verify(values, key_id, signature) for values, key_id, signature in rows]
+
+
+def _run(func, rows, workers, chunk_size):
+    # Par tranches : un aller-retour entre processus par tranche, pas par diplôme
+    chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+    if not workers or workers < 2 or len(chunks) < 2:
+        return [result for chunk in chunks for result in func(chunk)]
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+    ) as pool:
+        return [result for chunk_results in pool.map(func, chunks) for result in chunk_results]
+
+
+def sign_many(rows, workers=0, chunk_size=2000):
+    """Signe une liste de tuples SIGNED_FIELDS ; renvoie [(identifiant de clé, signature), ...]."""
+    return _run(_sign_chunk, list(rows), workers, chunk_size)
+
+
+def verify_many(rows, workers=0, chunk_size=2000):
+    """Vérifie une liste de (valeurs SIGNED_FIELDS, identifiant de clé, signature) ; renvoie [bool, ...]."""
+    return _run(_verify_chunk, list(rows), workers, chunk_size)
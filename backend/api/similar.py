@@ -0,0 +1,266 @@
+"""
+Questions proches : `GET /api/questions/{id}/related/` et `POST /api/questions/similar/` (titre
+en cours de rédaction), pour limiter les doublons.
+
+Chaque question a un vecteur de termes (QuestionVector) calculé à l'écriture, comme l'index
+plein texte : mots du titre et des tags (poids TITLE_WEIGHT, TAG_WEIGHT), puis des
+DESCRIPTION_WORDS premiers mots de la description, poids sous-linéaires normalisés, au plus
+MAX_TERMS termes. Les termes sont hachés (crc32) : pas de vocabulaire à tenir à jour, 8 octets
+par terme en base.
+
+Chaque processus assemble ces vecteurs en listes inversées NumPy (`Segment`) : empreintes
+triées, documents et poids en tableaux contigus. Une recherche découpe les listes des termes
+de la requête (searchsorted) et additionne les contributions par document (bincount), soit le
+produit d'une matrice creuse par le vecteur requête pondéré par idf². Mise à jour incrémentale :
+les vecteurs écrits depuis le dernier chargement (updated_at) vont dans un petit segment récent,
+leur ancienne version est masquée ; au-delà de MERGE_SIZE, l'index est rechargé en entier.
+"""
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Question, QuestionVector
+from .search import WORD_RE
+
+# À incrémenter quand le calcul des vecteurs change (puis `reindex_similar`)
+VECTOR_VERSION = 1
+MAX_TERMS = 64
+DESCRIPTION_WORDS = 300
+TITLE_WEIGHT = 3
+TAG_WEIGHT = 3
+STOP_WORDS = frozenset('''
+    au aux avec ce ces comment dans de des du en est et il je la le les leur mais mon ne on ou par pas
+    plus pour qu que qui sa se ses son sur un une vous nous est sont être avoir fait faire quand
+    an and are as at be but by can do does for from how if in into is it its my not of on or so that the
+    this to use using what when why with without you your
+'''.split())
+LIMIT = 5
+MAX_LIMIT = 20
+# Score relatif au vecteur requête lui-même (1 : mêmes termes) ; en dessous, pas une suggestion
+MIN_SCORE = 0.1
+# Termes ignorés à la recherche : présents dans plus de cette part des questions (idf presque nul)
+# et dans plus de LONG_POSTINGS questions (listes les plus longues, le gros du coût)
+MAX_DOCUMENT_FREQUENCY = 0.1
+LONG_POSTINGS = 1000
+REFRESH_INTERVAL = 2  # secondes entre deux lectures des vecteurs récents
+# Transactions validées après le dernier passage avec un updated_at antérieur
+REFRESH_OVERLAP = timedelta(minutes=1)
+MERGE_SIZE = 1000
+
+
+def words(text):
+    for match in WORD_RE.finditer(text or ''):
+        word = match.group().casefold()
+        if len(word) > 1 and word not in STOP_WORDS:
+            yield word
+
+
+def vector(title, description='', tag_names=()):
+    """(empreintes uint32 triées, poids float32 de norme 1) d'un texte de question."""
+    counts = Counter()
+    for word in words(title):
+        counts[word] += TITLE_WEIGHT
+    for name in tag_names:
+        counts['#' + name.casefold()] += TAG_WEIGHT
+    for word in islice(words(description), DESCRIPTION_WORDS):
+        counts[word] += 1
+    terms = counts.most_common(MAX_TERMS)
+    hashes = np.fromiter((zlib.crc32(term.encode()) for term, _ in terms), dtype=np.uint32, count=len(terms))
+    weights = 1 + np.log(np.fromiter((count for _, count in terms), dtype=np.float64, count=len(terms)))
+    # Collisions d'empreintes dans une même question : poids additionnés
+    hashes, inverse = np.unique(hashes, return_inverse=True)
+    weights = np.bincount(inverse, weights=weights, minlength=len(hashes))
+    norm = np.linalg.norm(weights)
+    return hashes, (weights / norm if norm else weights).astype(np.float32)
+
+
+def encode(hashes, weights):
+    return hashes.tobytes() + weights.tobytes()
+
+
+def decode(data):
+    size = len(data) // 8
+    return np.frombuffer(data, np.uint32, size), np.frombuffer(data, np.float32, size, offset=4 * size)
+
+
+class Segment:
+    """Vecteurs de plusieurs questions en listes inversées, triées par empreinte."""
+
+    def __init__(self, ids, vectors):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.positions = {pk: position for position, pk in enumerate(ids)}
+        self.alive = np.ones(len(ids), dtype=bool)
+        lengths = [len(hashes) for hashes, _ in vectors]
+        hashes = np.concatenate([hashes for hashes, _ in vectors]) if vectors else np.empty(0, np.uint32)
+        weights = np.concatenate([weights for _, weights in vectors]) if vectors else np.empty(0, np.float32)
+        order = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[order]
+        self.weights = weights[order]
+        self.docs = np.repeat(np.arange(len(ids), dtype=np.int32), lengths)[order]
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def bounds(self, hashes):
+        return np.searchsorted(self.hashes, hashes, 'left'), np.searchsorted(self.hashes, hashes, 'right')
+
+    def scores(self, bounds, factors):
+        starts, ends = bounds
+        lengths = ends - starts
+        if not lengths.any():
+            return np.zeros(len(self.ids))
+        postings = np.concatenate([np.arange(start, end) for start, end in zip(starts, ends) if end > start])
+        scores = np.bincount(
+            self.docs[postings], weights=self.weights[postings] * np.repeat(factors, lengths), minlength=len(self.ids),
+        )
+        scores[~self.alive] = 0
+        return scores
+
+    def discard(self, pk):
+        position = self.positions.get(pk)
+        if position is not None:
+            self.alive[position] = False
+
+
+class SimilarityIndex:
+    """Segment principal, segment des vecteurs récents et filigrane de chargement."""
+
+    def __init__(self, rows):
+        ids, vectors, self.versions = [], [], {}
+        for pk, data, updated_at in rows:
+            ids.append(pk)
+            vectors.append(decode(data))
+            self.versions[pk] = updated_at
+        self.main = Segment(ids, vectors)
+        self.recent = {}
+        self.recent_segment = Segment([], [])
+        self.watermark = max(self.versions.values(), default=None)
+        self.checked = time.monotonic()
+
+    def apply(self, rows):
+        changed = False
+        for pk, data, updated_at in rows:
+            if self.versions.get(pk) == updated_at:
+                continue
+            self.main.discard(pk)
+            self.recent[pk] = decode(data)
+            self.versions[pk] = updated_at
+            self.watermark = max(self.watermark or updated_at, updated_at)
+            changed = True
+        if changed:
+            self.recent_segment = Segment(list(self.recent), list(self.recent.values()))
+        self.checked = time.monotonic()
+
+    def discard(self, pks):
+        # Questions supprimées : masquées, et retirées du segment récent avant sa reconstruction
+        for pk in pks:
+            self.main.discard(pk)
+            self.recent_segment.discard(pk)
+            self.recent.pop(pk, None)
+            self.versions.pop(pk, None)
+
+    def search(self, hashes, weights, exclude=None, limit=LIMIT):
+        """[(score, id de question)] par score décroissant."""
+        segments = (self.main, self.recent_segment)
+        bounds = [segment.bounds(hashes) for segment in segments]
+        frequencies = sum(ends - starts for starts, ends in bounds)
+        count = max(sum(len(segment) for segment in segments), 1)
+        idf = np.log1p(count / np.maximum(frequencies, 1))
+        factors = weights * idf * idf
+        # Normalisation par le score de la requête avec elle-même
+        best = float(np.dot(weights, factors)) or 1.0
+        kept = frequencies <= max(count * MAX_DOCUMENT_FREQUENCY, LONG_POSTINGS)
+        results = []
+        for segment, (starts, ends) in zip(segments, bounds):
+            scores = segment.scores((starts[kept], ends[kept]), factors[kept]) / best
+            if exclude in segment.positions:
+                scores[segment.positions[exclude]] = 0
+            top = np.argpartition(-scores, limit)[:limit] if len(scores) > limit else np.arange(len(scores))
+            results += [(float(scores[i]), int(segment.ids[i])) for i in top if scores[i] >= MIN_SCORE]
+        return sorted(results, reverse=True)[:limit]
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _rows(queryset):
+    return queryset.values_list('question_id', 'data', 'updated_at').iterator(chunk_size=2000)
+
+
+def get_index(using=None):
+    """Index du processus pour cet alias, complété au plus toutes les REFRESH_INTERVAL secondes."""
+    index = _indexes.get(using)
+    if index is not None and time.monotonic() - index.checked < REFRESH_INTERVAL:
+        return index
+    with _lock:
+        index = _indexes.get(using)
+        vectors = QuestionVector.objects.using(using)
+        if index is None or len(index.recent) > MERGE_SIZE:
+            index = _indexes[using] = SimilarityIndex(_rows(vectors.all()))
+        elif time.monotonic() - index.checked >= REFRESH_INTERVAL:
+            if index.watermark is None:
+                index.apply(_rows(vectors.all()))
+            else:
+                index.apply(_rows(vectors.filter(updated_at__gte=index.watermark - REFRESH_OVERLAP)))
+    return index
+
+
+def index_questions(question_ids, using=None):
+    """Recalcule le vecteur de ces questions ; à appeler une fois leurs tags enregistrés."""
+    question_ids = list(question_ids)
+    if not question_ids:
+        return
+    tags = defaultdict(list)
+    through = Question.tags.through.objects.using(using).filter(question_id__in=question_ids)
+    for question_id, name in through.values_list('question_id', 'tag__name'):
+        tags[question_id].append(name)
+    now = timezone.now()
+    vectors = [
+        QuestionVector(
+            question_id=row['id'], data=encode(*vector(row['title'], row['description'], tags[row['id']])),
+            version=VECTOR_VERSION, updated_at=now,
+        )
+        for row in Question.objects.using(using).filter(pk__in=question_ids).values('id', 'title', 'description')
+    ]
+    QuestionVector.objects.using(using).bulk_create(
+        vectors, update_conflicts=True, unique_fields=['question'], update_fields=['data', 'version', 'updated_at'],
+    )
+
+
+def remove_questions(question_ids, using=None):
+    """Retire ces questions des index du processus à la validation (vecteurs emportés par la cascade)."""
+    question_ids = list(question_ids)
+
+    def discard():
+        with _lock:
+            for index in _indexes.values():
+                index.discard(question_ids)
+    transaction.on_commit(discard, using=using)
+
+
+def suggest(hashes, weights, exclude=None, limit=LIMIT, using=None):
+    """Questions proches de ce vecteur : id, titre, votes, réponses, score ; supprimées ignorées."""
+    index = get_index(using)
+    while True:
+        found = index.search(hashes, weights, exclude=exclude, limit=limit * 2)
+        questions = {
+            row['id']: row for row in Question.objects.using(using).filter(pk__in=[pk for _, pk in found]).values(
+                'id', 'title', 'votes', 'answer_count', 'created_at',
+            )
+        }
+        gone = [pk for _, pk in found if pk not in questions]
+        if gone:
+            # Supprimées par un autre processus : retirées de cet index, nouvelle recherche si trop peu
+            with _lock:
+                index.discard(gone)
+        if not gone or len(questions) >= limit:
+            break
+    return [{**questions[pk], 'score': round(score, 3)} for score, pk in found if pk in questions][:limit]
@@ -0,0 +1,183 @@
+"""
+Tags : résolution groupée des noms à l'écriture d'une question, autocomplétion par préfixe.
+
+`resolve` trouve ou crée les tags d'une liste de noms quel que soit leur nombre : un SELECT,
+puis seulement s'il manque des noms un INSERT ... ON CONFLICT DO NOTHING et un second SELECT.
+Deux créations concurrentes du même tag ne lèvent plus d'IntegrityError. Un tag est
+retrouvé par son nom à la casse près (« Django », « django ») ; des noms distincts de même
+slug (« C », « C# ») restent des tags distincts, le slug du plus récent est suffixé.
+`attach` pose les liens en un seul INSERT.
+
+L'autocomplétion lit un index en mémoire propre au processus (`TagIndex`) : noms triés,
+recherche du préfixe par dichotomie, puis les plus utilisés d'abord. Il est reconstruit
+quand le jeton `INDEX` change (tag créé, renommé ou supprimé), et au plus tard après
+INDEX_MAX_AGE secondes pour les compteurs : publier une question sur des tags existants ne
+coûte pas une relecture de la table à chaque worker.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+from . import counters
+from .cache import ensure_tokens, get_cache, invalidate, version_key
+from .models import Tag, Question
+
+NAME_LENGTH = Tag._meta.get_field('name').max_length
+SLUG_LENGTH = Tag._meta.get_field('slug').max_length
+COMPLETE_LIMIT = 10
+MAX_COMPLETE_LIMIT = 50
+# Jeton de version de l'index d'autocomplétion : invalidate('tags', [INDEX])
+INDEX = 'index'
+# Âge maximal de l'index (secondes) : compteurs de questions, tags écrits hors de l'API
+INDEX_MAX_AGE = 300
+
+
+def slugs(names):
+    """[(nom, slug)] des noms non vides, dans l'ordre ; un seul nom par variante de casse."""
+    wanted = {}
+    for name in names:
+        if not isinstance(name, str):
+            continue
+        name = name.strip()[:NAME_LENGTH]
+        # allow_unicode : sinon tous les noms non latins auraient le slug vide
+        slug = slugify(name, allow_unicode=True)[:SLUG_LENGTH]
+        if slug:
+            wanted.setdefault(name.casefold(), (name, slug))
+    return list(wanted.values())
+
+
+def resolve(names, using=None):
+    """Tags de ces noms, créés au besoin ; un tag existant est retrouvé par son nom, à la casse près."""
+    wanted = slugs(names)
+    if not wanted:
+        return []
+    manager = Tag.objects.using(using)
+    lookup = Q(slug__in={slug for _, slug in wanted}) | Q(name__in=[name for name, _ in wanted])
+    found = list(manager.filter(lookup))
+    tags, missing = _match(wanted, found)
+    if missing:
+        # « C », « C# » et « C++ » ont le même slug : le premier créé le garde, les autres
+        # reçoivent un suffixe (c-2, c-3...) plutôt que d'être rattachés au tag « C »
+        taken = {tag.slug for tag in found}
+        new, clashes = [], []
+        for name, slug in missing:
+            if slug in taken:
+                clashes.append((name, slug))
+            else:
+                taken.add(slug)
+                new.append((name, slug))
+        suffixed, variants = _suffix_slugs(manager, clashes, taken)
+        found += variants
+        manager.bulk_create([Tag(name=name, slug=slug) for name, slug in new + suffixed], ignore_conflicts=True)
+        found += manager.filter(name__in=[name for name, _ in new + suffixed])
+        tags = _match(wanted, found)[0]
+        invalidate('tags', [INDEX])
+    return tags
+
+
+def _match(wanted, found):
+    # (tags trouvés sans doublon, (nom, slug) demandés sans tag) ; même slug, même tag
+    # seulement pour une variante de casse (« Django », « django »)
+    by_slug = {tag.slug: tag for tag in found}
+    by_name = {tag.name.casefold(): tag for tag in found}
+    tags, missing = {}, []
+    for name, slug in wanted:
+        tag = by_name.get(name.casefold())
+        if tag is None and slug in by_slug and by_slug[slug].name.casefold() == name.casefold():
+            tag = by_slug[slug]
+        if tag is None:
+            missing.append((name, slug))
+        else:
+            tags[tag.pk] = tag
+    return list(tags.values()), missing
+
+
+def _suffixed(slug, number):
+    suffix = f'-{number}'
+    return slug[:SLUG_LENGTH - len(suffix)] + suffix
+
+
+def _suffix_slugs(manager, clashes, taken, batch=10):
+    """
+    Premier slug suffixé libre pour chaque (nom, slug déjà pris), par lots de `batch`
+    candidats : ([(nom, slug)], tags de ces noms déjà créés sous un slug suffixé).
+    """
+    suffixed, variants, start = [], [], 2
+    while clashes:
+        candidates = {name: [_suffixed(slug, number) for number in range(start, start + batch)] for name, slug in clashes}
+        existing = list(manager.filter(slug__in=[slug for batch_slugs in candidates.values() for slug in batch_slugs]))
+        taken |= {tag.slug for tag in existing}
+        names = {tag.name.casefold(): tag for tag in existing}
+        rest = []
+        for name, slug in clashes:
+            if name.casefold() in names:
+                variants.append(names[name.casefold()])
+                continue
+            free = next((candidate for candidate in candidates[name] if candidate not in taken), None)
+            if free is None:
+                rest.append((name, slug))
+            else:
+                taken.add(free)
+                suffixed.append((name, free))
+        clashes, start = rest, start + batch
+    return suffixed, variants
+
+
+def attach(question, names, using=None):
+    """Lie une question neuve aux tags de ces noms et met à jour leurs compteurs ; renvoie les tags."""
+    tags = resolve(names, using)
+    through = Question.tags.through
+    through.objects.using(using).bulk_create([through(question_id=question.pk, tag_id=tag.pk) for tag in tags])
+    counters.tags_added({tag.pk for tag in tags})
+    return tags
+
+
+class TagIndex:
+    """Tags triés par nom (casefold) : préfixe par dichotomie, puis les plus utilisés."""
+
+    def __init__(self, rows):
+        # rows : (id, nom, slug, nombre de questions)
+        self.entries = sorted(rows, key=lambda row: row[1].casefold())
+        self.keys = [row[1].casefold() for row in self.entries]
+
+    def complete(self, prefix, limit=COMPLETE_LIMIT):
+        prefix = prefix.strip().casefold()
+        start = bisect_left(self.keys, prefix)
+        # Borne haute : premier nom qui ne commence plus par le préfixe
+        end = bisect_left(self.keys, prefix + '\U0010ffff', start)
+        best = heapq.nsmallest(limit, range(start, end), key=lambda i: (-self.entries[i][3], self.keys[i]))
+        return [self.entries[i] for i in best]
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _fresh(built, token):
+    return built is not None and built[0] == token and time.monotonic() - built[1] < INDEX_MAX_AGE
+
+
+def get_index(using=None):
+    """Index du processus pour cet alias, reconstruit si des tags ont changé ou s'il est trop vieux."""
+    key = version_key('tags', INDEX)
+    token = ensure_tokens(get_cache(), [key])[key]
+    built = _indexes.get(using)
+    if _fresh(built, token):
+        return built[2]
+    with _lock:
+        built = _indexes.get(using)
+        if not _fresh(built, token):
+            rows = Tag.objects.using(using).values_list('id', 'name', 'slug', 'question_count')
+            built = _indexes[using] = (token, time.monotonic(), TagIndex(list(rows)))
+    return built[2]
+
+
+def complete(prefix, limit=COMPLETE_LIMIT, using=None):
+    return [
+        {'id': pk, 'name': name, 'slug': slug, 'question_count': count}
+        for pk, name, slug, count in get_index(using).complete(prefix, limit)
+    ]
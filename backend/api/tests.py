@@ -1,3 +1,1924 @@
-from django.test import TestCase
+import asyncio
+import base64
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from io import StringIO
+from unittest import mock, skipUnless
+from urllib.parse import quote
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core import checks
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import (
+    async_views, counters, events, export, feeds, imports, markup, metrics, replicas, reputation, search, signing,
+    similar, tags,
+)
+from . import urls as api_urls
+from .pagination import KeysetPagination
+from .cache import get_cache, stats as cache_stats, written_key
+from .jobs import run_jobs
+from .models import (
+    User, Tag, Question, QuestionVector, Answer, Comment, Vote, VoteDelta, Diploma, FeedRank, Job, UserStats,
+)
+from .serializers import QuestionSerializer
+from .votes import cast_vote, flush_votes, flusher
+
+
+DATABASE_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'api_cache'}}
+
+
+def raw_cursor(value, pk, ordering):
+    # Curseur fabriqué à la main, comme par un client qui le modifie
+    return base64.urlsafe_b64encode(json.dumps([value, pk, ordering]).encode()).decode()
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        # Le cache LocMem survit d'un test à l'autre, contrairement à la base
+        cache.clear()
+        cache_stats.reset()
+
+
+class QuestionQueryCountTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('alice', password='secret')
+
+    def create_questions(self, count, answers=2, comments=2):
+        tags = [Tag.objects.create(name=f'tag{i}', slug=f'tag{i}') for i in range(3)]
+        questions = []
+        for i in range(count):
+            question = Question.objects.create(author=self.user, title=f'Question {i}', description='...')
+            question.tags.set(tags)
+            for j in range(answers):
+                answer = Answer.objects.create(author=self.user, question=question, content=f'Réponse {j}')
+                for k in range(comments):
+                    Comment.objects.create(author=self.user, answer=answer, content=f'Commentaire {k}')
+            for k in range(comments):
+                Comment.objects.create(author=self.user, question=question, content=f'Commentaire {k}')
+            questions.append(question)
+        call_command('recount', stdout=StringIO())
+        return questions
+
+    def test_list_runs_fixed_number_of_queries(self):
+        self.create_questions(15)
+        # questions + auteurs, puis tags
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/questions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 15)
+        self.assertEqual(response.data['results'][0]['answers_count'], 2)
+        self.assertEqual(len(response.data['results'][0]['tags_detail']), 3)
+
+    def test_list_fields(self):
+        questions = self.create_questions(3, answers=1, comments=0)
+        # Sans ?fields= : mêmes clés et valeurs que QuestionSerializer
+        response = self.client.get('/api/questions/')
+        question = Question.objects.select_related('author').prefetch_related('tags').get(pk=questions[-1].pk)
+        request = response.wsgi_request
+        request.query_params = request.GET
+        expected = QuestionSerializer(question, context={'request': request}).data
+        self.assertEqual(json.loads(json.dumps(response.data['results'][0])), json.loads(json.dumps(expected)))
+
+        # Sans tags demandés : une seule requête ; id toujours renvoyé, curseur intact
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/questions/?fields=title,votes&ordering=-votes&page_size=2')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'votes'})
+        following = self.client.get(response.data['next']).data['results']
+        self.assertEqual([item['id'] for item in following], [questions[0].pk])
+        self.assertEqual(set(following[0]), {'id', 'title', 'votes'})
+
+        response = self.client.get('/api/questions/?fields=title,body')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('body', str(response.data['fields']))
+
+    def test_detail_runs_fixed_number_of_queries(self):
+        question = self.create_questions(1, answers=6, comments=4)[0]
+        # question, tags, réponses + auteurs, commentaires des réponses, commentaires de la question
+        with self.assertNumQueries(5):
+            response = self.client.get(f'/api/questions/{question.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['answers']), 6)
+        self.assertEqual(len(response.data['answers'][0]['comments']), 4)
+        self.assertEqual(response.data['answers'][0]['comments'][0]['author_name'], 'alice')
+        self.assertEqual(len(response.data['comments']), 4)
+
+
+class PaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        user = User.objects.create_user('alice', password='secret')
+        self.questions = [
+            Question.objects.create(author=user, title=f'Question {i}', description='...') for i in range(6)
+        ]
+
+    def walk(self, **params):
+        # Suit les liens `next` jusqu'au bout : ids dans l'ordre, nombre de pages
+        ids, pages = [], 0
+        response = self.client.get('/api/questions/', {'page_size': 2, **params})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [question['id'] for question in response.data['results']]
+            pages += 1
+            if response.data['next'] is None:
+                return ids, pages
+            response = self.client.get(response.data['next'])
+
+    def test_next_links_cover_every_row_once(self):
+        ids, pages = self.walk()
+        self.assertEqual(ids, [question.pk for question in reversed(self.questions)])
+        self.assertEqual(pages, 3)
+        self.assertEqual(self.walk(ordering='created_at')[0], [question.pk for question in self.questions])
+
+    def test_ties_are_broken_by_id(self):
+        for question, votes in zip(self.questions, [1, 1, 1, 0, 0, 2]):
+            Question.objects.filter(pk=question.pk).update(votes=votes)
+        pks = [question.pk for question in self.questions]
+        ids, _ = self.walk(ordering='-votes')
+        self.assertEqual(ids, [pks[5], pks[2], pks[1], pks[0], pks[4], pks[3]])
+        ids, _ = self.walk(ordering='votes')
+        self.assertEqual(ids, [pks[3], pks[4], pks[0], pks[1], pks[2], pks[5]])
+
+    def test_invalid_cursor(self):
+        for cursor in ('abc', 'e30', raw_cursor('2026-01-01', 'x', '-created_at')):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get('/api/questions/', {'cursor': cursor}).status_code, 404)
+
+    def test_cursor_is_bound_to_its_ordering(self):
+        following = self.client.get('/api/questions/', {'page_size': 2, 'ordering': '-votes'}).data['next']
+        self.assertEqual(self.client.get(following).status_code, 200)
+        for ordering in ('votes', '-created_at'):
+            with self.subTest(ordering=ordering):
+                response = self.client.get(following.replace('ordering=-votes', f'ordering={ordering}'))
+                self.assertEqual(response.status_code, 404)
+
+    def test_dashboard_stats_count_past_the_first_page(self):
+        for i in range(25):
+            Diploma.objects.create(
+                student_name='Awa', student_id=f'S{i}', degree_name='Licence', major='Info',
+                graduation_date='2026-07-01', serial_number=f'DIP-{i}', is_signed=i < 21,
+            )
+        self.assertEqual(self.client.get('/api/dashboard/stats/').status_code, 401)
+        self.client.force_authenticate(User.objects.create_user('ines', password='secret', role='STAFF'))
+        self.assertEqual(len(self.client.get('/api/diplomas/').data['results']), 20)
+        response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.data, {'diplomas': 25, 'signed_diplomas': 21, 'pending_diplomas': 4, 'users': 2})
+
+    def test_admin_lists_search_on_the_server(self):
+        for i in range(25):
+            Diploma.objects.create(
+                student_name='Awa' if i % 2 else 'Moussa', student_id=f'S{i}', degree_name='Licence', major='Info',
+                graduation_date='2026-07-01', serial_number=f'DIP-{i}',
+            )
+        for i in range(3):
+            User.objects.create_user(f'moussa{i}', email=f'm{i}@example.com', password='secret')
+        self.client.force_authenticate(User.objects.get(username='alice'))
+        # La recherche porte sur toutes les lignes, pas seulement la première page ; `next` la conserve
+        response = self.client.get('/api/diplomas/', {'search': 'moussa', 'page_size': 10})
+        ids = [diploma['id'] for diploma in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [diploma['id'] for diploma in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(sorted(ids), sorted(Diploma.objects.filter(student_name='Moussa').values_list('pk', flat=True)))
+        self.assertEqual(len(self.client.get('/api/diplomas/', {'search': 'DIP-24'}).data['results']), 1)
+        users = self.client.get('/api/users/', {'search': 'example.com'}).data['results']
+        self.assertEqual(sorted(user['username'] for user in users), ['moussa0', 'moussa1', 'moussa2'])
+
+
+class CounterTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('bob', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def test_counters_follow_creates_and_deletes(self):
+        response = self.client.post('/api/questions/', {'title': 'T', 'description': 'D', 'tags': ['python', 'django']}, format='json')
+        question_id = response.data['id']
+        answer_id = self.client.post('/api/answers/', {'question': question_id, 'content': 'A'}, format='json').data['id']
+        comment_id = self.client.post('/api/comments/', {'answer': answer_id, 'content': 'C'}, format='json').data['id']
+        self.client.post('/api/comments/', {'question': question_id, 'content': 'C'}, format='json')
+
+        question = Question.objects.get(pk=question_id)
+        self.assertEqual((question.answer_count, question.comment_count), (1, 1))
+        self.assertEqual(Answer.objects.get(pk=answer_id).comment_count, 1)
+        self.assertEqual(Tag.objects.get(name='python').question_count, 1)
+
+        self.client.delete(f'/api/comments/{comment_id}/')
+        self.assertEqual(Answer.objects.get(pk=answer_id).comment_count, 0)
+        self.client.delete(f'/api/answers/{answer_id}/')
+        self.assertEqual(Question.objects.get(pk=question_id).answer_count, 0)
+        self.client.delete(f'/api/questions/{question_id}/')
+        self.assertEqual(Tag.objects.get(name='django').question_count, 0)
+
+    def test_recount_repairs_drift(self):
+        question = Question.objects.create(author=self.user, title='T', description='D', answer_count=42)
+        Answer.objects.create(author=self.user, question=question, content='A')
+        call_command('recount', batch_size=1, stdout=StringIO())
+        self.assertEqual(Question.objects.get(pk=question.pk).answer_count, 1)
+
+
+class TagTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('tess', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def ask(self, tags):
+        return self.client.post('/api/questions/', {'title': 'T', 'description': 'D', 'tags': tags}, format='json')
+
+    def test_tags_resolved_in_bulk(self):
+        Tag.objects.create(name='django', slug='django')
+        with CaptureQueriesContext(connection) as existing:
+            self.ask(['django'])
+        with CaptureQueriesContext(connection) as one:
+            self.ask(['go'])
+        with CaptureQueriesContext(connection) as many:
+            response = self.ask(['Django', 'python', ' python ', 'rust', '', 'Élixir'])
+        # Requêtes indépendantes du nombre de tags ; même slug, même tag ; tags existants : un SELECT
+        self.assertEqual(len(many), len(one))
+        self.assertEqual(len(existing), len(one) - 2)
+        question = Question.objects.get(pk=response.data['id'])
+        self.assertEqual(sorted(question.tags.values_list('slug', flat=True)), ['django', 'python', 'rust', 'élixir'])
+        self.assertEqual(Tag.objects.get(slug='django').question_count, 2)
+        self.assertEqual(Tag.objects.get(slug='python').question_count, 1)
+
+    def test_names_with_the_same_slug_stay_distinct(self):
+        Tag.objects.create(name='C', slug='c')
+        Tag.objects.create(name='Go', slug='c-2')
+        response = self.ask(['C#', 'C++', 'c#', 'c'])
+        # Tag existant retrouvé par son nom ; slugs suffixés en sautant ceux déjà pris
+        self.assertEqual(
+            sorted(Question.objects.get(pk=response.data['id']).tags.values_list('name', 'slug')),
+            [('C', 'c'), ('C#', 'c-3'), ('C++', 'c-4')],
+        )
+        self.assertEqual(Tag.objects.get(name='Go').question_count, 0)
+        response = self.ask(['c++', 'C'])
+        self.assertEqual(sorted(Question.objects.get(pk=response.data['id']).tags.values_list('slug', flat=True)), ['c', 'c-4'])
+        self.assertEqual(Tag.objects.count(), 4)
+
+    def test_tag_filter_requires_every_tag(self):
+        both = self.ask(['python', 'django']).data['id']
+        self.ask(['python'])
+        self.ask(['python'])
+        ids = lambda tags: [question['id'] for question in self.client.get('/api/questions/', {'tag': tags}).data['results']]
+        # Tag le moins utilisé (django) en premier, python vérifié par EXISTS
+        self.assertEqual(ids(['python', 'django']), [both])
+        self.assertEqual(len(ids(['python'])), 3)
+        self.assertEqual(ids(['python', 'inconnu']), [])
+
+    def test_autocomplete_by_popularity(self):
+        self.ask(['python', 'pytest'])
+        self.ask(['pytest'])
+        self.ask(['rust'])
+        names = lambda **params: [tag['name'] for tag in self.client.get('/api/tags/autocomplete/', params).data]
+        self.assertEqual(names(q='Py'), ['pytest', 'python'])
+        self.assertEqual(names(q='py', limit=1), ['pytest'])
+        self.assertEqual(names(q='go'), [])
+        # Index reconstruit quand un tag est créé ; sinon gardé, compteurs compris, jusqu'à INDEX_MAX_AGE
+        self.ask(['python', 'pydantic'])
+        self.assertEqual(names(q='py'), ['pytest', 'python', 'pydantic'])
+        self.ask(['python'])
+        with self.assertNumQueries(0):
+            self.assertEqual(names(q='py'), ['pytest', 'python', 'pydantic'])
+        with mock.patch.object(tags, 'INDEX_MAX_AGE', 0):
+            self.assertEqual(names(q='py'), ['python', 'pytest', 'pydantic'])
+
+
+class SimilarTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('sam', password='secret')
+        self.client.force_authenticate(self.user)
+        # Index du processus : repartir de la base du test, relue à chaque requête
+        similar._indexes.clear()
+        patcher = mock.patch.object(similar, 'REFRESH_INTERVAL', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.squash = self.ask('How to squash Django migrations?', 'Too many migration files in my app.', ['django'])
+        self.column = self.ask('Django migration fails: no such column', 'Migrate raises OperationalError.', ['django', 'sqlite'])
+        self.hooks = self.ask('React useEffect runs twice', 'My hook fires two times in development.', ['react'])
+
+    def ask(self, title, description, tags):
+        response = self.client.post('/api/questions/', {'title': title, 'description': description, 'tags': tags}, format='json')
+        return response.data['id']
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [question['id'] for question in response.data]
+
+    def test_related(self):
+        self.assertEqual(self.ids(self.client.get(f'/api/questions/{self.squash}/related/')), [self.column])
+        self.assertEqual(self.ids(self.client.get(f'/api/questions/{self.hooks}/related/')), [])
+
+    def test_similar_drafts_follow_writes(self):
+        self.client.force_authenticate(None)
+        draft = lambda title, **extra: self.client.post('/api/questions/similar/', {'title': title, **extra}, format='json')
+        self.assertEqual(self.ids(draft('squash django migrations')), [self.squash, self.column])
+        self.assertEqual(self.ids(draft('useEffect twice', tags=['react'])), [self.hooks])
+        self.assertEqual(draft('').status_code, 400)
+
+        # Index incrémental : nouvelle question, titre modifié, question supprimée
+        self.client.force_authenticate(self.user)
+        pandas = self.ask('Pandas groupby sum', 'Sum several columns.', ['pandas'])
+        self.client.patch(f'/api/questions/{self.hooks}/', {'title': 'Vue watcher runs twice'}, format='json')
+        self.client.delete(f'/api/questions/{self.squash}/')
+        self.assertEqual(self.ids(draft('pandas groupby')), [pandas])
+        self.assertEqual(self.ids(draft('vue watcher')), [self.hooks])
+        self.assertEqual(self.ids(draft('squash django migrations')), [self.column])
+
+    def test_deleted_questions_leave_the_index(self):
+        copies = [self.ask('How to squash Django migrations?', 'Too many migration files.', ['django']) for _ in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/questions/{copies[0]}/')
+        self.assertNotIn(copies[0], similar.get_index('default').versions)
+        # Supprimées par un autre processus : écartées à la recherche, liste complète quand même
+        Question.objects.filter(pk__in=copies[1:]).delete()
+        self.assertEqual(self.ids(self.client.get(f'/api/questions/{self.squash}/related/?limit=1')), [self.column])
+        self.assertNotIn(copies[1], similar.get_index('default').versions)
+
+    def test_reindex_command(self):
+        QuestionVector.objects.filter(question=self.column).delete()
+        QuestionVector.objects.filter(question=self.hooks).update(version=0)
+        out = StringIO()
+        call_command('reindex_similar', stdout=out)
+        self.assertIn('2 questions', out.getvalue())
+        self.assertEqual(QuestionVector.objects.filter(version=similar.VECTOR_VERSION).count(), 3)
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('carol', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def ask(self, title, description, tags):
+        response = self.client.post('/api/questions/', {'title': title, 'description': description, 'tags': tags}, format='json')
+        return response.data['id']
+
+    def test_ranked_search_without_duplicates(self):
+        in_title = self.ask('Migration Django bloquée', 'Rien ne passe.', ['django', 'migration'])
+        in_body = self.ask('Question générale', 'Une migration échoue sous django.', ['python'])
+        self.ask('React', 'Composants et hooks.', ['react'])
+
+        response = self.client.get('/api/questions/', {'search': 'django migration'})
+        ids = [question['id'] for question in response.data['results']]
+        self.assertEqual(ids, [in_title, in_body])
+
+        response = self.client.get('/api/questions/', {'search': 'django', 'tag': 'python'})
+        self.assertEqual([question['id'] for question in response.data['results']], [in_body])
+
+    def test_search_pages_follow_rank(self):
+        for i in range(7):
+            self.ask(f'Cache {i}', 'cache ' * (i + 1), ['cache'])
+        seen, url = [], '/api/questions/?search=cache&page_size=3'
+        while url:
+            response = self.client.get(url)
+            seen += [question['id'] for question in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_tampered_search_cursor(self):
+        self.ask('Cache', 'cache', [])
+        for value in ({'a': 1}, [1], 'abc', None, True):
+            with self.subTest(value=value):
+                response = self.client.get('/api/questions/', {'search': 'cache', 'cursor': raw_cursor(value, 1, '-search_rank')})
+                self.assertEqual(response.status_code, 404)
+        response = self.client.get('/api/questions/', {'search': 'cache', 'cursor': raw_cursor(99, 1, '-search_rank')})
+        self.assertEqual(response.status_code, 200)
+
+    def test_updates_and_deletes_are_reindexed(self):
+        question_id = self.ask('Ancien titre', 'Texte.', [])
+        self.client.patch(f'/api/questions/{question_id}/', {'title': 'Nginx proxy'}, format='json')
+        self.assertEqual(len(self.client.get('/api/questions/', {'search': 'nginx'}).data['results']), 1)
+        self.client.delete(f'/api/questions/{question_id}/')
+        self.assertEqual(self.client.get('/api/questions/', {'search': 'nginx'}).data['results'], [])
+
+    def test_writes_outside_the_views_are_indexed(self):
+        def found(text):
+            # Écritures ORM : le cache de réponses n'est pas invalidé, seul l'index est vérifié
+            cache.clear()
+            return [question['id'] for question in self.client.get('/api/questions/', {'search': text}).data['results']]
+
+        question = Question.objects.bulk_create([Question(author=self.user, title='Proxy nginx', description='...')])[0]
+        tag = Tag.objects.create(name='redis', slug='redis')
+        question.tags.add(tag)
+        self.assertEqual((found('nginx'), found('redis')), ([question.pk], [question.pk]))
+        Question.objects.filter(pk=question.pk).update(title='Traefik')
+        self.assertEqual((found('traefik'), found('nginx')), ([question.pk], []))
+        Tag.objects.filter(pk=tag.pk).update(name='valkey')
+        self.assertEqual((found('valkey'), found('redis')), ([question.pk], []))
+        question.tags.clear()
+        self.assertEqual(found('valkey'), [])
+        Question.objects.filter(pk=question.pk).delete()
+        self.assertEqual(found('traefik'), [])
+        call_command('reindex_search', stdout=StringIO())
+        self.assertEqual(found('traefik'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', "Triggers FTS5 : SQLite seulement")
+    def test_sqlite_triggers_are_restored_after_migrate(self):
+        def triggers():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+                return {name for name, in cursor.fetchall()}
+
+        expected = {
+            'api_question_fts_insert', 'api_question_fts_update', 'api_question_fts_delete',
+            'api_question_tags_fts_insert', 'api_question_tags_fts_delete', 'api_tag_fts_update',
+        }
+        # Toutes les migrations appliquées : aucune n'a reconstruit api_question sans les recréer
+        self.assertLessEqual(expected, triggers())
+        # Table reconstruite par une migration : triggers perdus, écritures non indexées
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER api_question_fts_insert')
+            cursor.execute('DROP TRIGGER api_question_fts_update')
+        question = Question.objects.create(author=self.user, title='Proxy nginx', description='...')
+        cache.clear()
+        self.assertEqual(self.client.get('/api/questions/', {'search': 'nginx'}).data['results'], [])
+        search.restore_triggers(using=connection.alias)
+        self.assertLessEqual(expected, triggers())
+        cache.clear()
+        results = self.client.get('/api/questions/', {'search': 'nginx'}).data['results']
+        self.assertEqual([result['id'] for result in results], [question.pk])
+
+
+class VoteTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('dave', password='secret')
+        self.client.force_authenticate(self.user)
+        self.question = Question.objects.create(author=self.user, title='T', description='D')
+        self.answer = Answer.objects.create(author=self.user, question=self.question, content='A')
+
+    def test_question_vote_toggles_and_switches(self):
+        url = f'/api/questions/{self.question.pk}/vote/'
+        updated_at = Question.objects.get(pk=self.question.pk).updated_at
+        self.assertEqual(self.client.post(url, {'value': 1}).data, {'votes': 1})
+        self.assertEqual(self.client.post(url, {'value': -1}).data, {'votes': -1})
+        self.assertEqual(self.client.post(url, {'value': -1}).data, {'votes': 0})
+        self.assertFalse(Vote.objects.exists())
+        self.assertEqual(Question.objects.get(pk=self.question.pk).updated_at, updated_at)
+
+    def test_answer_vote(self):
+        url = f'/api/answers/{self.answer.pk}/vote/'
+        self.assertEqual(self.client.post(url, {'value': 1}).data, {'votes': 1})
+        self.assertEqual(Vote.objects.get().answer_id, self.answer.pk)
+        self.assertEqual(Question.objects.get(pk=self.question.pk).votes, 0)
+
+    def test_invalid_value(self):
+        response = self.client.post(f'/api/questions/{self.question.pk}/vote/', {'value': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ReputationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.asker = User.objects.create_user('rita', password='secret')
+        self.helper = User.objects.create_user('sam', password='secret')
+        self.voter = User.objects.create_user('tom', password='secret')
+
+    def stats(self, user):
+        return reputation.as_dict(UserStats.objects.filter(user=user).first())
+
+    def post(self, user, url, data=None):
+        self.client.force_authenticate(user)
+        response = self.client.post(url, data or {}, format='json')
+        self.assertLess(response.status_code, 300, response.data)
+        return response.data
+
+    def test_counters_follow_writes(self):
+        question = self.post(self.asker, '/api/questions/', {'title': 'T', 'description': 'D'})['id']
+        first = self.post(self.helper, '/api/answers/', {'question': question, 'content': 'A'})['id']
+        second = self.post(self.voter, '/api/answers/', {'question': question, 'content': 'B'})['id']
+        self.post(self.voter, f'/api/questions/{question}/vote/', {'value': 1})
+        self.post(self.voter, f'/api/answers/{first}/vote/', {'value': 1})
+        # Vote inversé : +10 retiré, -2 ajouté ; vote retiré : plus rien
+        self.post(self.voter, f'/api/answers/{first}/vote/', {'value': -1})
+        self.post(self.helper, f'/api/questions/{question}/vote/', {'value': -1})
+        self.post(self.helper, f'/api/questions/{question}/vote/', {'value': -1})
+        self.post(self.asker, f'/api/answers/{first}/mark_best/')
+        self.post(self.asker, f'/api/answers/{first}/mark_best/')
+        self.assertEqual(self.stats(self.helper)['accepted_count'], 1)
+        self.post(self.asker, f'/api/answers/{second}/mark_best/')
+
+        expected = {
+            self.asker: {'reputation': 10, 'question_count': 1, 'answer_count': 0, 'accepted_count': 0, 'votes_cast': 0},
+            self.helper: {'reputation': -2, 'question_count': 0, 'answer_count': 1, 'accepted_count': 0, 'votes_cast': 0},
+            self.voter: {'reputation': 15, 'question_count': 0, 'answer_count': 1, 'accepted_count': 1, 'votes_cast': 2},
+        }
+        for user, values in expected.items():
+            self.assertEqual(self.stats(user), values, user.username)
+        # Le recalcul complet retrouve les compteurs incrémentaux
+        self.assertEqual(reputation.recompute(user.pk for user in expected), 3)
+        for user, values in expected.items():
+            self.assertEqual(self.stats(user), values, user.username)
+
+    def test_deletes_recompute_affected_users(self):
+        question = self.post(self.asker, '/api/questions/', {'title': 'T', 'description': 'D'})['id']
+        answer = self.post(self.helper, '/api/answers/', {'question': question, 'content': 'A'})['id']
+        self.post(self.voter, f'/api/answers/{answer}/vote/', {'value': 1})
+        self.post(self.voter, f'/api/questions/{question}/vote/', {'value': 1})
+
+        self.client.force_authenticate(self.helper)
+        self.assertEqual(self.client.delete(f'/api/answers/{answer}/').status_code, 204)
+        self.assertEqual(self.stats(self.helper), reputation.as_dict(None))
+        self.assertEqual(self.stats(self.voter)['votes_cast'], 1)
+
+        self.client.force_authenticate(self.asker)
+        self.assertEqual(self.client.delete(f'/api/questions/{question}/').status_code, 204)
+        self.assertEqual(self.stats(self.asker), reputation.as_dict(None))
+        self.assertEqual(self.stats(self.voter)['votes_cast'], 0)
+
+    def test_me_and_leaderboard(self):
+        question = self.post(self.asker, '/api/questions/', {'title': 'T', 'description': 'D'})['id']
+        self.post(self.voter, f'/api/questions/{question}/vote/', {'value': 1})
+        self.client.force_authenticate(self.asker)
+        self.assertEqual(self.client.get('/api/users/me/').data['stats']['reputation'], 10)
+        # Sans ligne UserStats : zéros
+        self.client.force_authenticate(self.helper)
+        self.assertEqual(self.client.get('/api/users/me/').data['stats'], reputation.as_dict(None))
+
+        self.client.force_authenticate(None)
+        with self.assertNumQueries(1):
+            rows = self.client.get('/api/users/leaderboard/').data
+        self.assertEqual([(row['rank'], row['username'], row['reputation']) for row in rows], [(1, 'rita', 10), (2, 'tom', 0)])
+        self.assertEqual(len(self.client.get('/api/users/leaderboard/?limit=1').data), 1)
+
+    def test_recompute_command(self):
+        Question.objects.create(author=self.asker, title='T', description='D')
+        Answer.objects.create(author=self.helper, question=Question.objects.get(), content='A', is_best_answer=True)
+        output = StringIO()
+        call_command('recompute_reputation', stdout=output)
+        self.assertIn('3 utilisateurs', output.getvalue())
+        self.assertEqual(self.stats(self.helper)['reputation'], reputation.ACCEPTED)
+        self.assertEqual(self.stats(self.asker)['question_count'], 1)
+        # Par défaut, seuls les utilisateurs sans ligne ; --all recalcule tout le monde
+        UserStats.objects.update(reputation=0)
+        call_command('recompute_reputation', stdout=output)
+        self.assertEqual(self.stats(self.helper)['reputation'], 0)
+        call_command('recompute_reputation', all=True, batch_size=2, stdout=output)
+        self.assertEqual(self.stats(self.helper)['reputation'], reputation.ACCEPTED)
+
+
+@override_settings(VOTE_FLUSH_INTERVAL=0)
+class WriteBehindVoteTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('erin', password='secret')
+        self.question = Question.objects.create(author=self.author, title='T', description='D')
+        self.answer = Answer.objects.create(author=self.author, question=self.question, content='A')
+        self.voters = User.objects.bulk_create([User(username=f'voter{i}') for i in range(5)])
+
+    def test_log_mode_defers_tally_until_flush(self):
+        for voter in self.voters:
+            cast_vote(voter, self.question, 1, mode='log')
+        cast_vote(self.voters[0], self.answer, -1, mode='log')
+        cast_vote(self.voters[1], self.question, 1, mode='log')
+
+        self.assertEqual(Question.objects.get(pk=self.question.pk).votes, 0)
+        self.assertEqual(VoteDelta.objects.count(), 7)
+        flush_votes()
+        self.assertEqual(Question.objects.get(pk=self.question.pk).votes, 4)
+        self.assertEqual(Answer.objects.get(pk=self.answer.pk).votes, -1)
+        self.assertFalse(VoteDelta.objects.exists())
+
+    def test_buffer_mode_reports_pending_votes(self):
+        totals = [cast_vote(voter, self.question, 1, mode='buffer') for voter in self.voters]
+        self.assertEqual(totals, [1, 2, 3, 4, 5])
+        self.assertEqual(Question.objects.get(pk=self.question.pk).votes, 0)
+        flush_votes()
+        self.assertEqual(Question.objects.get(pk=self.question.pk).votes, 5)
+
+    @override_settings(VOTE_WRITE_MODE='buffer')
+    def test_recount_repairs_lost_buffer(self):
+        cast_vote(self.voters[0], self.question, 1)
+        flusher.store.drain()
+        # Workers en marche : leurs deltas en mémoire seraient comptés deux fois
+        with self.assertRaises(CommandError):
+            call_command('recount', votes=True, stdout=StringIO())
+        call_command('recount', votes=True, workers_stopped=True, stdout=StringIO())
+        self.assertEqual(Question.objects.get(pk=self.question.pk).votes, 1)
+
+    def test_recount_consumes_the_log(self):
+        cast_vote(self.voters[0], self.question, 1, mode='log')
+        recount = counters.recount
+
+        def interleaved(model, *args, **kwargs):
+            # Vote validé pendant le recalcul, avant que son delta ne soit agrégé
+            if model is Question:
+                cast_vote(self.voters[1], self.question, 1, mode='log')
+            return recount(model, *args, **kwargs)
+
+        with mock.patch('api.votes.recount', interleaved):
+            call_command('recount', votes=True, stdout=StringIO())
+        self.assertEqual(Question.objects.get(pk=self.question.pk).votes, 2)
+        self.assertFalse(VoteDelta.objects.exists())
+        flush_votes()
+        self.assertEqual(Question.objects.get(pk=self.question.pk).votes, 2)
+
+
+class ConcurrentVoteTests(TransactionTestCase):
+    voters = 200
+
+    def test_parallel_votes_keep_exact_tally(self):
+        author = User.objects.create_user('author', password='secret')
+        question = Question.objects.create(author=author, title='Populaire', description='D')
+        users = User.objects.bulk_create([User(username=f'voter{i}') for i in range(self.voters)])
+
+        def vote(user):
+            try:
+                # Les votants pairs votent pour, les impairs contre puis changent d'avis
+                value = 1 if user.pk % 2 == 0 else -1
+                cast_vote(user, question, value)
+                if value == -1:
+                    cast_vote(user, question, 1)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(vote, users))
+
+        self.assertEqual(Question.objects.get(pk=question.pk).votes, self.voters)
+        self.assertEqual(Vote.objects.filter(question=question, value=1).count(), self.voters)
+
+
+def event(data):
+    # Trame SSE encodée -> (événement, données)
+    lines = dict(line.split(': ', 1) for line in data.decode().strip().splitlines())
+    return lines['event'], json.loads(lines['data'])
+
+
+# Courtier et flux du processus : backend local, PostgresBackend testé à part
+@override_settings(EVENTS_BACKEND='api.events.LocalBackend')
+class EventTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('ines', password='secret')
+        self.client.force_authenticate(self.user)
+        self.question = Question.objects.create(author=self.user, title='T', description='D')
+        self.answer = Answer.objects.create(author=self.user, question=self.question, content='A')
+
+    @override_settings(SERVER_MODE='asgi', WEB_CONCURRENCY=3)
+    def test_local_backend_with_several_workers_is_reported(self):
+        self.assertEqual([message.id for message in events.check_backend(None)], ['api.W003'])
+        with self.settings(WEB_CONCURRENCY=1):
+            self.assertEqual(events.check_backend(None), [])
+        with self.settings(EVENTS_BACKEND='api.events.PostgresBackend'):
+            self.assertEqual(events.check_backend(None), [])
+
+    def test_broker_fan_out_from_another_thread(self):
+        async def run():
+            first, second = events.broker.subscribe(1), events.broker.subscribe(1)
+            other, slow = events.broker.subscribe(2), events.broker.subscribe(1, size=2)
+            try:
+                # Comme une vue synchrone après COMMIT : depuis un thread, hors de la boucle
+                for i in range(3):
+                    await asyncio.to_thread(events.broker.deliver, 1, f'trame {i}')
+                await asyncio.sleep(0)
+                return [[queue.get_nowait() for _ in range(queue.qsize())] for queue in (
+                    first.queue, second.queue, other.queue, slow.queue,
+                )]
+            finally:
+                for subscription in (first, second, other, slow):
+                    events.broker.unsubscribe(subscription)
+
+        sent = [b'trame 0', b'trame 1', b'trame 2']
+        self.assertEqual(async_to_sync(run)(), [sent, sent, [], [events.RESET_FRAME]])
+        self.assertEqual(events.broker.count(), 0)
+
+    def test_writes_publish_deltas_after_commit(self):
+        async def run():
+            subscription = events.broker.subscribe(self.question.pk)
+            try:
+                await sync_to_async(self.write)()
+                await asyncio.sleep(0)
+                return [event(subscription.queue.get_nowait()) for _ in range(subscription.queue.qsize())]
+            finally:
+                events.broker.unsubscribe(subscription)
+
+        received = async_to_sync(run)()
+        self.assertEqual([name for name, _ in received], ['votes', 'votes', 'answer', 'comment', 'best_answer'])
+        self.assertEqual(received[0][1], {'question': self.question.pk, 'answer': None, 'votes': 1})
+        self.assertEqual(received[1][1], {'question': self.question.pk, 'answer': self.answer.pk, 'votes': -1})
+        answer = received[2][1]['answer']
+        self.assertEqual((answer['content_html'], answer['author_name']), ('<p>Nouvelle</p>\n', 'ines'))
+        self.assertNotIn('content', answer)
+        self.assertEqual(received[3][1]['answer'], answer['id'])
+        self.assertEqual(received[3][1]['comment']['content'], 'C')
+        self.assertEqual(received[4][1], {'question': self.question.pk, 'answer': answer['id']})
+
+    def write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/questions/{self.question.pk}/vote/', {'value': 1})
+            self.client.post(f'/api/answers/{self.answer.pk}/vote/', {'value': -1})
+            answer_id = self.client.post(
+                '/api/answers/', {'question': self.question.pk, 'content': 'Nouvelle'}, format='json',
+            ).data['id']
+            self.client.post('/api/comments/', {'answer': answer_id, 'content': 'C'}, format='json')
+            self.client.post(f'/api/answers/{answer_id}/mark_best/')
+            # Écriture annulée : rien n'est publié
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                self.client.post(f'/api/questions/{self.question.pk}/vote/', {'value': 1})
+                raise IntegrityError
+
+
+
+@override_settings(EVENTS_BACKEND='api.events.LocalBackend')
+class EventStreamTests(TransactionTestCase):
+    # Existence de la question vérifiée dans un thread de l'exécuteur : données validées
+
+    @override_settings(EVENTS_HEARTBEAT=0.01)
+    def test_event_stream(self):
+        user = User.objects.create_user('ines', password='secret')
+        self.question = Question.objects.create(author=user, title='T', description='D')
+
+        # Application de config/asgi.py, appelée comme le ferait uvicorn
+        async def request(path, method='GET', disconnect=None, headers=()):
+            sent, received = [], asyncio.Queue()
+            await received.put({'type': 'http.request', 'body': b''})
+
+            async def send(message):
+                sent.append(message)
+                # Après l'événement diffusé et un battement de cœur : déconnexion du client
+                if len(sent) == 2 and message.get('more_body'):
+                    events.broker.deliver(self.question.pk, events.frame('votes', {'votes': 3}))
+                elif len(sent) == 4:
+                    subscribed.append(events.broker.count())
+                    await received.put({'type': 'http.disconnect'})
+
+            scope = {'type': 'http', 'method': method, 'path': path, 'headers': list(headers)}
+            await events.route(django)(scope, received.get, send)
+            return sent
+
+        async def django(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+
+        subscribed = []
+        stream = async_to_sync(request)(f'/api/questions/{self.question.pk}/events/', headers=[(b'origin', b'http://front')])
+        self.assertEqual(dict(stream[0]['headers'])[b'content-type'], b'text/event-stream')
+        self.assertEqual(dict(stream[0]['headers'])[b'access-control-allow-origin'], b'*')
+        bodies = [message['body'] for message in stream[1:]]
+        self.assertEqual(bodies[0], events.RETRY_FRAME)
+        self.assertEqual(event(bodies[1]), ('votes', {'votes': 3}))
+        self.assertEqual(bodies[2], events.HEARTBEAT_FRAME)
+        self.assertEqual((subscribed, events.broker.count()), ([1], 0))
+
+        self.assertEqual(async_to_sync(request)('/api/questions/999999/events/')[0]['status'], 404)
+        self.assertEqual(async_to_sync(request)(f'/api/questions/{self.question.pk}/events/', 'POST')[0]['status'], 405)
+        # Tout le reste : Django
+        self.assertEqual(async_to_sync(request)('/api/questions/')[0]['status'], 204)
+
+
+@skipUnless(connection.vendor == 'postgresql', "NOTIFY/LISTEN : PostgreSQL seulement")
+class PostgresEventTests(TransactionTestCase):
+    def test_notify_reaches_every_worker_after_commit(self):
+        user = User.objects.create_user('ines', password='secret')
+        question = Question.objects.create(author=user, title='T', description='D')
+        # Deux workers : chacun son courtier et son écoute
+        workers = [events.PostgresBackend(events.Broker()) for _ in range(2)]
+
+        def write(votes, rollback=False):
+            with transaction.atomic():
+                workers[0].publish(question.pk, 'votes', {'votes': votes})
+                transaction.set_rollback(rollback)
+
+        async def scenario():
+            subscriptions = []
+            for backend in workers:
+                await backend.start()
+                subscriptions.append(backend.broker.subscribe(question.pk))
+            try:
+                await sync_to_async(write)(1, rollback=True)
+                await sync_to_async(write)(2)
+                await sync_to_async(write)('x' * events.NOTIFY_LIMIT)
+                return [
+                    [await asyncio.wait_for(subscription.queue.get(), 5) for _ in range(2)]
+                    for subscription in subscriptions
+                ]
+            finally:
+                for backend in workers:
+                    for task, _ in backend.listeners.values():
+                        task.cancel()
+                    await asyncio.gather(*(task for task, _ in backend.listeners.values()), return_exceptions=True)
+
+        received = async_to_sync(scenario)()
+        for frames in received:
+            # Rien du ROLLBACK ; notification trop grosse remplacée par un reset
+            self.assertEqual([event(data) for data in frames], [('votes', {'votes': 2}), ('reset', {})])
+
+    def test_conninfo_keeps_options(self):
+        backend = events.PostgresBackend(events.Broker())
+        options = {**connection.settings_dict['OPTIONS'], 'sslmode': 'disable', 'application_name': 'events'}
+        with mock.patch.dict(connection.settings_dict, OPTIONS=options):
+            conninfo = backend.conninfo()
+        self.assertIn('sslmode=disable', conninfo)
+        self.assertIn('application_name=events', conninfo)
+        self.assertIn(f"dbname={connection.settings_dict['NAME']}", conninfo)
+        self.assertNotIn('pool', conninfo)
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('frank', password='secret')
+        self.client.force_authenticate(self.user)
+        self.first = self.client.post('/api/questions/', {'title': 'Un', 'description': 'D', 'tags': ['a']}, format='json').data['id']
+        self.second = self.client.post('/api/questions/', {'title': 'Deux', 'description': 'D'}, format='json').data['id']
+
+    def test_per_process_cache_with_several_workers_is_an_error(self):
+        from .cache import check_shared_cache
+        self.assertEqual(check_shared_cache(None), [])
+        with self.settings(WEB_CONCURRENCY=3):
+            self.assertEqual([message.id for message in check_shared_cache(None)], ['api.E001'])
+            with self.settings(CACHES=DATABASE_CACHES):
+                self.assertEqual(check_shared_cache(None), [])
+
+    def test_database_cache_is_shared_and_read_on_the_primary(self):
+        with self.settings(CACHES=DATABASE_CACHES):
+            call_command('createcachetable', stdout=StringIO())
+        # Deux instances : comme deux workers
+        first, second = (DatabaseCache('api_cache', {}) for _ in range(2))
+        first.set('api:questions:generation', 'jeton')
+        self.assertEqual(second.get('api:questions:generation'), 'jeton')
+        token = replicas._read_alias.set('replica_0')
+        try:
+            self.assertEqual(replicas.ReplicaRouter().db_for_read(first.cache_model_class), 'default')
+        finally:
+            replicas._read_alias.reset(token)
+
+    def test_detail_is_served_from_cache(self):
+        self.assertEqual(self.client.get(f'/api/questions/{self.first}/')['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/questions/{self.first}/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['title'], 'Un')
+
+    def test_version_tokens_expire(self):
+        # Identifiants inexistants : leurs jetons ne doivent pas s'accumuler pour toujours
+        api_cache = get_cache()
+        with mock.patch.object(api_cache, 'set_many', wraps=api_cache.set_many) as set_many:
+            self.assertEqual(self.client.get('/api/questions/999999/').status_code, 404)
+            self.client.post(f'/api/questions/{self.first}/vote/', {'value': 1})
+        self.assertTrue(set_many.call_args_list)
+        for call in set_many.call_args_list:
+            self.assertEqual(call.kwargs['timeout'], settings.API_CACHE_TOKEN_TIMEOUT)
+
+    def test_vote_invalidates_only_affected_entries(self):
+        for url in (f'/api/questions/{self.first}/', f'/api/questions/{self.second}/', '/api/questions/'):
+            self.client.get(url)
+        self.client.post(f'/api/questions/{self.first}/vote/', {'value': 1})
+
+        response = self.client.get(f'/api/questions/{self.first}/')
+        self.assertEqual((response['X-Cache'], response.data['votes']), ('MISS', 1))
+        self.assertEqual(self.client.get(f'/api/questions/{self.second}/')['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get('/api/questions/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/questions/', {'page_size': 1})['X-Cache'], 'MISS')
+
+    def test_votes_reorder_score_ordered_lists(self):
+        top = lambda **params: self.client.get('/api/questions/', {'page_size': 1, **params})
+        for params in ({'ordering': '-votes'}, {'feed': 'week'}, {}):
+            self.assertEqual(top(**params).data['results'][0]['id'], self.second)
+        # Page qui ne contient pas la question votée : seules les listes classées par score changent
+        self.client.post(f'/api/questions/{self.first}/vote/', {'value': 1})
+        for params in ({'ordering': '-votes'}, {'feed': 'week'}):
+            response = top(**params)
+            self.assertEqual((response['X-Cache'], response.data['results'][0]['id']), ('MISS', self.first))
+        self.assertEqual(top()['X-Cache'], 'HIT')
+        # Votes écrits en différé : invalidés quand ils sont appliqués
+        cast_vote(self.user, Question.objects.get(pk=self.first), -1, mode='log')
+        self.assertEqual(top(ordering='-votes').data['results'][0]['id'], self.first)
+        flush_votes()
+        self.assertEqual(top(ordering='-votes').data['results'][0]['id'], self.second)
+
+    def test_answers_and_comments_invalidate_their_question(self):
+        self.client.get(f'/api/questions/{self.first}/')
+        answer = self.client.post('/api/answers/', {'question': self.first, 'content': 'R'}, format='json').data['id']
+        self.assertEqual(len(self.client.get(f'/api/questions/{self.first}/').data['answers']), 1)
+        self.client.post('/api/comments/', {'answer': answer, 'content': 'C'}, format='json')
+        response = self.client.get(f'/api/questions/{self.first}/')
+        self.assertEqual(len(response.data['answers'][0]['comments']), 1)
+        self.client.post(f'/api/answers/{answer}/mark_best/')
+        self.assertTrue(self.client.get(f'/api/questions/{self.first}/').data['answers'][0]['is_best_answer'])
+
+    def test_tag_list_follows_new_questions(self):
+        self.assertEqual(self.client.get('/api/tags/').data['results'][0]['question_count'], 1)
+        self.assertEqual(self.client.get('/api/tags/')['X-Cache'], 'HIT')
+        self.client.post('/api/questions/', {'title': 'Trois', 'description': 'D', 'tags': ['a']}, format='json')
+        self.assertEqual(self.client.get('/api/tags/').data['results'][0]['question_count'], 2)
+
+    def test_stats_are_exposed_to_staff(self):
+        self.client.get(f'/api/questions/{self.first}/')
+        self.client.get(f'/api/questions/{self.first}/')
+        self.assertEqual(self.client.get('/api/cache/stats/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/cache/stats/')
+        self.assertEqual(response.data['questions:detail'], {'hits': 1, 'misses': 1})
+
+
+class ConditionalRequestTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('grace', password='secret', is_staff=True)
+        self.client.force_authenticate(self.user)
+        self.question = self.client.post('/api/questions/', {'title': 'Un', 'description': 'D', 'tags': ['a']}, format='json').data['id']
+        self.answer = self.client.post('/api/answers/', {'question': self.question, 'content': 'R'}, format='json').data['id']
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_question_detail_not_modified_until_a_vote(self):
+        url = f'/api/questions/{self.question}/'
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.revalidate(url, first)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+        self.client.post(f'/api/answers/{self.answer}/vote/', {'value': 1})
+        response = self.revalidate(url, first)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_question_list_revalidation(self):
+        first = self.client.get('/api/questions/')
+        self.assertEqual(self.revalidate('/api/questions/', first).status_code, 304)
+        self.client.post(f'/api/questions/{self.question}/vote/', {'value': 1})
+        self.assertEqual(self.revalidate('/api/questions/', first).status_code, 200)
+
+    def test_answer_and_tag_detail(self):
+        url = f'/api/answers/{self.answer}/'
+        first = self.client.get(url)
+        self.assertEqual(self.revalidate(url, first).status_code, 304)
+        self.client.post('/api/comments/', {'answer': self.answer, 'content': 'C'}, format='json')
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+
+        tag = Tag.objects.get().pk
+        first = self.client.get(f'/api/tags/{tag}/')
+        self.assertEqual(self.revalidate(f'/api/tags/{tag}/', first).status_code, 304)
+        self.client.patch(f'/api/tags/{tag}/', {'name': 'b'}, format='json')
+        self.assertEqual(self.revalidate(f'/api/tags/{tag}/', first).status_code, 200)
+
+    def test_diploma_validators(self):
+        # Le QR code généré à l'enregistrement atterrit dans un MEDIA_ROOT jetable
+        self.enterContext(self.settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        diploma = self.client.post('/api/diplomas/', {
+            'student_name': 'Awa', 'student_id': 'E1', 'degree_name': 'Licence', 'major': 'Info',
+            'graduation_date': '2026-07-01', 'serial_number': 'DIP-TEST',
+        }, format='json').data
+        url = f"/api/diplomas/{diploma['id']}/"
+        first = self.client.get(url)
+        self.assertIn('Last-Modified', first)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, first).status_code, 304)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        verify = self.client.get('/api/diplomas/DIP-TEST/verify/')
+        self.assertEqual(self.revalidate('/api/diplomas/DIP-TEST/verify/', verify).status_code, 304)
+        listing = self.client.get('/api/diplomas/')
+        self.assertEqual(self.revalidate('/api/diplomas/', listing).status_code, 304)
+
+        self.client.patch(url, {'major': 'Maths'}, format='json')
+        self.assertEqual(self.revalidate(url, first).status_code, 200)
+        self.assertEqual(self.revalidate('/api/diplomas/', listing).status_code, 200)
+
+
+@override_settings(JOB_POLL_INTERVAL=0, QR_CODE_FORMAT='png')
+class QRCodeJobTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(self.settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('henri', password='secret', is_staff=True))
+
+    def create(self, serial_number='DIP-QR'):
+        return self.client.post('/api/diplomas/', {
+            'student_name': 'Awa', 'student_id': serial_number, 'degree_name': 'Licence', 'major': 'Info',
+            'graduation_date': '2026-07-01', 'serial_number': serial_number,
+        }, format='json').data
+
+    def test_png_is_generated_in_background(self):
+        data = self.create()
+        self.assertEqual((data['qr_status'], data['qr_code'], data['qr_url']), ('PENDING', None, None))
+        diploma = Diploma.objects.get()
+        diploma.save()
+        self.assertEqual(Job.objects.filter(kind='qr_code').count(), 1)
+
+        self.assertEqual(run_jobs(), 1)
+        diploma.refresh_from_db()
+        self.assertEqual((diploma.qr_status, diploma.qr_code.name), ('READY', 'qrcodes/qr-DIP-QR.png'))
+        self.assertFalse(Job.objects.exists())
+        self.assertTrue(self.client.get(f'/api/diplomas/{diploma.pk}/').data['qr_url'].endswith('qr-DIP-QR.png'))
+
+    @override_settings(JOB_MAX_ATTEMPTS=2)
+    def test_failure_is_retried_then_reported(self):
+        self.create()
+        with mock.patch('api.qrcodes.render_png', side_effect=OSError('disque plein')), self.assertLogs('api.jobs', 'ERROR'):
+            run_jobs()
+            self.assertEqual(Diploma.objects.get().qr_status, 'PENDING')
+            run_jobs()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+        self.assertEqual(Diploma.objects.get().qr_status, 'FAILED')
+
+        # Un nouvel enregistrement relance la tâche
+        Diploma.objects.get().save()
+        self.assertEqual(run_jobs(), 1)
+        self.assertEqual(Diploma.objects.get().qr_status, 'READY')
+
+    @override_settings(QR_CODE_FORMAT='svg')
+    def test_svg_mode_renders_on_demand(self):
+        data = self.create()
+        self.assertEqual(data['qr_status'], 'READY')
+        self.assertFalse(Job.objects.exists())
+        self.assertTrue(data['qr_url'].endswith(f"/api/diplomas/{data['id']}/qr/"))
+        response = self.client.get(f"/api/diplomas/{data['id']}/qr/")
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'<svg', response.content)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(f"/api/diplomas/{data['id']}/qr/", HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+@override_settings(JOB_POLL_INTERVAL=0, QR_CODE_FORMAT='png', DIPLOMA_IMPORT_WORKERS=0)
+class DiplomaImportTests(APITestCase):
+    ROWS = (
+        'student_name,student_id,degree_name,major,graduation_date,serial_number,is_signed\n'
+        'Awa,E1,Licence,Info,2026-07-01,DIP-A,true\n'
+        'Binta,E2,Master,Maths,2026-07-01,,\n'
+        'Coumba,E1,Licence,Info,2026-07-01,,\n'
+        'Demba,E3,Licence,Info,01/07/2026,,\n'
+        'El,E4,Licence,Info,2026-07-01,DIP-OLD,\n'
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.enterContext(self.settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        Diploma.objects.create(
+            student_name='Ancien', student_id='E0', degree_name='Licence', major='Info',
+            graduation_date='2025-07-01', serial_number='DIP-OLD', qr_code='qrcodes/qr-DIP-OLD.png',
+        )
+
+    def test_command_reports_rejected_rows(self):
+        path = os.path.join(settings.MEDIA_ROOT, 'diplomes.csv')
+        with open(path, 'w') as output:
+            output.write(self.ROWS)
+        report_path = os.path.join(settings.MEDIA_ROOT, 'rapport.json')
+        # Deux contrôles d'unicité, un pour les numéros générés et un INSERT groupé (dans un
+        # SAVEPOINT) pour toute la tranche, dans la transaction de la tranche (SAVEPOINT sous TestCase)
+        with self.assertNumQueries(8):
+            call_command('import_diplomas', path, report=report_path, stdout=StringIO(), stderr=StringIO())
+
+        with open(report_path) as report_file:
+            report = json.load(report_file)
+        self.assertEqual((report['total'], report['created'], report['failed']), (5, 2, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [4, 5, 6])
+        self.assertIn('student_id', report['errors'][0]['errors'])
+        self.assertIn('graduation_date', report['errors'][1]['errors'])
+        self.assertIn('serial_number', report['errors'][2]['errors'])
+
+        awa, binta = Diploma.objects.filter(student_id__in=['E1', 'E2']).order_by('student_id')
+        self.assertEqual((awa.qr_status, awa.qr_code.name), ('READY', 'qrcodes/qr-DIP-A.png'))
+        self.assertEqual(awa.signature_key_id, signing.get_keyring().active_key_id)
+        self.assertTrue(signing.verify(
+            [getattr(awa, field) for field in signing.SIGNED_FIELDS], awa.signature_key_id, awa.signature_data,
+        ))
+        self.assertTrue(binta.serial_number.startswith('DIP-'))
+        self.assertIsNone(binta.signature_data)
+        self.assertFalse(Job.objects.exists())
+
+    def test_endpoint_runs_import_in_background(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('ines', password='secret', is_staff=True))
+        upload = SimpleUploadedFile('diplomes.jsonl', b'\n'.join([
+            json.dumps({'student_name': 'Awa', 'student_id': 'E1', 'degree_name': 'Licence',
+                        'major': 'Info', 'graduation_date': '2026-07-01'}).encode(),
+            b'{pas du json',
+        ]))
+        response = client.post('/api/diplomas/import/', {'file': upload}, format='multipart')
+        self.assertEqual((response.status_code, response.data['status']), (202, 'PENDING'))
+
+        self.assertEqual(run_jobs(), 1)
+        data = client.get(f"/api/diplomas/imports/{response.data['id']}/").data
+        self.assertEqual((data['status'], data['created'], data['failed']), ('DONE', 1, 1))
+        self.assertEqual(data['errors'][0]['row'], 2)
+
+    def test_file_that_is_not_utf8_fails_the_import(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('ines', password='secret', is_staff=True))
+        upload = SimpleUploadedFile('diplomes.csv', self.ROWS.replace('Awa', 'Zoé').encode('latin-1'))
+        response = client.post('/api/diplomas/import/', {'file': upload}, format='multipart')
+        self.assertEqual(run_jobs(), 1)
+        data = client.get(f"/api/diplomas/imports/{response.data['id']}/").data
+        self.assertEqual((data['status'], data['created']), ('FAILED', 0))
+        self.assertEqual(data['errors'], [{'row': 0, 'errors': {'file': ['File is not valid UTF-8.']}}])
+
+    def test_interrupted_import_resumes_after_the_last_chunk(self):
+        saved = []
+
+        def progress(report):
+            # Worker arrêté pendant la deuxième tranche : seule la première est enregistrée
+            if saved:
+                raise RuntimeError('worker arrêté')
+            saved.append(json.loads(json.dumps(report)))
+
+        stream = lambda: io.BytesIO(self.ROWS.encode())
+        with mock.patch('api.imports.render_png', return_value=b'png') as render_png:
+            with self.assertRaises(RuntimeError):
+                imports.import_diplomas(stream(), 'csv', chunk_size=3, workers=0, progress=progress)
+            self.assertEqual(Diploma.objects.count(), 3)
+            report = imports.import_diplomas(stream(), 'csv', chunk_size=3, workers=0, resume=saved[0])
+        self.assertIn(mock.call('DIP-A'), render_png.call_args_list)
+        self.assertEqual((report['total'], report['created'], report['failed']), (5, 2, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [4, 5, 6])
+        self.assertEqual(Diploma.objects.count(), 3)
+
+    def test_generated_serial_collisions_are_redrawn(self):
+        rows = (
+            'student_name,student_id,degree_name,major,graduation_date,serial_number,is_signed\n'
+            'Awa,E1,Licence,Info,2026-07-01,,\n'
+            'Binta,E2,Licence,Info,2026-07-01,,\n'
+            'Coumba,E3,Licence,Info,2026-07-01,DIP-X,\n'
+        )
+        # Tirages déjà pris en base (DIP-OLD), dans le fichier (DIP-X) puis par la ligne précédente
+        serials = ['DIP-OLD', 'DIP-X', 'DIP-N1', 'DIP-N1', 'DIP-N2']
+        with mock.patch.object(Diploma, 'new_serial_number', side_effect=serials), \
+                mock.patch('api.imports.render_png', return_value=b'png'):
+            report = imports.import_diplomas(io.BytesIO(rows.encode()), 'csv', workers=0)
+        self.assertEqual((report['created'], report['failed']), (3, 0))
+        self.assertEqual(
+            dict(Diploma.objects.filter(student_id__in=['E1', 'E2', 'E3']).values_list('student_id', 'serial_number')),
+            {'E1': 'DIP-N1', 'E2': 'DIP-N2', 'E3': 'DIP-X'},
+        )
+
+
+@override_settings(JOB_POLL_INTERVAL=0, QR_CODE_FORMAT='svg')
+class VerificationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        for serial, signed in (('DIP-OK', True), ('DIP-DRAFT', False)):
+            Diploma.objects.create(
+                student_name='Awa', student_id=serial, degree_name='Licence', major='Info',
+                graduation_date='2026-07-01', serial_number=serial, is_signed=signed,
+            )
+
+    def test_single_verification(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/diplomas/DIP-OK/verify/')
+        diploma = Diploma.objects.get(serial_number='DIP-OK')
+        self.assertEqual(response.data, {
+            'serial_number': 'DIP-OK', 'status': 'VALID', 'valid': True, 'is_signed': True,
+            'student_name': 'Awa', 'degree_name': 'Licence', 'major': 'Info', 'graduation_date': '2026-07-01',
+            'key_id': diploma.signature_key_id, 'signature': diploma.signature_data,
+        })
+        with self.assertNumQueries(0):
+            self.client.get('/api/diplomas/DIP-OK/verify/')
+        self.assertEqual(self.client.get('/api/diplomas/DIP-DRAFT/verify/').data['status'], 'UNSIGNED')
+        self.assertEqual(self.client.get('/api/diplomas/DIP-NOPE/verify/').status_code, 404)
+
+    def test_tampered_signature_is_rejected(self):
+        Diploma.objects.filter(serial_number='DIP-OK').update(signature_data='0' * 64)
+        response = self.client.get('/api/diplomas/DIP-OK/verify/')
+        self.assertEqual((response.data['status'], response.data['valid']), ('INVALID_SIGNATURE', False))
+
+    def test_writes_clear_cached_results(self):
+        self.assertEqual(self.client.get('/api/diplomas/DIP-NEW/verify/').status_code, 404)
+        self.client.force_authenticate(User.objects.create_user('jules', password='secret', is_staff=True))
+        self.client.post('/api/diplomas/', {
+            'student_name': 'Binta', 'student_id': 'E9', 'degree_name': 'Master', 'major': 'Maths',
+            'graduation_date': '2026-07-01', 'serial_number': 'DIP-NEW', 'is_signed': True,
+        }, format='json')
+        self.assertEqual(self.client.get('/api/diplomas/DIP-NEW/verify/').data['status'], 'VALID')
+
+    @override_settings(DIPLOMA_VERIFY_BATCH_SIZE=3)
+    def test_batch_verification(self):
+        with self.assertNumQueries(1):
+            response = self.client.post('/api/diplomas/verify/', {'serials': ['DIP-NOPE', 'DIP-OK', 'DIP-DRAFT']}, format='json')
+        self.assertEqual([result['status'] for result in response.data['results']], ['NOT_FOUND', 'VALID', 'UNSIGNED'])
+        with self.assertNumQueries(0):
+            self.client.post('/api/diplomas/verify/', {'serials': ['DIP-OK']}, format='json')
+
+        too_many = self.client.post('/api/diplomas/verify/', {'serials': ['A', 'B', 'C', 'D']}, format='json')
+        self.assertEqual(too_many.status_code, 400)
+        self.assertEqual(self.client.post('/api/diplomas/verify/', {'serials': 'DIP-OK'}, format='json').status_code, 400)
+
+
+def signing_key(key_id, byte):
+    return f'{key_id}:{signing.b64encode(bytes([byte]) * 32)}'
+
+
+@override_settings(JOB_POLL_INTERVAL=0, QR_CODE_FORMAT='svg', DIPLOMA_SIGNING_KEYS=signing_key('k1', 1))
+class SigningTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.diploma = Diploma.objects.create(
+            student_name='Awa', student_id='E1', degree_name='Licence', major='Info',
+            graduation_date='2026-07-01', serial_number='DIP-1', is_signed=True,
+        )
+
+    def values(self, diploma):
+        return [getattr(diploma, field) for field in signing.SIGNED_FIELDS]
+
+    def test_signature_covers_every_signed_field(self):
+        self.assertEqual(self.diploma.signature_key_id, 'k1')
+        values = self.values(self.diploma)
+        self.assertTrue(signing.verify(values, 'k1', self.diploma.signature_data))
+        self.assertFalse(signing.verify([*values[:2], 'Binta', *values[3:]], 'k1', self.diploma.signature_data))
+        self.assertFalse(signing.verify(values, 'inconnue', self.diploma.signature_data))
+        self.assertFalse(signing.verify(values, 'k1', 'pas-une-signature'))
+
+    def test_offline_verification_with_published_key(self):
+        from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+        result = self.client.get('/api/diplomas/DIP-1/verify/').data
+        keys = self.client.get('/api/diplomas/keys/').data
+        self.assertEqual(keys['active'], 'k1')
+        jwk, = keys['keys']
+        public_key = Ed25519PublicKey.from_public_bytes(signing.b64decode(jwk['x']))
+        message = json.dumps([keys['payload']['version'], 'DIP-1', 'E1', 'Awa', 'Licence', 'Info', '2026-07-01'],
+                             separators=(',', ':')).encode()
+        public_key.verify(signing.b64decode(result['signature']), message)
+
+    def test_legacy_signatures_verify_until_resigned(self):
+        legacy = signing.legacy_signature('DIP-1', 'E1', '2026-07-01')
+        Diploma.objects.filter(pk=self.diploma.pk).update(signature_key_id='', signature_data=legacy)
+        response = self.client.get('/api/diplomas/DIP-1/verify/')
+        self.assertEqual(response.data['status'], 'VALID')
+        self.assertNotIn('signature', response.data)
+
+        with self.settings(DIPLOMA_SIGNING_KEYS=f"{signing_key('k1', 1)},{signing_key('k2', 2)}"):
+            call_command('resign_diplomas', workers=0, stdout=StringIO())
+            diploma = Diploma.objects.get(pk=self.diploma.pk)
+            self.assertEqual(diploma.signature_key_id, 'k2')
+            self.assertEqual(self.client.get('/api/diplomas/DIP-1/verify/').data['key_id'], 'k2')
+            # L'ancienne clé reste connue : ses signatures restent vérifiables
+            self.assertTrue(signing.verify(self.values(diploma), 'k1', self.diploma.signature_data))
+
+    def test_save_keeps_a_current_signature(self):
+        signature = self.diploma.signature_data
+        self.diploma.save()
+        self.assertEqual(self.diploma.signature_data, signature)
+        self.diploma.student_name = 'Awa Diop'
+        self.diploma.save()
+        self.assertNotEqual(self.diploma.signature_data, signature)
+        self.assertTrue(signing.verify(self.values(self.diploma), 'k1', self.diploma.signature_data))
+
+
+class QueryPlanTests(TestCase):
+    """Les requêtes des chemins chauds doivent rester servies par un index (EXPLAIN)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('plan', password='secret')
+        questions = Question.objects.bulk_create([
+            Question(author=cls.user, title=f'Question {i}', description='D', votes=i % 7) for i in range(300)
+        ])
+        answers = Answer.objects.bulk_create([
+            Answer(author=cls.user, question=questions[i % 300], content='R') for i in range(600)
+        ])
+        Vote.objects.create(user=cls.user, question=questions[0], value=1)
+        Vote.objects.create(user=cls.user, answer=answers[0], value=1)
+        cls.question, cls.answer = questions[150], answers[0]
+        feeds.rebuild()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # Tables minuscules : sans cela le planificateur préfère toujours un parcours séquentiel
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan)
+            self.assertNotIn('Sort', plan)
+        else:
+            # SQLite : « SCAN table » sans index, « USE TEMP B-TREE » pour un tri hors index
+            self.assertNotRegex(plan, r'(?m)SCAN \w+$')
+            self.assertNotIn('TEMP B-TREE', plan)
+        return plan
+
+    def keyset(self, queryset, ordering, value, pk):
+        paginator = KeysetPagination()
+        paginator.field, paginator.descending = ordering.lstrip('-'), ordering.startswith('-')
+        return queryset.filter(paginator.get_cursor_filter(value, pk)).order_by(ordering, '-pk')[:21]
+
+    def test_question_lists(self):
+        question = self.question
+        for ordering, value in (('-created_at', question.created_at), ('-votes', question.votes)):
+            with self.subTest(ordering=ordering):
+                self.assertUsesIndex(Question.objects.order_by(ordering, '-pk')[:21])
+                self.assertUsesIndex(self.keyset(Question.objects.all(), ordering, value, question.pk))
+
+    def test_diploma_list(self):
+        self.assertUsesIndex(Diploma.objects.order_by('-issue_date', '-pk')[:21])
+
+    def test_feed_pages(self):
+        # Requête de la vue : FeedRank parcouru dans l'ordre de son index, questions par clé primaire
+        rank = FeedRank.objects.filter(feed='hot', question=self.question).get()
+        view = mock.Mock(get_cursor_pk_field=lambda: feeds.QUESTION_FIELD)
+        for feed in ('hot', 'week', 'unanswered'):
+            with self.subTest(feed=feed):
+                request = mock.Mock(query_params={'feed': feed})
+                queryset = feeds.QuestionFeedFilter().filter_queryset(request, Question.objects.all(), view)
+                paginator = KeysetPagination()
+                paginator.field, paginator.descending = feeds.SCORE_FIELD, True
+                paginator.pk_field = paginator.get_pk_field(view)
+                ordering = (f'-{feeds.SCORE_FIELD}', f'-{feeds.QUESTION_FIELD}')
+                self.assertIn('api_feedrank_score_idx', self.assertUsesIndex(queryset.order_by(*ordering)[:21]))
+                self.assertUsesIndex(queryset.filter(paginator.get_cursor_filter(rank.score, rank.question_id)).order_by(*ordering)[:21])
+
+    def test_tag_filter(self):
+        # Questions du tag lues sur l'index (tag_id, question_id), pas de parcours de api_question
+        tag = Tag.objects.create(name='plan', slug='plan')
+        self.question.tags.add(tag)
+        # Un autre tag très répandu : l'index (tag_id, question_id) devient le seul choix sélectif
+        other = Tag.objects.create(name='autre', slug='autre')
+        other.questions.add(*Question.objects.all())
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        plan = search.filter_tags(Question.objects.order_by('-created_at', '-pk'), ['plan'])[:21].explain()
+        # PostgreSQL peut préférer l'index de la clé étrangère tag_id : même lecture par tag
+        self.assertRegex(plan, r'api_question_tags_tag_(question_idx|id_)')
+        if connection.vendor == 'sqlite':
+            self.assertNotRegex(plan, r'(?m)SCAN \w+$')
+
+    def test_leaderboard(self):
+        users = User.objects.bulk_create([User(username=f'rank{i}') for i in range(50)])
+        reputation.recompute([self.user.pk, *(user.pk for user in users)])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertIn('api_userstats_rank_idx', self.assertUsesIndex(reputation.ranking()[:20]))
+
+    def test_best_answer_lookup(self):
+        self.assertIn('unique_best_answer', self.assertUsesIndex(
+            Answer.objects.filter(question=self.question, is_best_answer=True)
+        ))
+
+    def test_vote_lookups(self):
+        self.assertUsesIndex(Vote.objects.filter(user=self.user, question=self.question, answer__isnull=True))
+        self.assertUsesIndex(Vote.objects.filter(user=self.user, answer=self.answer, question__isnull=True))
+
+    def test_only_one_best_answer_per_question(self):
+        first, second = self.question.answers.all()[:2]
+        Answer.objects.filter(pk=first.pk).update(is_best_answer=True)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Answer.objects.filter(pk=second.pk).update(is_best_answer=True)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.post(f'/api/answers/{second.pk}/mark_best/').status_code, 200)
+        self.assertEqual(list(self.question.answers.filter(is_best_answer=True).values_list('pk', flat=True)), [second.pk])
+
+
+@override_settings(JOB_POLL_INTERVAL=0)
+class BenchmarkTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        call_command(
+            'seed_data', users=5, tags=4, questions=20, answers=2, comments=1, votes=2, diplomas=10,
+            stdout=StringIO(),
+        )
+        self.output = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'bench.json')
+
+    def test_seed_is_reproducible(self):
+        titles = list(Question.objects.order_by('pk').values_list('title', flat=True))
+        self.assertEqual(len(titles), 20)
+        self.assertLessEqual(Answer.objects.filter(is_best_answer=True).count(), 20)
+        with self.assertRaises(CommandError):
+            call_command('seed_data', questions=1, stdout=StringIO())
+        call_command('seed_data', reset=True, users=5, tags=4, questions=20, answers=2, comments=1, votes=2,
+                     diplomas=10, stdout=StringIO())
+        self.assertEqual(list(Question.objects.order_by('pk').values_list('title', flat=True)), titles)
+
+    def test_report_and_baseline(self):
+        call_command('bench_api', requests=5, warmup=1, writes=True, output=self.output, stderr=StringIO())
+        with open(self.output) as output_file:
+            report = json.load(output_file)
+        self.assertEqual(report['meta']['dataset']['questions'], 20)
+        detail = report['scenarios']['question_detail']
+        self.assertEqual((detail['requests'], detail['errors']), (5, 0))
+        self.assertLessEqual(detail['p50_ms'], detail['p99_ms'])
+        self.assertEqual(report['scenarios']['question_vote']['errors'], 0)
+
+        for result in report['scenarios'].values():
+            result['p95_ms'], result['max_queries'] = 1e9, 0
+        baseline = os.path.join(os.path.dirname(self.output), 'baseline.json')
+        with open(baseline, 'w') as baseline_file:
+            json.dump(report, baseline_file)
+        with self.assertRaisesMessage(CommandError, 'question_detail'):
+            call_command('bench_api', requests=5, scenarios='question_detail', baseline=baseline,
+                         output=self.output, stderr=StringIO())
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user('mia', password='secret')
+        Question.objects.create(author=self.user, title='Mesurer une requête', description='D')
+
+    def test_request_metrics_are_exposed(self):
+        self.client.get('/api/questions/')
+        self.client.get('/api/questions/')
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('api_requests_total{method="GET",status="200",view="question-list"} 2', body)
+        self.assertIn('api_db_queries_count{view="question-list"} 2', body)
+        self.assertIn('api_cache_requests_total{result="hit",view="question-list"} 1', body)
+        self.assertIn('api_cache_requests_total{result="miss",view="question-list"} 1', body)
+        self.assertIn('api_response_size_bytes_bucket{view="question-list",le="+Inf"} 2', body)
+
+        histograms = {
+            name: total for name, labels, _, total, _ in metrics.registry.snapshot()['histograms']
+            if labels == [('view', 'question-list')]
+        }
+        self.assertGreater(histograms['api_serialization_duration_seconds'], 0)
+        self.assertGreater(histograms['api_db_duration_seconds'], 0)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=1e-6)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs('api.metrics', 'WARNING') as logs:
+            self.client.get('/api/questions/')
+        record = logs.records[0].slow_request
+        self.assertEqual((record['view'], record['status']), ('question-list', 200))
+        self.assertGreaterEqual(record['db_queries'], 1)
+        self.assertTrue(any('api_question' in query['sql'] for query in record['slowest_queries']))
+
+    def test_snapshots_of_other_workers_are_summed(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        other = metrics.Registry()
+        other.inc('api_requests_total', (('method', 'GET'), ('status', '200'), ('view', 'question-list')), 3)
+        with open(os.path.join(directory, 'metrics-1-autre.json'), 'w') as snapshot_file:
+            json.dump(other.snapshot(), snapshot_file)
+
+        with self.settings(METRICS_DIR=directory, METRICS_TOKEN='jeton'):
+            self.client.get('/api/questions/')
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            body = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer jeton').content.decode()
+        self.assertIn('api_requests_total{method="GET",status="200",view="question-list"} 4', body)
+        self.assertEqual(len(os.listdir(directory)), 2)
+
+
+# URLconf de AsyncViewTests : vues asynchrones devant les routes habituelles, comme avec ASYNC_VIEWS
+urlpatterns = [
+    path('api/', include(async_views.urlpatterns(api_urls.router))),
+    path('', include('config.urls')),
+]
+
+
+class AsyncViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('noe', password='secret')
+        tag = Tag.objects.create(name='asgi', slug='asgi')
+        for i in range(3):
+            question = Question.objects.create(author=self.user, title=f'Question {i}', description='D', votes=i)
+            question.tags.add(tag)
+            Answer.objects.create(author=self.user, question=question, content='R')
+        self.question = question
+        Diploma.objects.create(
+            student_name='Awa', student_id='DIP-1', degree_name='Licence', major='Info',
+            graduation_date='2026-07-01', serial_number='DIP-1', is_signed=True,
+        )
+
+    def get_async(self, path, headers=None):
+        # Client ASGI : toute requête SQL synchrone dans la boucle lèverait SynchronousOnlyOperation
+        with self.settings(ROOT_URLCONF='api.tests'):
+            return async_to_sync(AsyncClient().get)(path, headers=headers)
+
+    def test_async_reads_match_the_viewsets(self):
+        paths = [
+            '/api/questions/', '/api/questions/?ordering=votes&page_size=2', '/api/questions/?tag=asgi',
+            f'/api/questions/{self.question.pk}/', '/api/tags/', '/api/diplomas/DIP-1/verify/',
+            '/api/diplomas/INCONNU/verify/', '/api/questions/999999/', '/api/questions/?cursor=abc',
+            '/api/questions/?body_format=html', f'/api/questions/{self.question.pk}/?body_format=html',
+            '/api/questions/?body_format=rtf',
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                cache.clear()
+                asynchronous = self.get_async(path)
+                synchronous = self.client.get(path)
+                self.assertEqual(asynchronous.status_code, synchronous.status_code)
+                self.assertEqual(asynchronous.content, synchronous.content)
+                for header in ('Content-Type', 'ETag', 'Allow', 'Vary', 'Cache-Control'):
+                    self.assertEqual(asynchronous.get(header), synchronous.get(header), header)
+                if asynchronous.get('X-Cache') == 'MISS':
+                    # Mêmes entrées de cache : la vue synchrone relit celle écrite par la vue asynchrone
+                    self.assertEqual(synchronous['X-Cache'], 'HIT')
+
+        etag = self.get_async('/api/questions/')['ETag']
+        self.assertEqual(self.get_async('/api/questions/', {'If-None-Match': etag}).status_code, 304)
+
+    def test_other_requests_fall_back_to_the_viewsets(self):
+        authorization = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        with self.settings(ROOT_URLCONF='api.tests'):
+            client = AsyncClient()
+            created = async_to_sync(client.post)(
+                '/api/questions/', {'title': 'Nouvelle', 'description': 'D'},
+                content_type='application/json', headers=authorization,
+            )
+            self.assertEqual(created.status_code, 201)
+        self.assertEqual(self.get_async('/api/questions/', {'Authorization': 'Bearer faux'}).status_code, 401)
+        self.assertEqual(self.get_async('/api/questions/', authorization).json()['results'][0]['title'], 'Nouvelle')
+        self.assertIn('text/html', self.get_async('/api/tags/', {'Accept': 'text/html'})['Content-Type'])
+        self.assertEqual(self.get_async('/api/questions/?search=Nouvelle').json()['results'][0]['title'], 'Nouvelle')
+
+    def test_admin_sessions_work_under_asgi(self):
+        # Session, CSRF et messages : middlewares de Django dans une chaîne asynchrone
+        User.objects.create_superuser('admin', password='secret')
+        client = AsyncClient(enforce_csrf_checks=True)
+        login = async_to_sync(client.get)('/admin/login/')
+        response = async_to_sync(client.post)('/admin/login/', {
+            'username': 'admin', 'password': 'secret', 'next': '/admin/',
+            'csrfmiddlewaretoken': login.cookies['csrftoken'].value,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(async_to_sync(client.get)('/admin/').status_code, 200)
+
+    def test_security_middleware_in_deploy_checks(self):
+        # `check --deploy` reconnaît les middlewares de sécurité de Django par leur chemin exact
+        messages = checks.run_checks(include_deployment_checks=True)
+        missing = {'security.W001', 'security.W002', 'security.W003'}
+        self.assertEqual([message.id for message in messages if message.id in missing], [])
+
+    def test_security_headers_under_asgi(self):
+        response = self.get_async('/api/tags/')
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        self.assertEqual(response['Referrer-Policy'], 'same-origin')
+        client = AsyncClient(enforce_csrf_checks=True)
+        User.objects.create_superuser('admin', password='secret')
+        login = async_to_sync(client.post)('/admin/login/', {'username': 'admin', 'password': 'secret'})
+        self.assertEqual(login.status_code, 403)
+
+    def test_async_requests_are_measured(self):
+        metrics.registry.reset()
+        self.get_async(f'/api/questions/{self.question.pk}/')
+        histograms = {
+            name: (total, count) for name, labels, _, total, count in metrics.registry.snapshot()['histograms']
+            if labels == [('view', 'question-detail')]
+        }
+        # Requêtes SQL exécutées dans les threads de sync_to_async, rattachées à la requête HTTP
+        self.assertGreaterEqual(histograms['api_db_queries'], (4, 1))
+        self.assertGreater(histograms['api_serialization_duration_seconds'][0], 0)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRoutingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.alice = User.objects.create_user('alice', password='secret')
+        self.bob = User.objects.create_user('bob', password='secret')
+        self.question = Question.objects.create(author=self.alice, title='Réplicas', description='D')
+        self.answer = Answer.objects.create(author=self.bob, question=self.question, content='R')
+        Diploma.objects.create(
+            student_name='Awa', student_id='DIP-1', degree_name='Licence', major='Info',
+            graduation_date='2026-07-01', serial_number='DIP-1', is_signed=True,
+        )
+        # Alias choisis par le routeur ; les requêtes restent sur la base de test
+        self.reads = []
+        route = replicas.ReplicaRouter.db_for_read
+
+        def db_for_read(router, model, **hints):
+            self.reads.append(route(router, model, **hints))
+
+        patcher = mock.patch.object(replicas.ReplicaRouter, 'db_for_read', db_for_read)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def routed(self, method, path, user=None, data=None):
+        self.client.force_authenticate(user)
+        self.reads.clear()
+        response = getattr(self.client, method)(path, data, format='json')
+        self.assertLess(response.status_code, 400, path)
+        return set(self.reads)
+
+    def assertReplica(self, reads):
+        self.assertTrue(reads)
+        self.assertLessEqual(reads, {'replica_1', 'replica_2'})
+
+    def test_read_actions_go_to_replicas(self):
+        paths = [
+            '/api/questions/', f'/api/questions/{self.question.pk}/', '/api/tags/', '/api/answers/',
+            f'/api/answers/{self.answer.pk}/', '/api/comments/', '/api/diplomas/DIP-1/verify/',
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                cache.clear()
+                self.assertReplica(self.routed('get', path))
+        cache.clear()
+        self.assertReplica(self.routed('post', '/api/diplomas/verify/', data={'serials': ['DIP-1']}))
+        # Hors d'une action de lecture : primaire
+        self.assertEqual(self.routed('post', f'/api/answers/{self.answer.pk}/vote/', self.alice, {'value': 1}), {None})
+        self.assertIsNone(replicas._read_alias.get())
+        self.assertFalse(replicas.ReplicaRouter().allow_migrate('replica_1', 'api'))
+
+        cache.clear()
+        self.reads.clear()
+        with self.settings(ROOT_URLCONF='api.tests'):
+            self.assertEqual(async_to_sync(AsyncClient().get)('/api/questions/').status_code, 200)
+        self.assertReplica(set(self.reads))
+        self.assertIsNone(replicas._read_alias.get())
+
+    def test_writers_read_their_own_writes(self):
+        self.routed('post', f'/api/answers/{self.answer.pk}/vote/', self.alice, {'value': 1})
+        self.assertEqual(self.routed('get', '/api/answers/', self.alice), {None})
+        self.assertReplica(self.routed('get', '/api/answers/', self.bob))
+        # Espace de cache invalidé par le vote : primaire pour tous le temps du rattrapage
+        self.assertEqual(self.routed('get', '/api/questions/'), {None})
+        cache.delete(written_key('questions'))
+        self.assertReplica(self.routed('get', '/api/questions/?page_size=1'))
+        self.assertEqual(self.routed('get', '/api/questions/?page_size=2', self.alice), {None})
+
+        with self.settings(REPLICA_STICKY_SECONDS=0):
+            self.routed('post', '/api/questions/', self.bob, {'title': 'Nouvelle', 'description': 'D'})
+        cache.delete(written_key('questions'))
+        self.assertReplica(self.routed('get', '/api/questions/', self.bob))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_the_primary(self):
+        self.assertEqual(self.routed('get', '/api/questions/'), {None})
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "DATABASE_REPLICA_URLS non défini")
+class ReplicaDatabaseTests(TransactionTestCase):
+    # Avec de vrais alias, par exemple deux fichiers SQLite, miroirs de la base de test :
+    # DATABASE_REPLICA_URLS=sqlite:////tmp/r1.sqlite3,sqlite:////tmp/r2.sqlite3 manage.py test api.tests.ReplicaDatabaseTests
+    databases = {'default', *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user('alice', password='secret')
+        Question.objects.create(author=self.user, title='Réplicas', description='D')
+
+    def count_queries(self, path):
+        with ExitStack() as stack:
+            queries = {alias: stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in self.databases}
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        on_replicas = sum(len(queries[alias]) for alias in settings.DATABASE_REPLICAS)
+        return len(queries['default']), on_replicas, response
+
+    def test_reads_run_on_replicas_until_a_write(self):
+        primary, replica, response = self.count_queries('/api/questions/')
+        self.assertEqual((primary, response.json()['results'][0]['title']), (0, 'Réplicas'))
+        self.assertGreater(replica, 0)
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post('/api/questions/', {'title': 'Nouvelle', 'description': 'D'}).status_code, 201)
+        primary, replica, response = self.count_queries('/api/questions/?page_size=5')
+        self.assertEqual(replica, 0)
+        self.assertEqual(response.json()['results'][0]['title'], 'Nouvelle')
+
+
+
+class MarkdownRenderingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('lina', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def create_question(self):
+        response = self.client.post('/api/questions/', {
+            'title': 'Markdown', 'description': '**Gras** et [lien](javascript:alert(1)) <script>alert(1)</script>',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        question = Question.objects.get(pk=response.json()['id'])
+        Answer.objects.create(author=self.user, question=question, content='| a |\n|---|\n| `b` |')
+        return question
+
+    def test_markdown_is_rendered_and_sanitized_on_write(self):
+        question = self.create_question()
+        self.assertEqual(question.render_version, markup.RENDERER_VERSION)
+        self.assertIn('<strong>Gras</strong>', question.description_html)
+        self.assertNotIn('<script>', question.description_html)
+        self.assertNotIn('href="javascript', question.description_html)
+        self.assertEqual(question.excerpt, 'Gras et [lien](javascript:alert(1)) <script>alert(1)</script>')
+        self.assertIn('<td><code>b</code></td>', question.answers.get().content_html)
+
+    def test_body_format(self):
+        question = self.create_question()
+        listed = self.client.get('/api/questions/').json()['results'][0]
+        self.assertIn('description', listed)
+        self.assertNotIn('excerpt', listed)
+        # Liste en HTML : extrait en texte brut, sans le corps
+        with self.assertNumQueries(2):
+            listed = self.client.get('/api/questions/?body_format=html').json()['results'][0]
+        self.assertEqual(listed['excerpt'], question.excerpt)
+        self.assertNotIn('description', listed)
+
+        detail = self.client.get(f'/api/questions/{question.pk}/?body_format=html').json()
+        self.assertEqual(detail['description_html'], question.description_html)
+        self.assertNotIn('description', detail)
+        self.assertIn('content_html', detail['answers'][0])
+        self.assertNotIn('content', detail['answers'][0])
+        self.assertNotIn('description_html', self.client.get(f'/api/questions/{question.pk}/').json())
+        self.assertEqual(self.client.get('/api/questions/?body_format=rtf').status_code, 400)
+
+    def test_stale_rows_are_rendered_on_read_then_in_bulk(self):
+        question = self.create_question()
+        rendered, updated_at = question.description_html, question.updated_at
+        Question.objects.filter(pk=question.pk).update(description_html='', excerpt='', render_version=0)
+        path = f'/api/questions/{question.pk}/?body_format=html'
+        self.assertEqual(self.client.get(path).json()['description_html'], rendered)
+
+        call_command('render_markdown', stdout=StringIO())
+        question.refresh_from_db()
+        self.assertEqual((question.description_html, question.render_version), (rendered, markup.RENDERER_VERSION))
+        self.assertEqual(question.updated_at, updated_at)
+        # Entrées de cache de l'ancien rendu invalidées
+        self.assertEqual(self.client.get(path)['X-Cache'], 'MISS')
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.staff = User.objects.create_user('ines', password='secret', role='STAFF')
+        self.client.force_authenticate(self.staff)
+        tag = Tag.objects.create(name='export', slug='export')
+        self.questions = []
+        for i in range(5):
+            question = Question.objects.create(author=self.staff, title=f'Question {i}', description='D')
+            question.tags.add(tag)
+            answer = Answer.objects.create(author=self.staff, question=question, content='R')
+            Comment.objects.create(author=self.staff, answer=answer, content='C')
+            Comment.objects.create(author=self.staff, question=question, content='C')
+            Vote.objects.create(user=self.staff, question=question, value=1)
+            Vote.objects.create(user=self.staff, answer=answer, value=-1)
+            self.questions.append(question)
+        Diploma.objects.create(
+            student_name='Awa', student_id='DIP-1', degree_name='Licence', major='Info',
+            graduation_date='2026-07-01', serial_number='DIP-1', is_signed=True,
+        )
+
+    def read(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+            lines = b''.join(response.streaming_content).splitlines() if response.streaming else []
+        return response, [json.loads(line) for line in lines], len(queries)
+
+    def test_questions_are_streamed_with_nested_content(self):
+        response, records, _ = self.read('/api/questions/export/')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('X-Export-Watermark', response)
+        self.assertEqual([record['id'] for record in records], [question.pk for question in self.questions])
+        answer = records[0]['answers'][0]
+        self.assertEqual(records[0]['tags'], ['export'])
+        self.assertEqual(records[0]['votes_cast'], [{'user': self.staff.pk, 'value': 1}])
+        self.assertEqual(len(records[0]['comments']), 1)
+        self.assertEqual((answer['votes_cast'][0]['value'], len(answer['comments'])), (-1, 1))
+
+        # Requêtes par lot, pas par question : le curseur, puis 6 préchargements par lot
+        for chunk_size, batches in ((500, 1), (2, 3)):
+            with self.assertNumQueries(1 + 6 * batches):
+                self.assertEqual(len(list(export.questions(chunk_size=chunk_size))), 5)
+
+    def test_streamed_asynchronously_under_asgi(self):
+        # Itérateur asynchrone : sous ASGI, Django lirait un itérateur synchrone en entier
+        async def read():
+            response = await AsyncClient().get(
+                '/api/questions/export/', headers={'Authorization': f'Bearer {AccessToken.for_user(self.staff)}'},
+            )
+            return [json.loads(line) for line in b''.join([part async for part in response.streaming_content]).splitlines()]
+
+        self.assertEqual(async_to_sync(read)(), self.read('/api/questions/export/')[1])
+
+    def test_incremental_export_since_watermark(self):
+        long_ago = timezone.now() - timedelta(hours=1)
+        for model in (Question, Answer, Comment, Diploma):
+            model.objects.update(updated_at=long_ago)
+        since = (long_ago + timedelta(minutes=30)).isoformat()
+        self.assertEqual(self.read(f'/api/questions/export/?since={quote(since)}')[1], [])
+
+        # Un commentaire modifié sous une réponse ramène sa question
+        comment = Comment.objects.filter(answer__question=self.questions[2]).get()
+        comment.content = 'Modifié'
+        comment.save()
+        records = self.read(f'/api/questions/export/?since={quote(since)}')[1]
+        self.assertEqual([record['id'] for record in records], [self.questions[2].pk])
+        self.assertEqual(records[0]['answers'][0]['comments'][0]['content'], 'Modifié')
+        self.assertEqual(self.client.get('/api/questions/export/?since=hier').status_code, 400)
+
+    def test_diplomas_and_permissions(self):
+        response, records, _ = self.read('/api/diplomas/export/')
+        self.assertEqual([record['serial_number'] for record in records], ['DIP-1'])
+        self.assertTrue(records[0]['signature_data'])
+
+        output = StringIO()
+        call_command('export_data', 'diplomas', stdout=output, stderr=StringIO())
+        self.assertEqual([json.loads(line) for line in output.getvalue().splitlines()], records)
+
+        self.client.force_authenticate(User.objects.create_user('eve', password='secret'))
+        self.assertEqual(self.client.get('/api/questions/export/').status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/diplomas/export/').status_code, 401)
+
+
+class FeedTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user('omar', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def ask(self, title, days=0):
+        question_id = self.client.post('/api/questions/', {'title': title, 'description': 'D'}, format='json').data['id']
+        if days:
+            Question.objects.filter(pk=question_id).update(created_at=timezone.now() - timedelta(days=days))
+            feeds.refresh([question_id])
+        return question_id
+
+    def feed(self, name, **params):
+        response = self.client.get('/api/questions/', {'feed': name, 'fields': 'title', **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']], response.data['next']
+
+    def ranks(self):
+        return set(FeedRank.objects.values_list('feed', 'question_id', 'score'))
+
+    def test_tampered_feed_cursor(self):
+        self.ask('Nouvelle')
+        for value in ({'score': 1}, ['1'], 'abc', None):
+            with self.subTest(value=value):
+                response = self.client.get('/api/questions/', {'feed': 'hot', 'cursor': raw_cursor(value, 1, '-feed_score')})
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.feed('hot', cursor=raw_cursor(1e9, 10 ** 9, '-feed_score'))[0], [Question.objects.get().pk])
+
+    def test_feeds_follow_votes_answers_and_best_answer(self):
+        old, recent, fresh = self.ask('Ancienne', days=20), self.ask('Récente', days=2), self.ask('Nouvelle')
+        self.assertEqual(self.feed('hot')[0], [fresh, recent, old])
+        self.assertEqual(self.feed('week')[0], [fresh, recent])
+        self.assertEqual(self.feed('month')[0], [fresh, recent, old])
+        self.assertEqual(self.feed('unanswered')[0], [fresh, recent, old])
+
+        # Votes et réponses relèvent la question dans week ; une réponse la retire de unanswered
+        other = User.objects.create_user('zoe', password='secret')
+        self.client.post(f'/api/questions/{recent}/vote/', {'value': 1}, format='json')
+        answer_id = self.client.post('/api/answers/', {'question': recent, 'content': 'R'}, format='json').data['id']
+        self.client.force_authenticate(other)
+        self.client.post(f'/api/questions/{recent}/vote/', {'value': 1}, format='json')
+        self.assertEqual(self.feed('week')[0], [recent, fresh])
+        self.assertEqual(self.feed('unanswered')[0], [fresh, old])
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post(f'/api/answers/{answer_id}/mark_best/').status_code, 200)
+        self.assertNotIn(recent, self.feed('unaccepted')[0])
+        self.client.delete(f'/api/answers/{answer_id}/')
+        self.assertIn(recent, self.feed('unanswered')[0])
+
+        # Le recalcul complet retrouve l'état tenu incrémentalement
+        incremental = self.ranks()
+        FeedRank.objects.all().delete()
+        call_command('recompute_feeds', stdout=StringIO())
+        self.assertEqual(self.ranks(), incremental)
+
+    def test_pages_and_errors(self):
+        ids = [self.ask(f'Question {i}') for i in range(5)]
+        first, following = self.feed('hot', page_size=3)
+        self.assertEqual(first, ids[::-1][:3])
+        self.assertEqual([item['id'] for item in self.client.get(following).data['results']], ids[::-1][3:])
+        # Sortie de fenêtre : ignorée à la lecture, supprimée par le recalcul
+        Question.objects.filter(pk=ids[0]).update(created_at=timezone.now() - timedelta(days=8))
+        FeedRank.objects.filter(question=ids[0]).update(created_at=timezone.now() - timedelta(days=8))
+        self.assertNotIn(ids[0], self.feed('week')[0])
+        call_command('recompute_feeds', stdout=StringIO())
+        self.assertFalse(FeedRank.objects.filter(feed='week', question=ids[0]).exists())
+        self.assertEqual(self.client.get('/api/questions/?feed=trending').status_code, 400)
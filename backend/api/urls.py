@@ -1,12 +1,14 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from . import async_views
 from .views import (
     UserViewSet, AuthViewSet, TagViewSet, QuestionViewSet, 
-    AnswerViewSet, CommentViewSet, DiplomaViewSet
+    AnswerViewSet, CommentViewSet, DiplomaViewSet, cache_stats_view, dashboard_stats_view
 )
 
 router = DefaultRouter()
@@ -19,7 +21,13 @@ router.register(r'diplomas', DiplomaViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('cache/stats/', cache_stats_view, name='cache-stats'),
+    path('dashboard/stats/', dashboard_stats_view, name='dashboard-stats'),
     path('auth/register/', AuthViewSet.as_view({'post': 'register'}), name='auth-register'),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
+
+if settings.ASYNC_VIEWS:
+    # Lectures fréquentes servies par des vues asynchrones (api/async_views.py), avant le routeur
+    urlpatterns = async_views.urlpatterns(router) + urlpatterns
@@ -0,0 +1,98 @@
+import hashlib
+
+from django.conf import settings
+
+from . import metrics, signing
+from .cache import get_cache, written_key
+from .models import Diploma
+
+# Colonnes couvertes par l'index api_diploma_verify_idx : lecture sans accès à la table (PostgreSQL)
+VERIFY_FIELDS = signing.SIGNED_FIELDS + ('is_signed', 'signature_key_id', 'signature_data')
+SERIAL_MAX_LENGTH = Diploma._meta.get_field('serial_number').max_length
+
+
+def cache_key(serial_number):
+    # Numéro de série saisi par le public : haché pour rester une clé valide sur tout backend
+    return f'api:verify:{hashlib.sha1(serial_number.encode()).hexdigest()}'
+
+
+def check(serial_number, row):
+    """Résultat public de vérification d'un diplôme ; `row` suit VERIFY_FIELDS, None si absent."""
+    if row is None:
+        return {'serial_number': serial_number, 'status': 'NOT_FOUND', 'valid': False}
+    values = row[:len(signing.SIGNED_FIELDS)]
+    _, _, student_name, degree_name, major, graduation_date = values
+    is_signed, key_id, signature = row[len(signing.SIGNED_FIELDS):]
+    if not is_signed:
+        state = 'UNSIGNED'
+    else:
+        # Ed25519, ou comparaison en temps constant pour les anciennes empreintes sha256
+        state = 'VALID' if signing.verify(values, key_id, signature) else 'INVALID_SIGNATURE'
+    result = {
+        'serial_number': serial_number,
+        'status': state,
+        'valid': state == 'VALID',
+        'is_signed': is_signed,
+        'student_name': student_name,
+        'degree_name': degree_name,
+        'major': major,
+        'graduation_date': graduation_date.isoformat(),
+    }
+    if is_signed and key_id != signing.LEGACY_KEY_ID:
+        # De quoi revérifier hors ligne avec la clé publique publiée (GET /api/diplomas/keys/)
+        result.update(key_id=key_id, signature=signature)
+    return result
+
+
+def verify_serials(serial_numbers):
+    """
+    Vérifie une liste de numéros de série (ordre conservé) : une lecture groupée du cache,
+    puis une seule requête pour les absents. Les résultats, y compris NOT_FOUND, sont
+    gardés DIPLOMA_VERIFY_CACHE_TIMEOUT secondes.
+    """
+    cache = get_cache()
+    keys = {serial: cache_key(serial) for serial in serial_numbers}
+    cached = cache.get_many(list(keys.values()))
+    results = {serial: cached[key] for serial, key in keys.items() if key in cached}
+
+    missing = [serial for serial in keys if serial not in results]
+    metrics.cache_event(hits=len(results), misses=len(missing))
+    if missing:
+        lookup = [serial for serial in missing if len(serial) <= SERIAL_MAX_LENGTH]
+        rows = {row[0]: row for row in rows_query(lookup)} if lookup else {}
+        fresh = {serial: check(serial, rows.get(serial)) for serial in missing}
+        cache.set_many({keys[serial]: result for serial, result in fresh.items()}, settings.DIPLOMA_VERIFY_CACHE_TIMEOUT)
+        results.update(fresh)
+    return [results[serial] for serial in serial_numbers]
+
+
+async def averify_serials(serial_numbers):
+    # verify_serials pour les vues asynchrones : mêmes entrées de cache, ORM asynchrone
+    cache = get_cache()
+    keys = {serial: cache_key(serial) for serial in serial_numbers}
+    cached = await cache.aget_many(list(keys.values()))
+    results = {serial: cached[key] for serial, key in keys.items() if key in cached}
+
+    missing = [serial for serial in keys if serial not in results]
+    metrics.cache_event(hits=len(results), misses=len(missing))
+    if missing:
+        lookup = [serial for serial in missing if len(serial) <= SERIAL_MAX_LENGTH]
+        rows = {row[0]: row async for row in rows_query(lookup)} if lookup else {}
+        fresh = {serial: check(serial, rows.get(serial)) for serial in missing}
+        await cache.aset_many({keys[serial]: result for serial, result in fresh.items()}, settings.DIPLOMA_VERIFY_CACHE_TIMEOUT)
+        results.update(fresh)
+    return [results[serial] for serial in serial_numbers]
+
+
+def rows_query(serial_numbers):
+    return Diploma.objects.filter(serial_number__in=serial_numbers).order_by().values_list(*VERIFY_FIELDS)
+
+
+def forget(serial_numbers):
+    # Après une écriture : la vérification suivante relit la base sans attendre l'expiration
+    serial_numbers = [serial for serial in serial_numbers if serial]
+    if serial_numbers:
+        get_cache().delete_many([cache_key(serial) for serial in serial_numbers])
+        if settings.DATABASE_REPLICAS:
+            # Vérifications relues sur le primaire le temps que les réplicas rattrapent (api/replicas.py)
+            get_cache().set(written_key('diplomas'), True, settings.REPLICA_STICKY_SECONDS)
@@ -1,25 +1,59 @@
 from rest_framework import viewsets, permissions, status, filters
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import F
-from .models import User, Tag, Question, Answer, Comment, Vote, Diploma
+from django.utils import timezone
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch, Q
+from .models import User, Tag, Question, Answer, Comment, Diploma, DiplomaImport
+from . import (
+    counters, events, export, feeds, imports, qrcodes, reputation, search, signing, similar, tags, verification, votes,
+)
+from .cache import (
+    CachedResponseMixin, ensure_tokens, generation_key, get_cache, invalidate, invalidate_questions,
+    query_key, version_key, stats as cache_stats,
+)
+from .conditional import ConditionalMixin, make_etag, not_modified, set_validators
+from .metrics import JSONRenderer
+from .replicas import ReplicaReadMixin
 from .serializers import (
-    UserSerializer, TagSerializer, QuestionSerializer, 
+    UserSerializer, TagSerializer, QuestionSerializer, QuestionListSerializer,
     QuestionDetailSerializer, AnswerSerializer, CommentSerializer, 
-    DiplomaSerializer, RegisterSerializer
+    DiplomaSerializer, DiplomaImportSerializer, RegisterSerializer, list_columns, list_fields,
 )
 
+def query_limit(request, default, maximum):
+    # `?limit=` borné à [1, maximum] ; valeur invalide : défaut
+    try:
+        return max(1, min(int(request.query_params.get('limit', default)), maximum))
+    except ValueError:
+        return default
+
 class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+    # Statistiques lues sur UserStats dans la même requête (api/reputation.py)
+    queryset = User.objects.select_related('stats')
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = '-date_joined'
+    # Recherche côté serveur : la liste est paginée, le client ne voit qu'une page
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['username', 'email']
 
     @action(detail=False, methods=['get'])
     def me(self, request):
-        serializer = self.get_serializer(request.user)
+        serializer = self.get_serializer(self.get_queryset().get(pk=request.user.pk))
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
+    def leaderboard(self, request):
+        # Classement par réputation : `?limit=` (20 par défaut, 100 au plus)
+        limit = query_limit(request, reputation.LEADERBOARD_LIMIT, reputation.MAX_LEADERBOARD_LIMIT)
+        return Response(reputation.leaderboard(limit, using=self.get_queryset().db))
+
 class AuthViewSet(viewsets.GenericViewSet):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
@@ -32,123 +66,415 @@ class AuthViewSet(viewsets.GenericViewSet):
         user = serializer.save()
         return Response(UserSerializer(user).data, status=status.HTTP_201_CREATED)
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(ReplicaReadMixin, CachedResponseMixin, ConditionalMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    ordering = 'name'
+    cache_namespace = 'tags'
+    cache_actions = ('list',)
+    replica_actions = ('list', 'retrieve', 'autocomplete')
+
+    def get_validators(self, request, *args, **kwargs):
+        # Toute écriture sur les tags change la génération : elle valide aussi le détail
+        if self.action != 'retrieve':
+            return None, None
+        key = generation_key(self.cache_namespace)
+        tokens = ensure_tokens(get_cache(), [key])
+        return make_etag(key, tokens[key], kwargs['pk'], query_key(request)), None
+
+    def perform_create(self, serializer):
+        serializer.save()
+        invalidate('tags', [tags.INDEX], lists=True)
 
-class QuestionViewSet(viewsets.ModelViewSet):
+    def perform_update(self, serializer):
+        serializer.save()
+        invalidate('tags', [tags.INDEX], lists=True)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        invalidate('tags', [tags.INDEX], lists=True)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        # `?q=` préfixe du nom, les plus utilisés d'abord ; index en mémoire (api/tags.py)
+        limit = query_limit(request, tags.COMPLETE_LIMIT, tags.MAX_COMPLETE_LIMIT)
+        prefix = request.query_params.get('q', '')
+        return Response(tags.complete(prefix, limit, using=self.get_queryset().db))
+
+class VoteMixin:
+    # Vote partagé par les questions et les réponses (voir api/votes.py)
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def vote(self, request, pk=None):
+        target = self.get_object()
+        try:
+            value = int(request.data.get('value', 0))
+        except (TypeError, ValueError):
+            value = 0
+
+        if value not in [1, -1]:
+            return Response({'error': 'Invalid vote value'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'votes': votes.cast_vote(request.user, target, value)})
+
+class IsAdminOrStaff(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and 
+                   (request.user.role in ['ADMIN', 'STAFF'] or request.user.is_staff))
+
+class ExportMixin:
+    # Export NDJSON en flux (voir api/export.py) : `?since=` pour un export incrémental
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminOrStaff],
+            renderer_classes=[JSONRenderer, export.NDJSONRenderer])
+    def export(self, request):
+        try:
+            since = export.parse_since(request.query_params.get('since'))
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        watermark = export.watermark()
+        # Alias choisi maintenant : le flux est lu après la fin de dispatch (réplica rendu)
+        records = export.EXPORTS[self.export_name](since, using=self.get_queryset().db)
+        content = export.ndjson(records)
+        if isinstance(request._request, ASGIRequest):
+            content = export.aiterate(content)
+        response = StreamingHttpResponse(content, content_type='application/x-ndjson')
+        response['X-Export-Watermark'] = watermark.isoformat()
+        return response
+
+class QuestionViewSet(ReplicaReadMixin, CachedResponseMixin, VoteMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = Question.objects.all().order_by('-created_at')
     serializer_class = QuestionSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'description', 'tags__name']
+    filter_backends = [search.QuestionSearchFilter, feeds.QuestionFeedFilter, filters.OrderingFilter]
     ordering_fields = ['created_at', 'votes']
+    ordering = '-created_at'
+    cache_namespace = 'questions'
+    cache_item_versions = True
+    replica_actions = ('list', 'retrieve', 'export', 'related', 'similar_drafts')
+    export_name = 'questions'
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # Colonnes des seuls champs demandés, auteur en jointure ; tags lus par QuestionRowsSerializer
+            return queryset.values(*list_columns(list_fields(self.request)))
+        if self.action != 'retrieve':
+            return queryset
+        # Nombre de requêtes fixe : auteur en jointure, tags préchargés
+        comments = Comment.objects.select_related('author')
+        return queryset.select_related('author').prefetch_related(
+            'tags',
+            Prefetch('answers', queryset=Answer.objects.select_related('author').prefetch_related(
+                Prefetch('comments', queryset=comments)
+            )),
+            Prefetch('comments', queryset=comments),
+        )
+
+    def get_ordering(self):
+        # Pendant une recherche, tri par pertinence, dans un fil par son score, sauf ?ordering= explicite
+        if self.request.query_params.get(search.QuestionSearchFilter.search_param, '').strip():
+            return '-' + search.BaseSearchBackend.rank_field
+        if self.request.query_params.get(feeds.QuestionFeedFilter.feed_param, '').strip():
+            return '-' + feeds.SCORE_FIELD
+        return self.ordering
+
+    def list_generations(self, request):
+        # Fils et ?ordering=votes : aussi invalidés par un vote (feeds.refresh)
+        generations = super().list_generations(request)
+        return generations + [generation_key(feeds.RANKED)] if feeds.ranked(request) else generations
+
+    def get_cursor_pk_field(self):
+        if self.request.query_params.get(feeds.QuestionFeedFilter.feed_param, '').strip():
+            return feeds.QUESTION_FIELD
+        return None
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return QuestionDetailSerializer
+        if self.action == 'list':
+            return QuestionListSerializer
         return QuestionSerializer
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        # Récupération des noms de tags depuis la requête
+        # Noms de tags de la requête : trouvés ou créés en bloc (api/tags.py)
         tags_data = self.request.data.get('tags', [])
         question = serializer.save(author=self.request.user)
-        
+        reputation.question_created(question)
         if isinstance(tags_data, list):
-            from django.utils.text import slugify
-            for tag_name in tags_data:
-                tag_name = tag_name.strip()
-                if tag_name:
-                    # On cherche ou on crée le tag par son nom
-                    tag, created = Tag.objects.get_or_create(
-                        name=tag_name,
-                        defaults={'slug': slugify(tag_name)}
-                    )
-                    question.tags.add(tag)
+            tags.attach(question, tags_data)
+        similar.index_questions([question.pk])
+        feeds.refresh([question.pk])
+        invalidate_questions(lists=True)
+        invalidate('tags', lists=True)
 
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
-    def vote(self, request, pk=None):
+    @transaction.atomic
+    def perform_update(self, serializer):
+        question = serializer.save()
+        similar.index_questions([question.pk])
+        invalidate_questions([question.pk])
+
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        # Questions proches de celle-ci (api/similar.py)
         question = self.get_object()
-        user = request.user
-        value = int(request.data.get('value', 0))
-        
-        if value not in [1, -1]:
-            return Response({'error': 'Invalid vote value'}, status=status.HTTP_400_BAD_REQUEST)
+        hashes, weights = similar.vector(
+            question.title, question.description, question.tags.values_list('name', flat=True),
+        )
+        limit = query_limit(request, similar.LIMIT, similar.MAX_LIMIT)
+        return Response(similar.suggest(hashes, weights, exclude=question.pk, limit=limit, using=self.get_queryset().db))
 
-        from django.db import transaction
-        with transaction.atomic():
-            vote, created = Vote.objects.get_or_create(
-                user=user, question=question,
-                defaults={'value': value}
-            )
+    @action(detail=False, methods=['post'], url_path='similar', permission_classes=[permissions.AllowAny])
+    def similar_drafts(self, request):
+        # Questions existantes proches d'un brouillon (titre, description et tags facultatifs)
+        title, description = request.data.get('title'), request.data.get('description', '')
+        tag_names = request.data.get('tags', [])
+        if not isinstance(title, str) or not title.strip():
+            return Response({'error': 'Title is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(description, str) or not isinstance(tag_names, list):
+            return Response({'error': 'Invalid description or tags'}, status=status.HTTP_400_BAD_REQUEST)
+        hashes, weights = similar.vector(title, description, [name for name in tag_names if isinstance(name, str)])
+        limit = query_limit(request, similar.LIMIT, similar.MAX_LIMIT)
+        return Response(similar.suggest(hashes, weights, limit=limit, using=self.get_queryset().db))
 
-            if not created:
-                if vote.value == value:
-                    # User clicked same vote again: remove vote (toggle)
-                    question.votes = F('votes') - value
-                    vote.delete()
-                else:
-                    # Change vote (e.g. up to down)
-                    old_value = vote.value
-                    question.votes = F('votes') - old_value + value
-                    vote.value = value
-                    vote.save()
-            else:
-                # New vote
-                question.votes = F('votes') + value
-            
-            question.save()
-            
-        question.refresh_from_db()
-        return Response({'votes': question.votes})
-
-class AnswerViewSet(viewsets.ModelViewSet):
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        tag_ids = list(instance.tags.values_list('pk', flat=True))
+        # Votes et réponses emportés par la cascade : compteurs de leurs auteurs recalculés
+        users = reputation.affected_by_question(instance)
+        question_id = instance.pk
+        instance.delete()
+        counters.tags_removed(tag_ids)
+        reputation.recompute(users)
+        similar.remove_questions([question_id])
+        invalidate_questions([question_id], lists=True)
+        invalidate('tags', lists=True)
+
+class AnswerViewSet(ReplicaReadMixin, ConditionalMixin, VoteMixin, viewsets.ModelViewSet):
     queryset = Answer.objects.all()
     serializer_class = AnswerSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    ordering = 'created_at'
+
+    def get_validators(self, request, *args, **kwargs):
+        # Une réponse (votes, commentaires, meilleure réponse) n'évolue qu'en invalidant sa question
+        if self.action != 'retrieve':
+            return None, None
+        question_id = Answer.objects.filter(pk=kwargs['pk']).values_list('question_id', flat=True).first()
+        if question_id is None:
+            return None, None
+        key = version_key('questions', question_id)
+        tokens = ensure_tokens(get_cache(), [key])
+        return make_etag(key, tokens[key], kwargs['pk'], query_key(request)), None
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        return queryset.select_related('author').prefetch_related(
+            Prefetch('comments', queryset=Comment.objects.select_related('author'))
+        )
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        answer = serializer.save(author=self.request.user)
+        counters.answer_created(answer)
+        reputation.answer_created(answer)
+        feeds.refresh([answer.question_id])
+        invalidate_questions([answer.question_id])
+        # Corps en HTML seulement, celui qu'affiche la page de la question
+        data = {key: value for key, value in serializer.data.items() if key != 'content'}
+        events.publish(answer.question_id, 'answer', {'question': answer.question_id, 'answer': data})
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        answer = serializer.save()
+        invalidate_questions([answer.question_id])
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        users = reputation.affected_by_answers(Answer.objects.filter(pk=instance.pk))
+        instance.delete()
+        counters.answer_deleted(instance)
+        reputation.recompute(users)
+        feeds.refresh([instance.question_id])
+        invalidate_questions([instance.question_id])
 
     @action(detail=True, methods=['post'])
+    @transaction.atomic
     def mark_best(self, request, pk=None):
         answer = self.get_object()
-        if answer.question.author != request.user:
+        # Verrou sur la question : deux marquages concurrents ne heurtent pas la contrainte unique_best_answer
+        question = Question.objects.select_for_update().get(pk=answer.question_id)
+        if question.author_id != request.user.pk:
             return Response({'error': 'Only question author can mark best answer'}, status=status.HTTP_403_FORBIDDEN)
-        
-        # Unmark previous best answers for this question
-        Answer.objects.filter(question=answer.question, is_best_answer=True).update(is_best_answer=False)
-        
-        answer.is_best_answer = True
-        answer.save()
+
+        # Unmark previous best answers for this question (index partiel unique_best_answer)
+        previous = list(Answer.objects.filter(question=question, is_best_answer=True).values_list('pk', 'author_id'))
+        Answer.objects.filter(question=question, is_best_answer=True).exclude(pk=answer.pk).update(is_best_answer=False)
+        Answer.objects.filter(pk=answer.pk).update(is_best_answer=True, updated_at=timezone.now())
+        reputation.best_answer_changed(previous, answer)
+        feeds.refresh([answer.question_id])
+        invalidate_questions([answer.question_id])
+        events.publish(answer.question_id, 'best_answer', {'question': answer.question_id, 'answer': answer.pk})
         return Response({'status': 'marked as best'})
 
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
+class CommentViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    queryset = Comment.objects.select_related('author')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    ordering = 'created_at'
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        counters.comment_created(comment)
+        question_id = self.invalidate_question(comment)
+        if question_id:
+            events.publish(question_id, 'comment', {
+                'question': question_id, 'answer': comment.answer_id, 'comment': serializer.data,
+            })
 
-class IsAdminOrStaff(permissions.BasePermission):
-    def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and 
-                   (request.user.role in ['ADMIN', 'STAFF'] or request.user.is_staff))
+    @transaction.atomic
+    def perform_update(self, serializer):
+        self.invalidate_question(serializer.save())
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        self.invalidate_question(instance)
+        instance.delete()
+        counters.comment_deleted(instance)
+
+    def invalidate_question(self, comment):
+        # Renvoie la question du commentaire (directe ou via sa réponse)
+        question_id = comment.question_id or (comment.answer.question_id if comment.answer_id else None)
+        if question_id:
+            invalidate_questions([question_id])
+        return question_id
 
-class DiplomaViewSet(viewsets.ModelViewSet):
+class DiplomaViewSet(ReplicaReadMixin, ConditionalMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = Diploma.objects.all().order_by('-issue_date')
     serializer_class = DiplomaSerializer
+    ordering = '-issue_date'
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['student_name', 'student_id', 'serial_number']
+    # Vérification par lot : lecture seule malgré le POST
+    replica_actions = ('list', 'retrieve', 'verify', 'verify_batch', 'export')
+    replica_namespace = 'diplomas'
+    export_name = 'diplomas'
 
     def get_permissions(self):
-        if self.action in ['retrieve', 'list', 'verify']:
+        if self.action in ['retrieve', 'list', 'verify', 'verify_batch', 'keys', 'qr']:
             return [permissions.AllowAny()]
         return [IsAdminOrStaff()]
 
-    @action(detail=True, methods=['get'], url_path='verify')
+    def get_validators(self, request, *args, **kwargs):
+        # Validateurs tirés de updated_at, sans charger ni sérialiser les diplômes
+        if self.action == 'list':
+            state = Diploma.objects.aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+            last_modified = state['last_modified']
+            if last_modified is None:
+                return None, None
+            return make_etag('diplomas', state['count'], last_modified.isoformat(), query_key(request)), last_modified
+        if self.action == 'qr':
+            # L'image ne dépend que du numéro de série
+            serial_number = Diploma.objects.filter(pk=kwargs['pk']).values_list('serial_number', flat=True).first()
+            return (make_etag('qr', serial_number), None) if serial_number else (None, None)
+        if self.action != 'retrieve':
+            return None, None
+        last_modified = Diploma.objects.filter(pk=kwargs['pk']).values_list('updated_at', flat=True).first()
+        if last_modified is None:
+            return None, None
+        return make_etag('diploma', kwargs['pk'], last_modified.isoformat(), query_key(request)), last_modified
+
+    @action(detail=True, methods=['get'], url_path='verify', authentication_classes=[], renderer_classes=[JSONRenderer])
     def verify(self, request, pk=None):
-        # Allow anyone to verify by serial number or ID
-        diploma = get_object_or_404(Diploma, serial_number=pk)
-        serializer = self.get_serializer(diploma)
-        return Response(serializer.data)
+        # Chemin public et léger : pas d'authentification, pas de sérialiseur complet, cache court
+        result, = verification.verify_serials([pk])
+        if result['status'] == 'NOT_FOUND':
+            return Response(result, status=status.HTTP_404_NOT_FOUND)
+        etag = make_etag('verify', *sorted(result.items()))
+        max_age = settings.DIPLOMA_VERIFY_CACHE_TIMEOUT
+        return not_modified(request, etag, max_age=max_age) or set_validators(Response(result), etag, max_age=max_age)
+
+    @action(detail=False, methods=['post'], url_path='verify', authentication_classes=[], renderer_classes=[JSONRenderer])
+    def verify_batch(self, request):
+        serials = request.data.get('serials') if isinstance(request.data, dict) else None
+        if not isinstance(serials, list) or not all(isinstance(serial, str) for serial in serials):
+            return Response({'error': 'Expected a list of serial numbers in "serials"'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(serials) > settings.DIPLOMA_VERIFY_BATCH_SIZE:
+            return Response(
+                {'error': f'At most {settings.DIPLOMA_VERIFY_BATCH_SIZE} serial numbers per request'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({'results': verification.verify_serials([serial.strip() for serial in serials])})
+
+    @action(detail=False, methods=['get'], authentication_classes=[], renderer_classes=[JSONRenderer])
+    def keys(self, request):
+        # Clés publiques : vérification hors ligne des champs `key_id` / `signature` renvoyés par verify/
+        keyring = signing.get_keyring()
+        data = {
+            'active': keyring.active_key_id,
+            'keys': keyring.public_jwks(),
+            'payload': {'version': signing.PAYLOAD_VERSION, 'fields': signing.SIGNED_FIELDS},
+        }
+        etag = make_etag('keys', *(key['kid'] + key['x'] for key in data['keys']), keyring.active_key_id)
+        max_age = settings.DIPLOMA_VERIFY_CACHE_TIMEOUT
+        return not_modified(request, etag, max_age=max_age) or set_validators(Response(data), etag, max_age=max_age)
+
+    def perform_create(self, serializer):
+        diploma = serializer.save()
+        verification.forget([diploma.serial_number])
+
+    def perform_update(self, serializer):
+        previous = serializer.instance.serial_number
+        diploma = serializer.save()
+        verification.forget([previous, diploma.serial_number])
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        verification.forget([instance.serial_number])
+
+    @action(detail=True, methods=['get'], url_path='qr')
+    def qr(self, request, pk=None):
+        return self.conditional(self.qr_svg, request, pk=pk)
+
+    def qr_svg(self, request, pk=None):
+        # Rendu SVG à la demande (QR_CODE_FORMAT = 'svg'), disponible aussi en mode PNG
+        serial_number = get_object_or_404(Diploma.objects.values_list('serial_number', flat=True), pk=pk)
+        return HttpResponse(qrcodes.render_svg(serial_number), content_type='image/svg+xml')
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        # Fichier CSV/JSONL importé en arrière-plan ; suivi via imports/<id>/
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get('format') or imports.guess_format(upload.name)
+        if fmt not in imports.FORMATS:
+            return Response({'error': 'Unsupported format'}, status=status.HTTP_400_BAD_REQUEST)
+        diploma_import = imports.start_import(upload, fmt, request.user)
+        return Response(DiplomaImportSerializer(diploma_import).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'imports/(?P<import_id>[0-9]+)')
+    def import_status(self, request, import_id=None):
+        diploma_import = get_object_or_404(DiplomaImport, pk=import_id)
+        return Response(DiplomaImportSerializer(diploma_import).data)
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrStaff])
+def cache_stats_view(request):
+    # Compteurs hits/miss du cache de réponses (processus courant)
+    return Response(cache_stats.snapshot())
+
+@api_view(['GET'])
+@permission_classes([IsAdminOrStaff])
+def dashboard_stats_view(request):
+    # Totaux du tableau de bord admin, comptés en base : les listes ne renvoient qu'une page
+    diplomas = Diploma.objects.aggregate(total=Count('pk'), signed=Count('pk', filter=Q(is_signed=True)))
+    return Response({
+        'diplomas': diplomas['total'],
+        'signed_diplomas': diplomas['signed'],
+        'pending_diplomas': diplomas['total'] - diplomas['signed'],
+        'users': User.objects.count(),
+    })
@@ -0,0 +1,257 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connections, router, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils.module_loading import import_string
+
+from . import events, feeds, reputation
+from .cache import invalidate_questions
+from .counters import VOTE_RECOUNTS, recount
+from .models import Question, Answer, Vote, VoteDelta
+
+VOTE_TABLE = Vote._meta.db_table
+DELTA_TABLE = VoteDelta._meta.db_table
+TARGETS = {
+    Question: 'question_id',
+    Answer: 'answer_id',
+}
+MODELS = {column: model for model, column in TARGETS.items()}
+
+logger = logging.getLogger(__name__)
+
+
+def cast_vote(user, target, value, mode=None):
+    """
+    Enregistre le vote `value` (1 ou -1) de `user` sur une question ou une réponse.
+
+    Même valeur deux fois : le vote est retiré. Valeur opposée : le vote est inversé.
+    Renvoie le nouveau total de votes de la cible, sans toucher à `updated_at`.
+    En mode write-behind, le total renvoyé est une estimation cohérente à
+    VOTE_FLUSH_INTERVAL secondes près.
+    """
+    model = type(target)
+    column = TARGETS[model]
+    alias = router.db_for_write(model)
+    writer = WRITERS[mode or settings.VOTE_WRITE_MODE]
+    with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+        delta = record_vote(cursor, user.pk, column, target.pk, value)
+        votes = writer(cursor, model, column, target.pk, delta)
+        question_id = target.pk if model is Question else target.question_id
+        if writer is write_direct:
+            if model is Question:
+                # Ligne de la question verrouillée par l'UPDATE : reclassement sans course
+                feeds.refresh([target.pk], alias)
+            invalidate_questions([question_id])
+        # Votant et auteur de la cible, après la ligne de la cible (même ordre de verrous partout)
+        reputation.vote_cast(user.pk, target, value, delta, using=alias)
+        events.publish(question_id, 'votes', {
+            'question': question_id, 'answer': None if model is Question else target.pk, 'votes': votes,
+        }, using=alias)
+        return votes
+
+
+def record_vote(cursor, user_id, column, target_id, value):
+    # Cas courant (nouveau vote) : un seul INSERT ... ON CONFLICT DO NOTHING
+    other = 'answer_id' if column == 'question_id' else 'question_id'
+    cursor.execute(
+        f'INSERT INTO {VOTE_TABLE} (user_id, {column}, {other}, value) VALUES (%s, %s, NULL, %s) '
+        f'ON CONFLICT DO NOTHING',
+        [user_id, target_id, value],
+    )
+    if cursor.rowcount == 1:
+        return value
+
+    # Un vote existe déjà : même valeur, on le retire ; sinon il vaut -value et on l'inverse
+    where = f'user_id = %s AND {column} = %s AND {other} IS NULL'
+    cursor.execute(f'DELETE FROM {VOTE_TABLE} WHERE {where} AND value = %s', [user_id, target_id, value])
+    if cursor.rowcount == 1:
+        return -value
+    cursor.execute(f'UPDATE {VOTE_TABLE} SET value = %s WHERE {where}', [value, user_id, target_id])
+    return 2 * value if cursor.rowcount == 1 else 0
+
+
+def write_direct(cursor, model, column, target_id, delta):
+    # Le verrou sur la ligne chaude n'est pris qu'ici, juste avant le COMMIT
+    cursor.execute(
+        f'UPDATE {model._meta.db_table} SET votes = votes + %s WHERE id = %s RETURNING votes',
+        [delta, target_id],
+    )
+    return cursor.fetchone()[0]
+
+
+def write_log(cursor, model, column, target_id, delta):
+    # Simple INSERT dans le journal : aucune contention sur la ligne de la cible
+    if delta:
+        cursor.execute(f'INSERT INTO {DELTA_TABLE} ({column}, delta) VALUES (%s, %s)', [target_id, delta])
+    flusher.ensure_running()
+    return stored_votes(cursor, model, target_id) + delta
+
+
+def write_buffer(cursor, model, column, target_id, delta):
+    store = flusher.store
+    if delta:
+        # Le delta n'entre dans le tampon qu'une fois le vote lui-même validé
+        transaction.on_commit(lambda: store.add(column, target_id, delta), using=cursor.db.alias)
+    flusher.ensure_running()
+    return stored_votes(cursor, model, target_id) + store.pending(column, target_id) + delta
+
+
+def stored_votes(cursor, model, target_id):
+    cursor.execute(f'SELECT votes FROM {model._meta.db_table} WHERE id = %s', [target_id])
+    return cursor.fetchone()[0]
+
+
+WRITERS = {
+    'direct': write_direct,
+    'log': write_log,
+    'buffer': write_buffer,
+}
+
+
+class LocalVoteStore:
+    """Tampon en mémoire du processus ; remplaçable par un magasin partagé via VOTE_BUFFER_STORE."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deltas = defaultdict(int)
+
+    def add(self, column, target_id, delta):
+        with self.lock:
+            self.deltas[column, target_id] += delta
+
+    def pending(self, column, target_id):
+        with self.lock:
+            return self.deltas.get((column, target_id), 0)
+
+    def drain(self):
+        with self.lock:
+            deltas, self.deltas = self.deltas, defaultdict(int)
+        return deltas
+
+    def restore(self, deltas):
+        # Remise en tampon si l'écriture en base a échoué
+        with self.lock:
+            for key, delta in deltas.items():
+                self.deltas[key] += delta
+
+
+def apply_deltas(deltas, alias=None):
+    # Un UPDATE groupé par modèle : votes = votes + CASE id WHEN ... END
+    by_column = defaultdict(dict)
+    for (column, target_id), delta in deltas.items():
+        if delta:
+            by_column[column][target_id] = delta
+    for column, targets in by_column.items():
+        model = MODELS[column]
+        manager = model.objects.using(alias) if alias else model.objects
+        manager.filter(pk__in=sorted(targets)).update(votes=F('votes') + Case(
+            *[When(pk=target_id, then=Value(delta)) for target_id, delta in targets.items()],
+            default=Value(0), output_field=IntegerField(),
+        ))
+        if model is Question:
+            feeds.refresh(targets, alias)
+            invalidate_questions(targets)
+        else:
+            invalidate_questions(set(manager.filter(pk__in=targets).values_list('question_id', flat=True)))
+
+
+def consume_log(alias, batch_size=5000):
+    # DELETE ... RETURNING : chaque ligne du journal n'est réclamée que par un seul agrégateur
+    consumed = 0
+    while True:
+        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {DELTA_TABLE} WHERE id IN (SELECT id FROM {DELTA_TABLE} ORDER BY id LIMIT %s) '
+                f'RETURNING question_id, answer_id, delta',
+                [batch_size],
+            )
+            rows = cursor.fetchall()
+            deltas = defaultdict(int)
+            for question_id, answer_id, delta in rows:
+                if question_id is not None:
+                    deltas['question_id', question_id] += delta
+                else:
+                    deltas['answer_id', answer_id] += delta
+            apply_deltas(deltas, alias)
+        consumed += len(rows)
+        if len(rows) < batch_size:
+            return consumed
+
+
+def recount_votes(batch_size=1000):
+    """
+    Recalcule Question.votes et Answer.votes depuis api_vote et vide le journal dans la même
+    transaction : les deltas en attente sont déjà dans api_vote, ils ne doivent pas être
+    agrégés une seconde fois. Le tampon mémoire des workers (mode buffer) est hors d'atteinte.
+    """
+    alias = router.db_for_write(Question)
+    connection = connections[alias]
+    with transaction.atomic(using=alias):
+        if connection.vendor == 'postgresql':
+            # Votes et agrégateurs en attente jusqu'au COMMIT, lectures permises ; même ordre de
+            # tables que cast_vote (api_vote puis journal). SQLite n'a qu'un écrivain à la fois.
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE {VOTE_TABLE}, {DELTA_TABLE} IN EXCLUSIVE MODE')
+        results = [
+            (model, field, recount(model, field, expression, batch_size=batch_size, using=alias))
+            for model, field, expression in VOTE_RECOUNTS
+        ]
+        VoteDelta.objects.using(alias).all().delete()
+    return results
+
+
+class VoteFlusher:
+    """Agrège périodiquement le tampon et le journal dans Question.votes / Answer.votes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self._store = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = import_string(settings.VOTE_BUFFER_STORE)()
+        return self._store
+
+    def flush(self):
+        alias = router.db_for_write(Question)
+        deltas = self.store.drain()
+        if deltas:
+            try:
+                with transaction.atomic(using=alias):
+                    apply_deltas(deltas, alias)
+            except Exception:
+                self.store.restore(deltas)
+                raise
+        return len(deltas) + consume_log(alias)
+
+    def ensure_running(self):
+        interval = settings.VOTE_FLUSH_INTERVAL
+        if interval <= 0 or (self.thread is not None and self.thread.is_alive()):
+            return
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, args=(interval,), name='vote-flusher', daemon=True)
+                self.thread.start()
+
+    def run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Échec de l'agrégation des votes")
+            finally:
+                close_old_connections()
+
+
+flusher = VoteFlusher()
+
+
+def flush_votes():
+    return flusher.flush()
@@ -6,12 +6,17 @@ Optimized for Production & Docker.
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
+from corsheaders.defaults import default_headers
 import dj_database_url
 import os
+import sys
 
 # Build paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# `manage.py test` : réglages par défaut adaptés aux tests (voir SLOW_REQUEST_THRESHOLD_MS)
+TESTING = sys.argv[1:2] == ['test']
+
 # --- SÉCURITÉ ---
 SECRET_KEY = config('SECRET_KEY', default='django-insecure-production-ready-key-change-me')
 
@@ -36,8 +41,11 @@ INSTALLED_APPS = [
 
 # --- MIDDLEWARE ---
 MIDDLEWARE = [
+    # En premier : mesure la requête entière, middlewares compris (voir api/metrics.py)
+    'api.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise utilisable sous ASGI sans passer la chaîne entière dans un thread (api/middleware.py)
+    'api.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,15 +74,49 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# --- SERVEUR ---
+# wsgi : gunicorn et workers synchrones ; asgi : gunicorn et workers uvicorn (voir entrypoint.sh)
+SERVER_MODE = config('SERVER_MODE', default='wsgi')
+# Vues de lecture asynchrones (api/async_views.py) : par défaut seulement sous ASGI, où elles
+# libèrent le worker pendant les accès à la base et au cache
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=SERVER_MODE == 'asgi', cast=bool)
+
 # --- BASE DE DONNÉES ---
 tmp_db_url = os.environ.get('DATABASE_URL')
+# Pool psycopg 3 par processus (PostgreSQL) : les threads d'un worker, y compris ceux de
+# sync_to_async sous ASGI, empruntent une connexion le temps d'une requête au lieu d'en
+# garder une ouverte chacun
+DATABASE_POOL = config('DATABASE_POOL', default=True, cast=bool)
+DATABASE_POOL_MIN_SIZE = config('DATABASE_POOL_MIN_SIZE', default=2, cast=int)
+DATABASE_POOL_MAX_SIZE = config('DATABASE_POOL_MAX_SIZE', default=10, cast=int)
+# Attente maximale d'une connexion libre (secondes) avant erreur
+DATABASE_POOL_TIMEOUT = config('DATABASE_POOL_TIMEOUT', default=10, cast=float)
+
+
+def database_config(url):
+    db = dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True)
+    if db['ENGINE'] == 'django.db.backends.postgresql':
+        if DATABASE_POOL:
+            # Le pool remplace les connexions persistantes (Django refuse les deux à la fois)
+            db['CONN_MAX_AGE'] = 0
+            db.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': DATABASE_POOL_MIN_SIZE,
+                'max_size': DATABASE_POOL_MAX_SIZE,
+                'timeout': DATABASE_POOL_TIMEOUT,
+            }
+        elif SERVER_MODE == 'asgi':
+            # Sans pool, une connexion persistante ouverte dans un thread de sync_to_async
+            # survivrait à sa requête sans jamais être fermée
+            db['CONN_MAX_AGE'] = 0
+    return db
+
 
 if tmp_db_url:
     from urllib.parse import urlparse
     parsed = urlparse(tmp_db_url)
     print(f"--- INFO: Initialisation de la base de données sur l'hôte: {parsed.hostname} ---")
     DATABASES = {
-        'default': dj_database_url.config(default=tmp_db_url, conn_max_age=600, conn_health_checks=True)
+        'default': database_config(tmp_db_url),
     }
 else:
     print("--- WARNING: DATABASE_URL non trouvée, utilisation de SQLite ---")
@@ -82,9 +124,44 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # Écritures concurrentes : verrou pris dès BEGIN, attente plutôt qu'erreur
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+            # Base de test sur fichier pour que les tests multi-threads partagent les données
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 
+# --- RÉPLICAS ---
+# URLs des réplicas en lecture, séparées par des virgules : alias replica_1, replica_2...
+# Les actions de lecture des ViewSets y sont routées (api/replicas.py)
+for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]), start=1):
+    DATABASES[f'replica_{index}'] = {**database_config(url), 'TEST': {'MIRROR': 'default'}}
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica_')]
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+# Après une écriture, lectures sur le primaire pendant ce délai (secondes) : l'auteur de
+# l'écriture, et tous les lecteurs de l'espace de cache concerné (voir api/replicas.py)
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+
+# --- CACHE ---
+# Partagé par les workers : table de la base par défaut (`createcachetable`, lancé par entrypoint.sh),
+# Redis ou Memcached via l'environnement. api.cache.LocMemCache seulement avec WEB_CONCURRENCY=1
+# (api.E001) : sous les tests, un seul processus
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'CACHE_BACKEND',
+            default='api.cache.LocMemCache' if TESTING else 'django.core.cache.backends.db.DatabaseCache',
+        ),
+        'LOCATION': config('CACHE_LOCATION', default='mini-stack-overflow' if TESTING else 'api_cache'),
+    }
+}
+# Cache des réponses de lecture (api/cache.py)
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = config('API_CACHE_TIMEOUT', default=300, cast=int)
+# Durée de vie des jetons de version (au moins le double d'API_CACHE_TIMEOUT) : un identifiant
+# quelconque demandé en détail pose un jeton, qui ne doit pas rester indéfiniment dans le cache
+API_CACHE_TOKEN_TIMEOUT = config('API_CACHE_TOKEN_TIMEOUT', default=86400, cast=int)
+
 # --- AUTHENTIFICATION ---
 AUTH_USER_MODEL = 'api.User'
 
@@ -95,8 +172,74 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    # Pagination par curseur (keyset) sur toutes les listes
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': config('API_PAGE_SIZE', default=20, cast=int),
+    # Rendus chronométrés pour api_serialization_duration_seconds
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.metrics.JSONRenderer',
+        'api.metrics.BrowsableAPIRenderer',
+    ),
 }
 
+# Configuration text search PostgreSQL utilisée par api/search.py
+SEARCH_CONFIG = config('SEARCH_CONFIG', default='simple')
+
+# Votes : 'direct' (UPDATE immédiat), 'log' (journal api_votedelta) ou 'buffer' (mémoire du processus)
+VOTE_WRITE_MODE = config('VOTE_WRITE_MODE', default='direct')
+# Borne de cohérence des modes write-behind : intervalle maximal entre deux agrégations (secondes)
+VOTE_FLUSH_INTERVAL = config('VOTE_FLUSH_INTERVAL', default=2.0, cast=float)
+VOTE_BUFFER_STORE = config('VOTE_BUFFER_STORE', default='api.votes.LocalVoteStore')
+
+# Événements en direct des questions (api/events.py, SSE) : servis par config/asgi.py seulement,
+# une connexion ouverte immobiliserait un worker WSGI
+EVENTS_ENABLED = config('EVENTS_ENABLED', default=True, cast=bool)
+# 'api.events.LocalBackend' (un seul processus) ou 'api.events.PostgresBackend' (NOTIFY/LISTEN entre
+# workers) : celui-ci par défaut sur PostgreSQL, entrypoint.sh lançant plusieurs workers
+EVENTS_BACKEND = config('EVENTS_BACKEND', default=(
+    'api.events.PostgresBackend' if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+    else 'api.events.LocalBackend'
+))
+# Workers lancés par entrypoint.sh (même variable) : LocalBackend n'en relie qu'un seul
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1 if TESTING else 3, cast=int)
+# Commentaire envoyé aux connexions inactives (secondes), pour les proxys qui coupent les flux muets
+EVENTS_HEARTBEAT = config('EVENTS_HEARTBEAT', default=15.0, cast=float)
+# Événements en attente par connexion ; au-delà, le client reçoit `reset` et relit la question
+EVENTS_QUEUE_SIZE = config('EVENTS_QUEUE_SIZE', default=100, cast=int)
+
+# File de tâches (api/jobs.py) : 0 désactive le worker local (run_jobs --loop ou tests)
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', default=5.0, cast=float)
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=3, cast=int)
+# Une tâche RUNNING depuis plus longtemps est reprise par un autre worker (secondes)
+JOB_LEASE = config('JOB_LEASE', default=300, cast=int)
+# Processus qui exécutent des tâches en même temps : chaque worker web (thread de la file) ou,
+# avec JOB_POLL_INTERVAL=0, le seul `run_jobs --loop` (service worker de docker-compose.yml)
+JOB_CONCURRENCY = config('JOB_CONCURRENCY', default=WEB_CONCURRENCY if JOB_POLL_INTERVAL > 0 else 1, cast=int)
+# QR codes des diplômes : 'png' (fichier produit en arrière-plan) ou 'svg' (rendu à la demande, mis en cache)
+QR_CODE_FORMAT = config('QR_CODE_FORMAT', default='png')
+# Vérification publique des diplômes (api/verification.py) : durée de cache des résultats, taille maximale d'un lot
+DIPLOMA_VERIFY_CACHE_TIMEOUT = config('DIPLOMA_VERIFY_CACHE_TIMEOUT', default=60, cast=int)
+DIPLOMA_VERIFY_BATCH_SIZE = config('DIPLOMA_VERIFY_BATCH_SIZE', default=1000, cast=int)
+# Processus de rendu (signature, QR code) pour l'import en masse de diplômes ; 0 ou 1 : dans le processus courant.
+# Par défaut, les CPU partagés entre les JOB_CONCURRENCY processus qui peuvent importer en même temps
+DIPLOMA_IMPORT_WORKERS = config(
+    'DIPLOMA_IMPORT_WORKERS', default=max(1, (os.cpu_count() or 1) // max(JOB_CONCURRENCY, 1)), cast=int,
+)
+# Métriques par requête (api/metrics.py), exposées sur /metrics au format Prometheus
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Répertoire partagé par les workers gunicorn (un instantané par processus, vidé au démarrage) ; vide : processus seul
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5.0, cast=float)
+# Jeton Bearer exigé par /metrics ; vide : accès libre (avertissement api.W002 en production)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# Requêtes plus longues journalisées avec leur SQL le plus lent (millisecondes) ; 0 désactive.
+# Désactivé sous les tests (hachage des mots de passe, threads) : ceux qui le vérifient l'activent
+SLOW_REQUEST_THRESHOLD_MS = config('SLOW_REQUEST_THRESHOLD_MS', default=0 if TESTING else 500, cast=int)
+# Clés Ed25519 de signature des diplômes (api/signing.py) : "kid:graine_base64url,..." ; vide : clé dérivée de SECRET_KEY
+DIPLOMA_SIGNING_KEYS = config('DIPLOMA_SIGNING_KEYS', default='')
+# Clé active pour les nouvelles signatures ; vide : la dernière de DIPLOMA_SIGNING_KEYS
+DIPLOMA_SIGNING_KEY_ID = config('DIPLOMA_SIGNING_KEY_ID', default='')
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -104,6 +247,9 @@ SIMPLE_JWT = {
 
 # --- CORS & CSRF ---
 CORS_ALLOW_ALL_ORIGINS = True 
+# Requêtes conditionnelles depuis le frontend (ETag / If-None-Match)
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match', 'if-modified-since')
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified', 'X-Cache']
 
 CSRF_TRUSTED_ORIGINS = config(
     'CSRF_TRUSTED_ORIGINS', 
@@ -21,10 +21,41 @@ sleep 5
 echo "Running database migrations..."
 python manage.py migrate
 
+# Table du cache partagé par les workers (CACHE_BACKEND DatabaseCache par défaut) ; sans effet si elle existe
+echo "Creating cache table..."
+python manage.py createcachetable
+
+# HTML des questions et réponses pas encore rendu par la version courante du moteur (api/markup.py)
+echo "Rendering Markdown..."
+python manage.py render_markdown
+
+# Classements des fils (api/feeds.py) : lignes manquantes et questions sorties des fenêtres week/month
+echo "Recomputing question feeds..."
+python manage.py recompute_feeds
+
+# Vecteurs des questions proches (api/similar.py) manquants ou d'une autre version du calcul
+echo "Indexing similar questions..."
+python manage.py reindex_similar
+
+# Réputation et statistiques (api/reputation.py) des utilisateurs qui n'ont pas encore de ligne
+echo "Computing user reputation..."
+python manage.py recompute_reputation
+
 # Collect static files
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+# Métriques partagées par les workers (api/metrics.py) : on repart d'un répertoire vide
+if [ -n "$METRICS_DIR" ]; then
+  rm -rf "$METRICS_DIR"
+  mkdir -p "$METRICS_DIR"
+fi
+
 # Start server
+# SERVER_MODE=asgi : workers uvicorn et vues de lecture asynchrones (voir DEPLOYMENT.md)
+if [ "$SERVER_MODE" = "asgi" ]; then
+  echo "Starting Gunicorn server (ASGI, Uvicorn workers)..."
+  exec gunicorn config.asgi:application -k uvicorn_worker.UvicornWorker --bind 0.0.0.0:${PORT:-8000} --workers ${WEB_CONCURRENCY:-3}
+fi
 echo "Starting Gunicorn server..."
-exec gunicorn config.wsgi:application --bind 0.0.0.0:${PORT:-8000} --workers 3
+exec gunicorn config.wsgi:application --bind 0.0.0.0:${PORT:-8000} --workers ${WEB_CONCURRENCY:-3}
@@ -6,8 +6,16 @@ const api = axios.create({
     headers: {
         'Content-Type': 'application/json',
     },
+    // 304 : la réponse est reconstituée depuis le cache ETag ci-dessous
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
 });
 
+// Cache ETag des GET : URL complète -> { etag, data }
+const etagCache = new Map();
+const ETAG_CACHE_SIZE = 200;
+
+const cacheKey = (config) => api.getUri(config);
+
 console.log("--- DEBUG API ---");
 console.log("Base URL utilisée :", api.defaults.baseURL);
 if (!import.meta.env.VITE_API_URL) {
@@ -21,6 +29,12 @@ api.interceptors.request.use(
         if (token) {
             config.headers.Authorization = `Bearer ${token}`;
         }
+        if ((config.method || 'get').toLowerCase() === 'get') {
+            const cached = etagCache.get(cacheKey(config));
+            if (cached) {
+                config.headers['If-None-Match'] = cached.etag;
+            }
+        }
         return config;
     },
     (error) => Promise.reject(error)
@@ -28,7 +42,30 @@ api.interceptors.request.use(
 
 // Intercepteur de réponse pour la gestion du rafraîchissement du token
 api.interceptors.response.use(
-    (response) => response,
+    (response) => {
+        if ((response.config.method || 'get').toLowerCase() !== 'get') {
+            return response;
+        }
+        const key = cacheKey(response.config);
+        if (response.status === 304) {
+            const cached = etagCache.get(key);
+            if (cached) {
+                return { ...response, status: 200, data: cached.data };
+            }
+            // Entrée perdue : on redemande sans validateur
+            const { 'If-None-Match': _, ...headers } = response.config.headers;
+            return api({ ...response.config, headers });
+        }
+        const etag = response.headers.etag;
+        if (etag) {
+            etagCache.delete(key);
+            etagCache.set(key, { etag, data: response.data });
+            if (etagCache.size > ETAG_CACHE_SIZE) {
+                etagCache.delete(etagCache.keys().next().value);
+            }
+        }
+        return response;
+    },
     async (error) => {
         const originalRequest = error.config;
 
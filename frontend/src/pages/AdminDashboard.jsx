@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Search, Filter, Plus, GraduationCap, Download, ExternalLink, Users, FileText, TrendingUp, CheckCircle, Loader2 } from 'lucide-react';
 import { Link } from 'react-router-dom';
 import api from '../api';
@@ -7,7 +7,13 @@ const AdminDashboard = () => {
     const [activeTab, setActiveTab] = useState('diplomas');
     const [diplomas, setDiplomas] = useState([]);
     const [users, setUsers] = useState([]);
+    const [diplomaNext, setDiplomaNext] = useState(null);
+    const [userNext, setUserNext] = useState(null);
+    const [searchTerm, setSearchTerm] = useState('');
+    const latestRequest = useRef(0);
+    const [stats, setStats] = useState({ diplomas: 0, users: 0, signed_diplomas: 0, pending_diplomas: 0 });
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState(null);
     const [showModal, setShowModal] = useState(false);
     const [newDiploma, setNewDiploma] = useState({
@@ -20,28 +26,77 @@ const AdminDashboard = () => {
     });
     const [submitting, setSubmitting] = useState(false);
 
-    const fetchData = async () => {
-        setLoading(true);
+    const fetchStats = async () => {
         try {
+            // Les listes sont paginées : les totaux viennent de dashboard/stats/
+            const response = await api.get('dashboard/stats/');
+            setStats(response.data);
+        } catch (err) {
+            setError("Erreur lors de la récupération des données.");
+        }
+    };
+
+    // Première page de chaque liste, filtrée côté serveur par `?search=`
+    const fetchLists = async (search) => {
+        const request = ++latestRequest.current;
+        try {
+            const params = search ? { search } : {};
             const [diplomasRes, usersRes] = await Promise.all([
-                api.get('diplomas/'),
-                api.get('users/')
+                api.get('diplomas/', { params }),
+                api.get('users/', { params })
             ]);
-            const diplomaData = diplomasRes.data.results || diplomasRes.data;
-            const userData = usersRes.data.results || usersRes.data;
-            setDiplomas(Array.isArray(diplomaData) ? diplomaData : []);
-            setUsers(Array.isArray(userData) ? userData : []);
+            // Réponse d'une recherche déjà remplacée par une plus récente
+            if (request !== latestRequest.current) return;
+            setDiplomas(diplomasRes.data.results || []);
+            setDiplomaNext(diplomasRes.data.next || null);
+            setUsers(usersRes.data.results || []);
+            setUserNext(usersRes.data.next || null);
+            setError(null);
         } catch (err) {
-            setError("Erreur lors de la récupération des données.");
+            if (request === latestRequest.current) {
+                setError("Erreur lors de la récupération des données.");
+            }
         } finally {
-            setLoading(false);
+            if (request === latestRequest.current) {
+                setLoading(false);
+            }
         }
     };
 
     useEffect(() => {
-        fetchData();
+        fetchStats();
     }, []);
 
+    useEffect(() => {
+        const term = searchTerm.trim();
+        const timer = setTimeout(() => fetchLists(term), term ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
+
+    // Page suivante via le curseur renvoyé par l'API (il conserve `search`)
+    const loadMore = async () => {
+        const next = activeTab === 'diplomas' ? diplomaNext : userNext;
+        if (!next || loadingMore) return;
+        const request = latestRequest.current;
+        setLoadingMore(true);
+        try {
+            const response = await api.get(next);
+            if (request !== latestRequest.current) return;
+            const results = response.data.results || [];
+            if (activeTab === 'diplomas') {
+                setDiplomas((prev) => [...prev, ...results]);
+                setDiplomaNext(response.data.next || null);
+            } else {
+                setUsers((prev) => [...prev, ...results]);
+                setUserNext(response.data.next || null);
+            }
+        } catch (err) {
+            setError("Erreur lors de la récupération des données.");
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleCreateDiploma = async (e) => {
         e.preventDefault();
         setSubmitting(true);
@@ -56,7 +111,8 @@ const AdminDashboard = () => {
                 graduation_date: new Date().toISOString().split('T')[0],
                 is_signed: false
             });
-            fetchData();
+            fetchStats();
+            fetchLists(searchTerm.trim());
         } catch (err) {
             alert("Erreur lors de la création du diplôme.");
         } finally {
@@ -64,17 +120,6 @@ const AdminDashboard = () => {
         }
     };
 
-    const filteredDiplomas = Array.isArray(diplomas) ? diplomas.filter(d =>
-        d.student_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        d.student_id?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        d.serial_number?.toLowerCase().includes(searchTerm.toLowerCase())
-    ) : [];
-
-    const filteredUsers = Array.isArray(users) ? users.filter(u =>
-        u.username?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        u.email?.toLowerCase().includes(searchTerm.toLowerCase())
-    ) : [];
-
     if (loading) {
         return (
             <div className="min-h-[60vh] flex items-center justify-center">
@@ -200,7 +245,7 @@ const AdminDashboard = () => {
                         </div>
                         <TrendingUp className="w-5 h-5 text-green-500" />
                     </div>
-                    <div className="text-3xl font-bold text-white mb-1">{diplomas.length}</div>
+                    <div className="text-3xl font-bold text-white mb-1">{stats.diplomas}</div>
                     <div className="text-sm text-slate-400">Diplômes Émis</div>
                 </div>
 
@@ -211,7 +256,7 @@ const AdminDashboard = () => {
                         </div>
                         <TrendingUp className="w-5 h-5 text-green-500" />
                     </div>
-                    <div className="text-3xl font-bold text-white mb-1">{users.length}</div>
+                    <div className="text-3xl font-bold text-white mb-1">{stats.users}</div>
                     <div className="text-sm text-slate-400">Utilisateurs</div>
                 </div>
 
@@ -222,7 +267,7 @@ const AdminDashboard = () => {
                         </div>
                         <TrendingUp className="w-5 h-5 text-green-500" />
                     </div>
-                    <div className="text-3xl font-bold text-white mb-1">{diplomas.filter(d => d.is_signed).length}</div>
+                    <div className="text-3xl font-bold text-white mb-1">{stats.signed_diplomas}</div>
                     <div className="text-sm text-slate-400">Signés</div>
                 </div>
 
@@ -233,7 +278,7 @@ const AdminDashboard = () => {
                         </div>
                         <TrendingUp className="w-5 h-5 text-green-500" />
                     </div>
-                    <div className="text-3xl font-bold text-white mb-1">{diplomas.filter(d => !d.is_signed).length}</div>
+                    <div className="text-3xl font-bold text-white mb-1">{stats.pending_diplomas}</div>
                     <div className="text-sm text-slate-400">En Attente</div>
                 </div>
             </div>
@@ -299,7 +344,7 @@ const AdminDashboard = () => {
                                 </tr>
                             </thead>
                             <tbody className="divide-y divide-slate-800/50">
-                                {filteredDiplomas.map((diploma) => (
+                                {diplomas.map((diploma) => (
                                     <tr key={diploma.id} className="hover:bg-slate-800/30 transition-colors group">
                                         <td className="px-6 py-4">
                                             <div className="flex items-center gap-3">
@@ -352,12 +397,14 @@ const AdminDashboard = () => {
                                     <th className="px-6 py-4 text-sm font-semibold text-slate-400">Utilisateur</th>
                                     <th className="px-6 py-4 text-sm font-semibold text-slate-400">Email</th>
                                     <th className="px-6 py-4 text-sm font-semibold text-slate-400">Rôle</th>
+                                    <th className="px-6 py-4 text-sm font-semibold text-slate-400">Réputation</th>
+                                    <th className="px-6 py-4 text-sm font-semibold text-slate-400">Activité</th>
                                     <th className="px-6 py-4 text-sm font-semibold text-slate-400">Inscription</th>
                                     <th className="px-6 py-4 text-sm font-semibold text-slate-400 text-right">Actions</th>
                                 </tr>
                             </thead>
                             <tbody className="divide-y divide-slate-800/50">
-                                {filteredUsers.map((user) => (
+                                {users.map((user) => (
                                     <tr key={user.id} className="hover:bg-slate-800/30 transition-colors group">
                                         <td className="px-6 py-4">
                                             <div className="flex items-center gap-3">
@@ -374,6 +421,10 @@ const AdminDashboard = () => {
                                                 {user.role || 'Étudiant'}
                                             </span>
                                         </td>
+                                        <td className="px-6 py-4 text-white font-medium">{user.stats?.reputation ?? 0}</td>
+                                        <td className="px-6 py-4 text-slate-400 text-sm">
+                                            {user.stats?.question_count ?? 0} Q · {user.stats?.answer_count ?? 0} R · {user.stats?.accepted_count ?? 0} acceptées
+                                        </td>
                                         <td className="px-6 py-4 text-slate-400 text-sm">
                                             {new Date(user.date_joined).toLocaleDateString()}
                                         </td>
@@ -391,6 +442,19 @@ const AdminDashboard = () => {
                     </div>
                 </div>
             )}
+
+            {(activeTab === 'diplomas' ? diplomaNext : userNext) && (
+                <div className="flex justify-center">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="flex items-center gap-2 bg-slate-900 border border-slate-800 text-slate-300 px-6 py-3 rounded-xl hover:bg-slate-800 transition-all disabled:opacity-50"
+                    >
+                        {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+                        {activeTab === 'diplomas' ? 'Charger plus de diplômes' : "Charger plus d'utilisateurs"}
+                    </button>
+                </div>
+            )}
         </div>
     );
 };
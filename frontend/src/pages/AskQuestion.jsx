@@ -1,5 +1,5 @@
-import React, { useState } from 'react';
-import { useNavigate } from 'react-router-dom';
+import React, { useState, useEffect } from 'react';
+import { Link, useNavigate } from 'react-router-dom';
 import { AlertCircle, Tag as TagIcon, Loader2 } from 'lucide-react';
 import api from '../api';
 
@@ -11,8 +11,49 @@ const AskQuestion = () => {
     });
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState('');
+    const [suggestions, setSuggestions] = useState([]);
+    const [similar, setSimilar] = useState([]);
     const navigate = useNavigate();
 
+    // Suggestions pour le tag en cours de saisie (dernier mot), les plus utilisés d'abord
+    useEffect(() => {
+        const words = formData.tags_raw.split(/[\s,]+/);
+        const prefix = words[words.length - 1];
+        if (!prefix) {
+            setSuggestions([]);
+            return;
+        }
+        const timer = setTimeout(async () => {
+            try {
+                const response = await api.get('tags/autocomplete/', { params: { q: prefix, limit: 8 } });
+                const start = formData.tags_raw.slice(0, formData.tags_raw.length - prefix.length);
+                setSuggestions(response.data.map((tag) => start + tag.name));
+            } catch (err) {
+                setSuggestions([]);
+            }
+        }, 200);
+        return () => clearTimeout(timer);
+    }, [formData.tags_raw]);
+
+    // Questions existantes proches du titre en cours de rédaction (doublons probables)
+    useEffect(() => {
+        const title = formData.title.trim();
+        if (title.length < 10) {
+            setSimilar([]);
+            return;
+        }
+        const timer = setTimeout(async () => {
+            try {
+                const tags = formData.tags_raw.split(/[\s,]+/).filter(tag => tag.trim() !== '');
+                const response = await api.post('questions/similar/', { title, tags });
+                setSimilar(response.data);
+            } catch (err) {
+                setSimilar([]);
+            }
+        }, 400);
+        return () => clearTimeout(timer);
+    }, [formData.title, formData.tags_raw]);
+
     const handleChange = (e) => {
         setFormData({
             ...formData,
@@ -88,6 +129,21 @@ const AskQuestion = () => {
                             onChange={handleChange}
                             required
                         />
+                        {similar.length > 0 && (
+                            <div className="bg-slate-950 border border-slate-800 rounded-xl p-4 space-y-2">
+                                <p className="text-slate-400 text-xs">Ces questions existent déjà, votre réponse s'y trouve peut-être :</p>
+                                <ul className="space-y-1">
+                                    {similar.map((question) => (
+                                        <li key={question.id} className="flex items-center justify-between gap-4 text-sm">
+                                            <Link to={`/question/${question.id}`} target="_blank" className="text-primary-400 hover:text-primary-300 truncate">
+                                                {question.title}
+                                            </Link>
+                                            <span className="text-slate-500 text-xs shrink-0">{question.answer_count} réponse(s)</span>
+                                        </li>
+                                    ))}
+                                </ul>
+                            </div>
+                        )}
                     </div>
 
                     <div className="space-y-2">
@@ -115,7 +171,14 @@ const AskQuestion = () => {
                                 placeholder="ex: reactjs javascript frontend"
                                 value={formData.tags_raw}
                                 onChange={handleChange}
+                                list="tag-suggestions"
+                                autoComplete="off"
                             />
+                            <datalist id="tag-suggestions">
+                                {suggestions.map((value) => (
+                                    <option key={value} value={value} />
+                                ))}
+                            </datalist>
                         </div>
                     </div>
                 </div>
@@ -1,31 +1,20 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Search, Filter, Plus, GraduationCap, Download, ExternalLink, Loader2 } from 'lucide-react';
 import { Link } from 'react-router-dom';
 import api from '../api';
 
 const DiplomaList = () => {
     const [diplomas, setDiplomas] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState(null);
     const [searchTerm, setSearchTerm] = useState('');
+    const latestRequest = useRef(0);
 
     const [user, setUser] = useState(null);
 
     useEffect(() => {
-        const fetchDiplomas = async () => {
-            try {
-                const response = await api.get('diplomas/');
-                // Gestion de la pagination (results) ou retour direct (array)
-                const data = response.data.results || response.data;
-                setDiplomas(Array.isArray(data) ? data : []);
-            } catch (err) {
-                setError("Erreur lors de la récupération des diplômes.");
-                setDiplomas([]);
-            } finally {
-                setLoading(false);
-            }
-        };
-
         const fetchUser = async () => {
             try {
                 const response = await api.get('users/me/');
@@ -35,15 +24,53 @@ const DiplomaList = () => {
             }
         };
 
-        fetchDiplomas();
         fetchUser();
     }, []);
 
-    const filteredDiplomas = Array.isArray(diplomas) ? diplomas.filter(d =>
-        d.student_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        d.student_id?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        d.serial_number?.toLowerCase().includes(searchTerm.toLowerCase())
-    ) : [];
+    // Recherche côté serveur (`?search=`) : la liste est paginée
+    useEffect(() => {
+        const term = searchTerm.trim();
+        const fetchDiplomas = async () => {
+            const request = ++latestRequest.current;
+            try {
+                const response = await api.get('diplomas/', { params: term ? { search: term } : {} });
+                // Réponse d'une recherche déjà remplacée par une plus récente
+                if (request !== latestRequest.current) return;
+                setDiplomas(response.data.results || []);
+                setNextPage(response.data.next || null);
+                setError(null);
+            } catch (err) {
+                if (request === latestRequest.current) {
+                    setError("Erreur lors de la récupération des diplômes.");
+                    setDiplomas([]);
+                }
+            } finally {
+                if (request === latestRequest.current) {
+                    setLoading(false);
+                }
+            }
+        };
+
+        const timer = setTimeout(fetchDiplomas, term ? 300 : 0);
+        return () => clearTimeout(timer);
+    }, [searchTerm]);
+
+    // Page suivante via le curseur renvoyé par l'API
+    const loadMore = async () => {
+        if (!nextPage || loadingMore) return;
+        const request = latestRequest.current;
+        setLoadingMore(true);
+        try {
+            const response = await api.get(nextPage);
+            if (request !== latestRequest.current) return;
+            setDiplomas((prev) => [...prev, ...(response.data.results || [])]);
+            setNextPage(response.data.next || null);
+        } catch (err) {
+            setError("Erreur lors de la récupération des diplômes.");
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     if (loading) {
         return (
@@ -105,14 +132,14 @@ const DiplomaList = () => {
                             </tr>
                         </thead>
                         <tbody className="divide-y divide-slate-800/50">
-                            {filteredDiplomas.length === 0 ? (
+                            {diplomas.length === 0 ? (
                                 <tr>
                                     <td colSpan="5" className="px-6 py-12 text-center text-slate-500">
                                         Aucun diplôme trouvé.
                                     </td>
                                 </tr>
                             ) : (
-                                filteredDiplomas.map((diploma) => (
+                                diplomas.map((diploma) => (
                                     <tr key={diploma.id} className="hover:bg-slate-800/30 transition-colors group">
                                         <td className="px-6 py-4">
                                             <div className="flex items-center gap-3">
@@ -157,6 +184,19 @@ const DiplomaList = () => {
                     </table>
                 </div>
             </div>
+
+            {nextPage && (
+                <div className="flex justify-center">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="flex items-center gap-2 bg-slate-900 border border-slate-800 text-slate-300 px-6 py-3 rounded-xl hover:bg-slate-800 transition-all disabled:opacity-50"
+                    >
+                        {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+                        Charger plus de diplômes
+                    </button>
+                </div>
+            )}
         </div>
     );
 };
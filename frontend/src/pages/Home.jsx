@@ -3,18 +3,24 @@ import { PlusCircle, TrendingUp, Clock, AlertCircle, Loader2, MessageSquare } fr
 import { Link } from 'react-router-dom';
 import api from '../api';
 
+// Seuls champs affichés par la liste (?fields=, voir QuestionListSerializer)
+const LIST_FIELDS = 'id,author,author_name,title,excerpt,tags_detail,created_at,votes,answers_count';
+
 const Home = () => {
     const [questions, setQuestions] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState(null);
 
     useEffect(() => {
         const fetchQuestions = async () => {
             try {
-                const response = await api.get('questions/');
+                const response = await api.get('questions/', { params: { fields: LIST_FIELDS } });
                 // Support pagination (results) ou array simple
                 const data = response.data.results || response.data;
                 setQuestions(Array.isArray(data) ? data : []);
+                setNextPage(response.data.next || null);
             } catch (err) {
                 setError("Impossible de charger les questions. Veuillez réessayer plus tard.");
                 setQuestions([]);
@@ -26,6 +32,21 @@ const Home = () => {
         fetchQuestions();
     }, []);
 
+    // Page suivante via le curseur renvoyé par l'API
+    const loadMore = async () => {
+        if (!nextPage || loadingMore) return;
+        setLoadingMore(true);
+        try {
+            const response = await api.get(nextPage);
+            setQuestions((prev) => [...prev, ...(response.data.results || [])]);
+            setNextPage(response.data.next || null);
+        } catch (err) {
+            setError("Impossible de charger plus de questions.");
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     if (loading) {
         return (
             <div className="min-h-[60vh] flex items-center justify-center">
@@ -97,7 +118,7 @@ const Home = () => {
                                     {question.title}
                                 </Link>
                                 <p className="text-slate-400 line-clamp-2 mb-4">
-                                    {question.description}
+                                    {question.excerpt}
                                 </p>
                                 <div className="flex flex-wrap items-center justify-between gap-4">
                                     <div className="flex gap-2">
@@ -118,6 +139,19 @@ const Home = () => {
                     </div>
                 ))}
             </div>
+
+            {nextPage && (
+                <div className="flex justify-center">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="flex items-center gap-2 bg-slate-900 border border-slate-800 text-slate-300 px-6 py-3 rounded-xl hover:bg-slate-800 transition-all disabled:opacity-50"
+                    >
+                        {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+                        Charger plus de questions
+                    </button>
+                </div>
+            )}
         </div>
     );
 };
@@ -1,8 +1,10 @@
 import React, { useState, useEffect } from 'react';
-import { User, MessageSquare, Award, Clock, GraduationCap, Loader2 } from 'lucide-react';
+import { useParams } from 'react-router-dom';
+import { User, MessageSquare, Award, Clock, GraduationCap, Loader2, HelpCircle, CheckCircle, ThumbsUp } from 'lucide-react';
 import api from '../api';
 
 const Profile = () => {
+    const { id } = useParams();
     const [profile, setProfile] = useState(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
@@ -10,8 +12,8 @@ const Profile = () => {
     useEffect(() => {
         const fetchProfile = async () => {
             try {
-                // Fetch me endpoint
-                const response = await api.get('users/me/');
+                // /user/:id : profil de cet utilisateur, /profile : le sien
+                const response = await api.get(id ? `users/${id}/` : 'users/me/');
                 setProfile(response.data);
             } catch (err) {
                 setError("Erreur lors de la récupération du profil.");
@@ -21,7 +23,7 @@ const Profile = () => {
         };
 
         fetchProfile();
-    }, []);
+    }, [id]);
 
     if (loading) {
         return (
@@ -39,6 +41,14 @@ const Profile = () => {
         );
     }
 
+    const stats = profile.stats || {};
+    const activity = [
+        { label: 'Questions', value: stats.question_count, icon: HelpCircle, color: 'text-primary-400' },
+        { label: 'Réponses', value: stats.answer_count, icon: MessageSquare, color: 'text-blue-400' },
+        { label: 'Réponses acceptées', value: stats.accepted_count, icon: CheckCircle, color: 'text-green-400' },
+        { label: 'Votes donnés', value: stats.votes_cast, icon: ThumbsUp, color: 'text-amber-400' },
+    ];
+
     return (
         <div className="max-w-4xl mx-auto space-y-8">
             <div className="bg-slate-900 border border-slate-800 p-8 rounded-[2.5rem] relative overflow-hidden">
@@ -65,7 +75,7 @@ const Profile = () => {
 
                     <div className="md:ml-auto flex gap-4">
                         <div className="text-center px-6 py-4 bg-slate-800/50 rounded-2xl border border-slate-700/50">
-                            <div className="text-2xl font-bold text-white">0</div>
+                            <div className="text-2xl font-bold text-white">{stats.reputation || 0}</div>
                             <div className="text-xs text-slate-500 uppercase font-bold">Points</div>
                         </div>
                         <div className="text-center px-6 py-4 bg-slate-800/50 rounded-2xl border border-slate-700/50">
@@ -80,12 +90,18 @@ const Profile = () => {
                 <div className="md:col-span-2 space-y-6">
                     <h2 className="text-2xl font-bold text-white flex items-center gap-3">
                         <MessageSquare className="w-6 h-6 text-primary-500" />
-                        Activité Récente
+                        Activité
                     </h2>
-                    <div className="space-y-4">
-                        <div className="p-8 text-center bg-slate-900/30 border border-slate-800 rounded-3xl text-slate-500">
-                            Aucune activité récente à afficher.
-                        </div>
+                    <div className="grid grid-cols-2 gap-4">
+                        {activity.map(({ label, value, icon: Icon, color }) => (
+                            <div key={label} className="p-6 bg-slate-900/50 border border-slate-800 rounded-3xl flex items-center gap-4">
+                                <Icon className={`w-8 h-8 ${color}`} />
+                                <div>
+                                    <div className="text-2xl font-bold text-white">{value || 0}</div>
+                                    <div className="text-xs text-slate-500 uppercase font-bold">{label}</div>
+                                </div>
+                            </div>
+                        ))}
                     </div>
                 </div>
 
@@ -1,7 +1,5 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import ReactMarkdown from 'react-markdown';
-import remarkGfm from 'remark-gfm';
 import { ThumbsUp, ThumbsDown, MessageSquare, CheckCircle, Loader2 } from 'lucide-react';
 import api from '../api';
 
@@ -14,20 +12,66 @@ const QuestionDetail = () => {
     const [newAnswer, setNewAnswer] = useState('');
     const [submitting, setSubmitting] = useState(false);
 
-    useEffect(() => {
-        const fetchQuestion = async () => {
-            try {
-                const response = await api.get(`questions/${id}/`);
-                setQuestion(response.data);
-            } catch (err) {
-                setError("Question non trouvée ou erreur serveur.");
-            } finally {
-                setLoading(false);
-            }
-        };
+    const fetchQuestion = useCallback(async () => {
+        try {
+            const response = await api.get(`questions/${id}/`, { params: { body_format: 'html' } });
+            setQuestion(response.data);
+        } catch (err) {
+            setError("Question non trouvée ou erreur serveur.");
+        } finally {
+            setLoading(false);
+        }
+    }, [id]);
 
+    useEffect(() => {
         fetchQuestion();
-    }, [id]);
+    }, [fetchQuestion]);
+
+    // Événements en direct (SSE, serveur ASGI) : votes, réponses et commentaires des autres utilisateurs
+    useEffect(() => {
+        if (typeof EventSource === 'undefined') return undefined;
+        const source = new EventSource(api.getUri({ url: `questions/${id}/events/` }));
+        const on = (name, update) => source.addEventListener(name, (event) => {
+            const data = JSON.parse(event.data);
+            setQuestion((current) => current && update(current, data));
+        });
+        const updateAnswer = (current, answerId, change) => ({
+            ...current,
+            answers: current.answers.map((a) => a.id === answerId ? change(a) : a),
+        });
+        const appendComment = (comments = [], comment) => (
+            comments.some((c) => c.id === comment.id) ? comments : [...comments, comment]
+        );
+
+        on('votes', (current, { answer, votes }) => (
+            answer === null ? { ...current, votes } : updateAnswer(current, answer, (a) => ({ ...a, votes }))
+        ));
+        on('answer', (current, { answer }) => (
+            current.answers.some((a) => a.id === answer.id)
+                ? current
+                : { ...current, answers: [...current.answers, answer], answers_count: current.answers.length + 1 }
+        ));
+        on('best_answer', (current, { answer }) => ({
+            ...current,
+            answers: current.answers.map((a) => ({ ...a, is_best_answer: a.id === answer })),
+        }));
+        on('comment', (current, { answer, comment }) => (
+            answer === null
+                ? { ...current, comments: appendComment(current.comments, comment) }
+                : updateAnswer(current, answer, (a) => ({ ...a, comments: appendComment(a.comments, comment) }))
+        ));
+        // Événements perdus : relecture complète
+        source.addEventListener('reset', fetchQuestion);
+
+        let connected = false;
+        source.onopen = () => {
+            // Reconnexion : des événements ont pu être manqués pendant la coupure
+            if (connected) fetchQuestion();
+            connected = true;
+        };
+        // Flux indisponible (serveur WSGI : 404) : EventSource abandonne de lui-même
+        return () => source.close();
+    }, [id, fetchQuestion]);
 
     const handleVote = async (value) => {
         const token = localStorage.getItem('access_token');
@@ -37,7 +81,28 @@ const QuestionDetail = () => {
         }
         try {
             const response = await api.post(`questions/${id}/vote/`, { value });
-            setQuestion({ ...question, votes: response.data.votes });
+            setQuestion((current) => ({ ...current, votes: response.data.votes }));
+        } catch (err) {
+            if (err.response?.status === 401) {
+                navigate('/login');
+            } else {
+                alert("Erreur lors du vote. Veuillez réessayer.");
+            }
+        }
+    };
+
+    const handleAnswerVote = async (answerId, value) => {
+        const token = localStorage.getItem('access_token');
+        if (!token) {
+            navigate('/login');
+            return;
+        }
+        try {
+            const response = await api.post(`answers/${answerId}/vote/`, { value });
+            setQuestion((current) => ({
+                ...current,
+                answers: current.answers.map((a) => a.id === answerId ? { ...a, votes: response.data.votes } : a),
+            }));
         } catch (err) {
             if (err.response?.status === 401) {
                 navigate('/login');
@@ -61,9 +126,14 @@ const QuestionDetail = () => {
                 question: id,
                 content: newAnswer
             });
-            // Refresh question to show new answer
-            const refreshed = await api.get(`questions/${id}/`);
-            setQuestion(refreshed.data);
+            // Réponse ajoutée telle que renvoyée par l'API (corps HTML compris), sans relire la question ;
+            // l'événement `answer` du flux peut l'avoir déjà ajoutée
+            const answer = response.data;
+            setQuestion((current) => (
+                current.answers.some((a) => a.id === answer.id)
+                    ? current
+                    : { ...current, answers: [...current.answers, answer], answers_count: current.answers.length + 1 }
+            ));
             setNewAnswer('');
         } catch (err) {
             if (err.response?.status === 401) {
@@ -126,9 +196,8 @@ const QuestionDetail = () => {
                 </div>
 
                 <div className="flex-1 text-slate-300 prose prose-invert max-w-none">
-                    <ReactMarkdown remarkPlugins={[remarkGfm]}>
-                        {question.description}
-                    </ReactMarkdown>
+                    {/* HTML rendu et assaini par le backend (body_format=html) */}
+                    <div dangerouslySetInnerHTML={{ __html: question.description_html }} />
                 </div>
             </div>
 
@@ -138,15 +207,23 @@ const QuestionDetail = () => {
                     <div key={answer.id} className="flex gap-6 pb-8 border-b border-slate-900 last:border-0 pt-4">
                         <div className="flex flex-col items-center gap-4">
                             {answer.is_best_answer && <CheckCircle className="w-6 h-6 text-green-500" />}
-                            <div className="p-2 bg-slate-900 border border-slate-800 rounded-full">
-                                <span className="font-bold text-slate-200">{answer.votes}</span>
-                            </div>
+                            <button
+                                onClick={() => handleAnswerVote(answer.id, 1)}
+                                className="p-2 bg-slate-900 border border-slate-800 rounded-full hover:border-primary-500 transition-all"
+                            >
+                                <ThumbsUp className="w-4 h-4 text-slate-400 hover:text-primary-500" />
+                            </button>
+                            <span className="font-bold text-slate-200">{answer.votes}</span>
+                            <button
+                                onClick={() => handleAnswerVote(answer.id, -1)}
+                                className="p-2 bg-slate-900 border border-slate-800 rounded-full hover:border-primary-500 transition-all"
+                            >
+                                <ThumbsDown className="w-4 h-4 text-slate-400 hover:text-red-500" />
+                            </button>
                         </div>
                         <div className="flex-1">
                             <div className="text-slate-300 mb-6 prose prose-invert max-w-none">
-                                <ReactMarkdown remarkPlugins={[remarkGfm]}>
-                                    {answer.content}
-                                </ReactMarkdown>
+                                <div dangerouslySetInnerHTML={{ __html: answer.content_html }} />
                             </div>
                             <div className="flex justify-end">
                                 <div className="bg-slate-900/50 p-3 rounded-xl border border-slate-800 text-sm">
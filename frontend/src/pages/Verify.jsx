@@ -4,7 +4,7 @@ import api from '../api';
 
 const Verify = () => {
     const [serial, setSerial] = useState('');
-    const [status, setStatus] = useState('idle'); // idle, loading, success, error
+    const [status, setStatus] = useState('idle'); // idle, loading, success, invalid, error
     const [verifiedDiploma, setVerifiedDiploma] = useState(null);
 
     const handleVerify = async (e) => {
@@ -15,11 +15,10 @@ const Verify = () => {
         setVerifiedDiploma(null);
 
         try {
-            // Using the verify action on DiplomaViewSet
-            // The endpoint is likely /api/diplomas/{serial}/verify/
-            const response = await api.get(`diplomas/${serial.trim()}/verify/`);
+            // Vérification publique : { status: VALID | UNSIGNED | INVALID_SIGNATURE, ... }, 404 si inconnu
+            const response = await api.get(`diplomas/${encodeURIComponent(serial.trim())}/verify/`);
             setVerifiedDiploma(response.data);
-            setStatus('success');
+            setStatus(response.data.status === 'INVALID_SIGNATURE' ? 'invalid' : 'success');
         } catch (err) {
             setStatus('error');
         }
@@ -91,6 +90,18 @@ const Verify = () => {
                     </div>
                 )}
 
+                {status === 'invalid' && (
+                    <div className="mt-8 p-6 bg-red-500/10 border border-red-500/20 rounded-2xl animate-in fade-in slide-in-from-bottom-4 duration-500">
+                        <div className="flex items-start gap-4">
+                            <AlertCircle className="w-8 h-8 text-red-500 shrink-0" />
+                            <div>
+                                <h3 className="text-lg font-bold text-white">Signature Invalide</h3>
+                                <p className="text-red-400/80 text-sm">Ce numéro de série existe mais sa signature ne correspond pas : le document a peut-être été altéré.</p>
+                            </div>
+                        </div>
+                    </div>
+                )}
+
                 {status === 'error' && (
                     <div className="mt-8 p-6 bg-red-500/10 border border-red-500/20 rounded-2xl animate-in fade-in slide-in-from-bottom-4 duration-500">
                         <div className="flex items-start gap-4">